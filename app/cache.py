@@ -0,0 +1,215 @@
+# app/cache.py - کش‌های درون‌پردازه‌ای و باطل‌سازی آن‌ها پس از نوشتن در پایگاه داده
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import Table, event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from app.db import Base
+from app.metrics import CACHE_LOOKUPS
+from app.models.TableVersion import TableVersion
+
+# کلید شامل نسخه‌ی جدول‌ها (table_versions) است، پس نوشتن در worker های دیگر هم فوراً دیده می‌شود؛
+#  TTL فقط برای نوشتن‌هایی است که از session نمی‌گذرند و نسخه را زیاد نمی‌کنند
+COUNT_CACHE_TTL = 60  # ثانیه
+COUNT_CACHE_MAX_ENTRIES = 1024
+REFERENCE_CACHE_TTL = 300  # ثانیه
+
+
+def statement_tables(statement) -> Set[str]:
+    """نام جدول‌هایی که یک کوئری از آن‌ها می‌خواند"""
+    return {t.name for t in find_tables(statement, include_joins=False) if isinstance(t, Table)}
+
+
+def dependent_tables(table_names: Iterable[str]) -> Set[str]:
+    """
+    جدول‌ها به همراه همه‌ی جدول‌هایی که با کلید خارجی به آن‌ها وابسته‌اند
+
+    حذف با ON DELETE CASCADE سطرهای جدول فرزند را هم تغییر می‌دهد.
+    """
+    result = set(table_names)
+    pending = list(result)
+    while pending:
+        name = pending.pop()
+        for table in Base.metadata.tables.values():
+            if table.name in result:
+                continue
+            if any(fk.column.table.name == name for fk in table.foreign_keys):
+                result.add(table.name)
+                pending.append(table.name)
+    return result
+
+
+class CountCache:
+    """
+    کش تعداد کل سطرهای لیست‌ها بر اساس جدول، مجموعه‌ی فیلترها و نسخه‌ی جدول‌ها
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(count_query, versions: Optional[dict] = None):
+        compiled = count_query.compile()
+        params = tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+        state = tuple(sorted((name, version) for name, (version, _) in (versions or {}).items()))
+        return str(compiled), params, state
+
+    def get(self, key) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                self.misses += 1
+                CACHE_LOOKUPS.labels("count", "*", "miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_LOOKUPS.labels("count", "*", "hit").inc()
+            return entry[0]
+
+    def set(self, key, tables: Set[str], total: int):
+        with self._lock:
+            self._entries[key] = (total, time.monotonic(), frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables: Iterable[str]):
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ReferenceCache:
+    """
+    کش جدول‌های کوچک و تقریباً ثابت (واحد اندازه‌گیری، سال زراعی، استان و ...)
+
+    هر جدول در اولین استفاده کامل خوانده و بر اساس id نگه داشته می‌شود و پس از
+    هر commit که در آن جدول نوشته باشد باطل می‌شود. اگر id پیدا نشود و نسخه‌ی جدول
+    (table_versions) از زمان خواندن عوض شده باشد، یعنی worker دیگری در آن نوشته است،
+    جدول دوباره خوانده می‌شود.
+    """
+
+    def __init__(self, ttl: float = REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._tables = {}
+        # شمارنده‌ی باطل‌سازی هر جدول؛ نسخه‌ای که پیش از باطل شدن شروع به خواندن کرده ذخیره نمی‌شود
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    @staticmethod
+    def _version(session: Session, name: str) -> int:
+        version = session.execute(
+            select(TableVersion.version).where(TableVersion.table_name == name)
+        ).scalar()
+        return version or 0
+
+    def _load(self, session: Session, model):
+        version = self._version(session, model.__tablename__)
+        rows = session.execute(select(*model.__table__.columns)).mappings().all()
+        return {row["id"]: SimpleNamespace(**row) for row in rows}, time.monotonic(), version
+
+    def _count(self, counter: dict, name: str, result: str):
+        counter[name] = counter.get(name, 0) + 1
+        CACHE_LOOKUPS.labels("reference", name, result).inc()
+
+    def get(self, session: Session, model, item_id: Optional[int]):
+        """ردیف با این id (فقط‌خواندنی) یا None اگر وجود نداشته باشد"""
+        name = model.__tablename__
+        # کوئری‌ها بدون قفل اجرا می‌شوند: گرفتن اتصال (تنها اتصال نویسنده) زیر قفل با batch
+        #  group commit که همین قفل را می‌خواهد بن‌بست می‌ساخت
+        with self._lock:
+            entry = self._tables.get(name)
+            generation = self._generations.get(name, 0)
+        if entry is not None and time.monotonic() - entry[1] <= self.ttl and (
+                item_id in entry[0] or self._version(session, name) == entry[2]):
+            with self._lock:
+                self._count(self.hits, name, "hit")
+            return entry[0].get(item_id)
+
+        # نبودن در کش، پایان TTL یا سطر جدید در worker دیگر (بدون این، بررسی کلید خارجی
+        #  تا پایان TTL خطای 404 می‌داد)
+        entry = self._load(session, model)
+        with self._lock:
+            self._count(self.misses, name, "miss")
+            current = self._tables.get(name)
+            if self._generations.get(name, 0) == generation and (current is None or current[2] <= entry[2]):
+                self._tables[name] = entry
+        return entry[0].get(item_id)
+
+    def invalidate(self, tables: Iterable[str]):
+        with self._lock:
+            for name in tables:
+                self._tables.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                for name in set(self.hits) | set(self.misses)
+            }
+
+
+count_cache = CountCache()
+reference_cache = ReferenceCache()
+
+
+# ---------------------------------------------------------------------------
+# ردیابی جدول‌های نوشته‌شده در هر session و باطل‌سازی کش پس از commit
+
+def mark_written(session: Session, table_names: Iterable[str]):
+    session.info.setdefault("written_tables", set()).update(table_names)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_tables(session, flush_context):
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    mark_written(session, {obj.__table__.name for obj in objects if hasattr(obj, "__table__")})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_dml_tables(orm_execute_state):
+    # INSERT/UPDATE/DELETE مستقیم از طریق session.execute
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            mark_written(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session):
+    written = session.info.pop("written_tables", None)
+    if written:
+        count_cache.invalidate(dependent_tables(written))
+        reference_cache.invalidate(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    # ممکن است کش در همین تراکنش از داده‌ی commit نشده پر شده باشد
+    written = session.info.pop("written_tables", None)
+    if written:
+        count_cache.invalidate(dependent_tables(written))
+        reference_cache.invalidate(written)
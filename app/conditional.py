@@ -0,0 +1,97 @@
+# app/conditional.py - GET شرطی (ETag / 304) بر اساس نسخه‌ی جدول‌ها
+#  Last-Modified فرستاده نمی‌شود: دقت آن ثانیه است و نسخه‌ها در یک ثانیه چند بار عوض می‌شوند،
+#  پس If-Modified-Since می‌توانست برای داده‌ی تغییرکرده 304 بدهد
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.cache import dependent_tables
+from app.db import SessionDep
+from app.models.TableVersion import TableVersion
+
+ETAG_SCHEMA_VERSION = "1"  # با تغییر شکل پاسخ‌ها زیاد شود تا ETag های قدیمی معتبر نمانند
+
+
+# ---------------------------------------------------------------------------
+# افزایش نسخه‌ی جدول‌ها در همان تراکنشی که در آن‌ها نوشته شده است
+
+def bump_table_versions(connection, table_names: Iterable[str]):
+    for name in sorted(table_names):
+        statement = insert(TableVersion).values(table_name=name, version=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TableVersion.table_name],
+            set_={"version": TableVersion.version + 1, "updated_at": func.now()}
+        )
+        connection.execute(statement)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_written_table_versions(session):
+    session.flush()
+    written = session.info.get("written_tables")
+    if written:
+        bump_table_versions(session.connection(), dependent_tables(written))
+
+
+# ---------------------------------------------------------------------------
+# خواندن نسخه‌ها و ساخت ETag
+
+def read_versions(session: Session, tables: Iterable[str]) -> Dict[str, Tuple[int, Optional[object]]]:
+    tables = sorted(set(tables))
+    rows = session.execute(
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(tables))
+    ).all()
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+    return {name: found.get(name, (0, None)) for name in tables}
+
+
+def make_etag(request: Request, versions: dict) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    state = ",".join(f"{name}:{version}" for name, (version, _) in versions.items())
+    digest = hashlib.sha1(
+        f"{ETAG_SCHEMA_VERSION}|{request.url.path}?{query}|{state}".encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # مقایسه‌ی ضعیف طبق RFC 9110 برای If-None-Match
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and _etag_matches(if_none_match, etag)
+
+
+class ConditionalGet:
+    """
+    Dependency برای GET های فقط‌خواندنی: ETag را از نسخه‌ی جدول‌های
+    استفاده‌شده می‌سازد و اگر کلاینت نسخه‌ی فعلی را داشته باشد پیش از اجرای
+    کوئری‌های شمارش و صفحه پاسخ 304 برمی‌گرداند.
+    """
+
+    def __init__(self, *models):
+        # مدل‌ها یا نام جدول‌هایی که پاسخ از آن‌ها ساخته می‌شود
+        self.tables = tuple(getattr(model, "__tablename__", model) for model in models)
+
+    def check(self, request: Request, response: Response, versions: dict):
+        etag = make_etag(request, versions)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if is_not_modified(request, etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    def __call__(self, request: Request, response: Response, session: SessionDep):
+        self.check(request, response, read_versions(session, self.tables))
+
@@ -1,13 +1,19 @@
 
 from fastapi import FastAPI
-from .db import create_db_and_tables
+from .db import ASYNC_READS
+from .hashing import hash_pool
+from .instrumentation import QueryStatsMiddleware
+from .maintenance import MAINTENANCE_ENABLED, scheduler
+from .metrics import MetricsMiddleware, mark_process_dead
+from .schema import check_schema_on_startup
+from .writer import writer
 from .routers import (
     provinces_router, city_router, village_router,
     factory_router, user_router, auth_router,
     measure_unit_router, pesticide_router, seed_router,
     crop_year_router, product_router, payment_reason_router,
     product_price_router, purity_price_router,
-    farmer_router
+    farmer_router, debug_router, metrics_router
 )
 
 app = FastAPI(
@@ -16,9 +22,24 @@ app = FastAPI(
     version="0.0.1",
 )
 
+# تعداد و زمان کوئری‌های هر درخواست در هدر Server-Timing
+app.add_middleware(QueryStatsMiddleware)
+# تأخیر و تعداد درخواست‌ها برای /metrics
+app.add_middleware(MetricsMiddleware)
+
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    check_schema_on_startup()
+    hash_pool.start()
+    if MAINTENANCE_ENABLED:
+        scheduler.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    scheduler.stop()
+    writer.stop()
+    hash_pool.shutdown()
+    mark_process_dead()
 
 # Include all routers
 app.include_router(user_router)
@@ -35,4 +56,10 @@ app.include_router(product_router)
 app.include_router(payment_reason_router)
 app.include_router(product_price_router)
 app.include_router(purity_price_router)
-app.include_router(farmer_router)
\ No newline at end of file
+app.include_router(farmer_router)
+app.include_router(debug_router)
+app.include_router(metrics_router)
+
+if ASYNC_READS:
+    from .routers.AsyncRoutes import use_async_routes
+    use_async_routes(app)
@@ -0,0 +1,52 @@
+# app/crud.py - ایجاد سطر با یک INSERT ... RETURNING و تبدیل خطای محدودیت‌ها به پاسخ HTTP
+import re
+from typing import Dict, Optional, Union
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# پیام SQLite برای UNIQUE: "UNIQUE constraint failed: city.name, city.province_id"
+_UNIQUE_FAILED = re.compile(r"UNIQUE constraint failed: (.+)")
+
+
+def integrity_error_to_http(error: IntegrityError,
+                            duplicate_detail: Union[str, Dict[str, str]],
+                            missing_detail: Optional[str] = None) -> HTTPException:
+    """
+    تبدیل IntegrityError به همان پاسخ‌های 400/404 که قبلاً با SELECT پیش از درج برگردانده می‌شد
+
+    duplicate_detail می‌تواند برای جدول‌هایی با چند ستون یکتا، پیام هر ستون را جدا بدهد.
+    """
+    message = str(error.orig)
+
+    match = _UNIQUE_FAILED.search(message)
+    if match:
+        if isinstance(duplicate_detail, dict):
+            columns = [name.strip().split(".")[-1] for name in match.group(1).split(",")]
+            for column in columns:
+                if column in duplicate_detail:
+                    return HTTPException(status_code=400, detail=duplicate_detail[column])
+            return HTTPException(status_code=400, detail="Duplicate value")
+        return HTTPException(status_code=400, detail=duplicate_detail)
+
+    if "FOREIGN KEY constraint failed" in message and missing_detail:
+        return HTTPException(status_code=404, detail=missing_detail)
+
+    return HTTPException(status_code=400, detail="Integrity constraint violated")
+
+
+def insert_returning(session: Session, model, values: dict,
+                     duplicate_detail: Union[str, Dict[str, str]],
+                     missing_detail: Optional[str] = None):
+    """
+    درج یک سطر و خواندن همه‌ی ستون‌های آن (از جمله پیش‌فرض‌های سمت سرور) در یک رفت‌وبرگشت
+
+    یکتایی و وجود سطر والد را خود پایگاه داده بررسی می‌کند، پس SELECT پیش از درج لازم نیست.
+    """
+    try:
+        return session.scalars(insert(model).values(**values).returning(model)).one()
+    except IntegrityError as e:
+        # تراکنش درخواست را get_session برمی‌گرداند (rollback)
+        raise integrity_error_to_http(e, duplicate_detail, missing_detail)
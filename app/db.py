@@ -1,39 +1,147 @@
 # app/db.py -
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker, declarative_base
 import logging
+import os
+import time
+
+from app.metrics import DB_CONNECTION_WAIT, instrument_engine
 
 logger = logging.getLogger(__name__)
 
 sqlite_file_name = "../database.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
+# DB_ASYNC_READS=1: مسیرهای پرترافیک (لیست‌ها، جستجوی کشاورز) با aiosqlite اجرا شوند و refresh-token async روی نویسنده‌ی همگام
+ASYNC_READS = os.getenv("DB_ASYNC_READS", "").lower() in ("1", "true", "yes")
+
+# پروفایل‌های کارایی SQLite (متغیر محیطی DB_PROFILE)
+#  durable: هر commit تا fsync کامل منتظر می‌ماند (رفتار پیش‌فرض SQLite)
+#  balanced: در حالت WAL با synchronous=NORMAL پایگاه داده خراب نمی‌شود، ولی با قطع برق
+#            ممکن است آخرین commit ها از دست بروند؛ کش و mmap بزرگ‌تر
+#  fast: بدون fsync؛ فقط برای محیط توسعه، تست و بارگذاری اولیه‌ی داده
+SQLITE_PROFILES = {
+    "durable": {
+        "synchronous": "FULL",
+        "cache_size": -2000,  # منفی یعنی KiB (حدود 2MB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,  # صفحه
+        "cached_statements": 128,  # کش prepared statement های درایور sqlite3
+    },
+    "balanced": {
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # 64MB
+        "mmap_size": 268435456,  # 256MB
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+        "cached_statements": 256,
+    },
+    "fast": {
+        "synchronous": "OFF",
+        "cache_size": -262144,  # 256MB
+        "mmap_size": 1073741824,  # 1GB
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+        "cached_statements": 512,
+    },
+}
+
+# PRAGMA هایی که در هر اتصال اجرا می‌شوند (cached_statements آرگومان اتصال است)
+PROFILE_PRAGMAS = ("synchronous", "cache_size", "mmap_size", "temp_store", "wal_autocheckpoint")
+
+SQLITE_PROFILE_NAME = os.getenv("DB_PROFILE", "durable").lower()
+if SQLITE_PROFILE_NAME not in SQLITE_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE {SQLITE_PROFILE_NAME!r}; expected one of {sorted(SQLITE_PROFILES)}")
+SQLITE_PROFILE = SQLITE_PROFILES[SQLITE_PROFILE_NAME]
+
 # 🚨 **تنظیمات مهم برای SQLite**
 connect_args = {
     "check_same_thread": False,
     "timeout": 30,  # افزایش timeout برای قفل
-    "isolation_level": None  # برای auto-commit mode
+    "cached_statements": SQLITE_PROFILE["cached_statements"],
 }
 
+# DB_ECHO=1: چاپ همه‌ی کوئری‌ها (در بار واقعی بسیار پرهزینه است)
+SQL_ECHO = os.getenv("DB_ECHO", "").lower() in ("1", "true", "yes")
+
+# تعداد اتصال‌های فقط‌خواندنی؛ هم‌اندازه‌ی thread pool پیش‌فرض FastAPI (anyio: 40 thread)
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "40"))
+
+# engine نویسنده: SQLite در هر لحظه فقط یک نویسنده دارد، پس یک اتصال کافی است
 engine = create_engine(
     sqlite_url,
     connect_args=connect_args,
-    echo=True,  # برای دیدن کوئری‌ها
+    echo=SQL_ECHO,  # فقط برای اشکال‌زدایی؛ آمار کوئری‌ها در app/instrumentation.py
     pool_pre_ping=True,
     pool_size=1,  # برای SQLite بهتر است
     max_overflow=0
 )
 
+# engine خواننده‌ها: در حالت WAL خواننده‌ها نه منتظر نویسنده می‌مانند و نه منتظر هم
+read_engine = create_engine(
+    f"sqlite:///file:{sqlite_file_name}?mode=ro&uri=true",
+    connect_args=connect_args,
+    echo=SQL_ECHO,
+    pool_pre_ping=True,
+    pool_size=READ_POOL_SIZE,
+    max_overflow=0
+)
+
+def apply_sqlite_profile(cursor, profile: dict = None):
+    for name in PROFILE_PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={(profile or SQLITE_PROFILE)[name]}")
+
+
 # Enable foreign key enforcement for SQLite
 @event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # فقط روی فایل تازه (پیش از WAL و ساخت جدول‌ها) اثر دارد؛ پایگاه داده‌ی موجود با
+    #  python -m app.maintenance vacuum --full تبدیل می‌شود
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
     cursor.execute("PRAGMA journal_mode=WAL")  # 🚨 حالت WAL برای concurrent access
     cursor.execute("PRAGMA busy_timeout=5000")  # 🚨 افزایش timeout
+    apply_sqlite_profile(cursor)
     cursor.close()
+    # درایور sqlite3 خودش BEGIN نفرستد؛ شروع تراکنش در begin_transaction انجام می‌شود
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(read_engine, "connect")
+def set_reader_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # اتصال با mode=ro باز شده؛ query_only نوشتن ناخواسته را با خطا متوقف می‌کند
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    apply_sqlite_profile(cursor)
+    cursor.close()
+    dbapi_connection.isolation_level = None
+
+
+# نوع BEGIN از execution option «sqlite_begin» خوانده می‌شود:
+#  DEFERRED: قفل نوشتن فقط با اولین نوشتن گرفته می‌شود (درخواست‌های فقط‌خواندنی هرگز آن را نمی‌گیرند)
+#  IMMEDIATE: قفل نوشتن از ابتدای تراکنش؛ جلوی SQLITE_BUSY هنگام ارتقای قفل را می‌گیرد
+@event.listens_for(engine, "begin")
+@event.listens_for(read_engine, "begin")
+def begin_transaction(conn):
+    mode = conn.get_execution_options().get("sqlite_begin", "DEFERRED")
+    conn.exec_driver_sql(f"BEGIN {mode}")
+
+
+write_engine = engine.execution_options(sqlite_begin="IMMEDIATE")
+
+instrument_engine(engine, "writer")
+instrument_engine(read_engine, "reader")
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -43,18 +151,81 @@ SessionLocal = sessionmaker(
     class_=Session
 )
 
+
+def read_pragmas(connection, names=("journal_mode", "foreign_keys", "busy_timeout", "query_only") + PROFILE_PRAGMAS):
+    """مقدار فعلی PRAGMA ها روی یک اتصال (برای گزارش /debug/db)"""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def read_session() -> Session:
+    """session روی اتصال‌های فقط‌خواندنی (برای کارهای بیرون از get_session مثل export)"""
+    return SessionLocal(bind=read_engine)
+
 Base = declarative_base()
 
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
 
+
+# هر session در طول درخواست یک اتصال نگه می‌دارد و بین dependency، handler و بستن session
+# چند بار منتظر thread می‌ماند. اگر تعداد درخواست‌ها از اتصال‌ها بیشتر شود، thread ها روی
+# گرفتن اتصال قفل می‌شوند و درخواست‌هایی که اتصال دارند thread پیدا نمی‌کنند (بن‌بست تا
+# pool_timeout). پس پیش از ورود به thread pool جا گرفته می‌شود: به تعداد خواننده‌ها و یک نویسنده.
+_connection_slots = weakref.WeakKeyDictionary()
+
+
+def _slot_semaphore(read_only: bool) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _connection_slots:
+        _connection_slots[loop] = {True: asyncio.Semaphore(READ_POOL_SIZE), False: asyncio.Semaphore(1)}
+    return _connection_slots[loop][read_only]
+
+
+@asynccontextmanager
+async def connection_slot(read_only: bool):
+    """جای یک اتصال خواننده یا تنها نویسنده تا پایان بلوک async with"""
+    started = time.perf_counter()
+    async with _slot_semaphore(read_only):
+        DB_CONNECTION_WAIT.labels("reader" if read_only else "writer").observe(time.perf_counter() - started)
+        yield
+
+
+async def reserve_connection(request: Request):
+    async with connection_slot(request.method in READ_ONLY_METHODS):
+        yield
+
+
+def _run_transaction(read_only: bool, function, *args):
+    bind = read_engine if read_only else write_engine
+    with SessionLocal(bind=bind) as db, db.begin():
+        return function(db, *args)
+
+
+async def run_in_session(function, *args, read_only: bool = False):
+    """
+    function(session, *args) در یک تراکنش جدا با همان جای اتصال get_session
+
+    برای handler های async که بخشی از کارشان (مثل هش رمز عبور) نباید اتصال نویسنده یا قفل
+    نوشتن را نگه دارد؛ تراکنش فقط دور همان function است و در پایان commit می‌شود.
+    """
+    async with connection_slot(read_only):
+        return await run_in_threadpool(_run_transaction, read_only, function, *args)
+
+
 # 🚨 **Dependency اصلاح شده**
-def get_session():
-    db = SessionLocal()
+# هر درخواست دقیقاً یک تراکنش دارد که همین‌جا commit می‌شود؛ handler ها خودشان commit نمی‌کنند
+# درخواست‌های GET/HEAD/OPTIONS روی خواننده‌ها و بقیه روی تنها اتصال نویسنده اجرا می‌شوند
+def get_session(request: Request, _slot: None = Depends(reserve_connection)):
+    bind = read_engine if request.method in READ_ONLY_METHODS else write_engine
+    db = SessionLocal(bind=bind)
     try:
         yield db
-        db.commit()  # حتماً commit کن
-        logger.info("✅ Session committed successfully")
+        db.commit()
+        logger.debug("✅ Session committed successfully")
+    except HTTPException:
+        # پاسخ خطای عادی (400/404/...)، نه خطای پایگاه داده
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"❌ Session rollback due to error: {e}")
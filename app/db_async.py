@@ -0,0 +1,55 @@
+# app/db_async.py - مسیر async پایگاه داده با aiosqlite (فقط خواندن)
+#  فقط وقتی DB_ASYNC_READS فعال باشد import می‌شود (main.py)
+#  نویسنده‌ی async وجود ندارد: نوشتن‌ها از تنها اتصال نویسنده‌ی همگام، جای اتصال آن و group commit
+#  می‌گذرند (run_in_session در app.db)
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import (
+    READ_ONLY_METHODS, READ_POOL_SIZE, SQLITE_PROFILE, begin_transaction, logger, set_reader_pragma, sqlite_file_name
+)
+from app.metrics import instrument_engine
+
+async_read_engine = create_async_engine(
+    f"sqlite+aiosqlite:///file:{sqlite_file_name}?mode=ro&uri=true",
+    connect_args={"timeout": 30, "cached_statements": SQLITE_PROFILE["cached_statements"]},
+    pool_pre_ping=True,
+    pool_size=READ_POOL_SIZE,
+    max_overflow=0
+)
+
+# همان PRAGMA ها و همان مدیریت BEGIN که read_engine همگام دارد
+event.listen(async_read_engine.sync_engine, "connect", set_reader_pragma)
+event.listen(async_read_engine.sync_engine, "begin", begin_transaction)
+
+instrument_engine(async_read_engine.sync_engine, "async_reader")
+
+AsyncSessionLocal = async_sessionmaker(
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession
+)
+
+
+async def get_async_session(request: Request):
+    """مثل get_session برای مسیرهای خواندنی؛ مسیر نوشتنی باید از run_in_session استفاده کند"""
+    if request.method not in READ_ONLY_METHODS:
+        raise RuntimeError(f"{request.method} {request.url.path}: the async session is read-only")
+    db = AsyncSessionLocal(bind=async_read_engine)
+    try:
+        yield db
+        await db.commit()
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"❌ Session rollback due to error: {e}")
+        raise
+    finally:
+        await db.close()
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -0,0 +1,88 @@
+# app/export.py - خروجی کامل جدول‌ها به صورت NDJSON یا CSV بدون نگه داشتن همه‌ی سطرها در حافظه
+import csv
+import io
+import json
+
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.db import connection_slot, read_session
+
+EXPORT_BATCH_SIZE = 1000  # تعداد سطرهایی که در هر بار از cursor خوانده و به کلاینت فرستاده می‌شود
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_columns(model, schema):
+    """ستون‌های جدول متناظر با فیلدهای schema خروجی (بدون ستون‌های داخلی مثل رمز عبور)"""
+    return [model.__table__.c[name] for name in schema.model_fields]
+
+
+def iter_rows(query, schema, batch_size: int = EXPORT_BATCH_SIZE, session_factory=read_session):
+    """
+    خواندن سطرها با yield_per و برگرداندن دسته‌ای آن‌ها به صورت dict آماده‌ی JSON
+
+    session مخصوص خود را باز می‌کند چون session درخواست پیش از ارسال بدنه‌ی پاسخ بسته می‌شود.
+    """
+    with session_factory() as session:
+        result = session.execute(query.execution_options(yield_per=batch_size))
+        for partition in result.mappings().partitions():
+            yield [schema.model_validate(row).model_dump(mode="json") for row in partition]
+
+
+def ndjson_chunks(batches):
+    for batch in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+
+
+def csv_chunks(batches, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    # BOM برای نمایش درست حروف فارسی در Excel
+    buffer.write("\ufeff")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # جدول خالی: فقط سطر عنوان
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def with_reader_slot(chunks):
+    """
+    ارسال بدنه با یک جای اتصال خواننده تا پایان stream
+
+    اتصال iter_rows تا آخرین دسته باز می‌ماند؛ بدون جا، export های همزمان اتصال‌های read_engine را
+    از درخواست‌هایی که جا گرفته‌اند می‌گیرند.
+    """
+    async with connection_slot(read_only=True):
+        try:
+            async for chunk in iterate_in_threadpool(chunks):
+                yield chunk
+        finally:
+            # قطع اتصال کلاینت: session همین‌جا بسته می‌شود، نه هنگام جمع‌آوری زباله
+            await run_in_threadpool(chunks.close)
+
+
+def stream_export(query, schema, export_format: str, filename: str) -> StreamingResponse:
+    """
+    پاسخ stream شده برای یک کوئری select روی ستون‌های export_columns
+    """
+    batches = iter_rows(query, schema)
+    if export_format == "csv":
+        body = csv_chunks(batches, list(schema.model_fields))
+    else:
+        body = ndjson_chunks(batches)
+
+    return StreamingResponse(
+        with_reader_slot(body),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
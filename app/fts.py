@@ -0,0 +1,88 @@
+# app/fts.py - جستجوی متن کامل کشاورزان با FTS5
+#  ساخت/بازسازی ایندکس برای پایگاه داده‌ی موجود:
+#  python -m app.fts rebuild
+import sys
+from typing import Optional
+
+from sqlalchemy import literal_column, select, table, text
+
+from app.models.Farmer import FARMER_FTS_DDL, Farmer
+from app.normalize import normalize_persian
+
+# tokenizer سه‌حرفی عبارت‌های کوتاه‌تر از سه کاراکتر را پیدا نمی‌کند
+FTS_MIN_TERM_LENGTH = 3
+
+farmers_fts = table("farmers_fts")
+
+
+def ensure_farmer_fts(bind) -> bool:
+    """
+    ساخت جدول FTS و triggerها اگر وجود نداشته باشند؛ در صورت ساخت، ایندکس از روی داده‌های فعلی پر می‌شود
+    """
+    with bind.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='farmers_fts'")
+        ).first()
+        for statement in FARMER_FTS_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO farmers_fts(farmers_fts) VALUES('rebuild')"))
+    return not exists
+
+
+def rebuild_farmer_fts(bind):
+    """بازسازی کامل ایندکس از روی جدول farmers"""
+    with bind.begin() as conn:
+        for statement in FARMER_FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO farmers_fts(farmers_fts) VALUES('rebuild')"))
+        conn.execute(text("INSERT INTO farmers_fts(farmers_fts) VALUES('optimize')"))
+
+
+def can_use_fts(term: str) -> bool:
+    return len(normalize_persian(term)) >= FTS_MIN_TERM_LENGTH
+
+
+def fts_phrase(term: str, column: Optional[str] = None) -> str:
+    """
+    تبدیل عبارت کاربر به یک phrase امن برای MATCH (تطبیق زیررشته مثل ilike)؛ با column فقط در همان ستون
+
+    عبارت مثل ستون‌های *_key ایندکس‌شده یکسان می‌شود («علي» همان «علی» را پیدا می‌کند).
+    """
+    phrase = '"' + normalize_persian(term).strip().replace('"', '""') + '"'
+    return f"{column} : {phrase}" if column else phrase
+
+
+def farmer_search_subquery(term: str):
+    """
+    شناسه و امتیاز (bm25؛ مقدار کمتر یعنی مرتبط‌تر) کشاورزانی که با عبارت جستجو تطبیق دارند
+    """
+    return (
+        select(
+            literal_column("farmers_fts.rowid").label("farmer_id"),
+            literal_column("farmers_fts.rank").label("rank")
+        )
+        .select_from(farmers_fts)
+        .where(literal_column("farmers_fts").op("MATCH")(fts_phrase(term)))
+        .subquery("farmer_search")
+    )
+
+
+def farmer_column_match(column: str, term: str):
+    """شرط «id کشاورز در تطبیق‌های FTS یک ستون»؛ جایگزین ilike '%term%' روی همان ستون بدون پیمایش جدول"""
+    return Farmer.id.in_(
+        select(literal_column("farmers_fts.rowid"))
+        .select_from(farmers_fts)
+        .where(literal_column("farmers_fts").op("MATCH")(fts_phrase(term, column)))
+    )
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m app.fts rebuild")
+        sys.exit(2)
+
+    rebuild_farmer_fts(engine)
+    print("✅ farmers_fts rebuilt")
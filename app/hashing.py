@@ -0,0 +1,202 @@
+# app/hashing.py - هش و بررسی رمز عبور در process pool جدا با محدودیت صف
+#
+#  pbkdf2 با 30000 دور حدود ده‌ها میلی‌ثانیه CPU می‌گیرد؛ اجرای آن در thread pool مشترک باعث
+#  می‌شود هجوم login ها (ابتدای شیفت) همه‌ی thread ها و GIL را بگیرد و بقیه‌ی endpoint ها
+#  منتظر بمانند. اینجا محاسبه در process های جدا انجام می‌شود و وقتی صف پر است درخواست
+#  بلافاصله با 429 رد می‌شود (به جای اشغال یک thread دیگر).
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from app.metrics import (
+    PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_DEPTH, PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_REJECTED
+)
+
+# 0 یعنی بدون process pool (اجرا در همان thread)؛ برای تست و محیط توسعه
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# حداکثر کارهای در انتظار علاوه بر کارهای در حال اجرا؛ هر فراخوانی همگام (run) یک thread از
+#  thread pool (40 thread) را تا پایان هش نگه می‌دارد، پس کل ظرفیت (2 × کارگرها) خیلی کمتر از آن است
+HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1))))
+HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))  # ثانیه
+# زمان تقریبی یک هش زیر بار (pbkdf2 با 30000 دور روی هسته‌ی مشترک با worker ها)
+HASH_SECONDS = float(os.getenv("PASSWORD_HASH_SECONDS", "0.05"))
+# فراخوانی‌های async هیچ threadی نگه نمی‌دارند؛ صف آن‌ها عمیق‌تر است ولی فقط تا جایی که
+#  آخرین کار صف در نیمی از HASH_TIMEOUT تمام شود (1 کارگر: 100، 4 کارگر: 400)
+HASH_ASYNC_QUEUE_LIMIT = int(os.getenv(
+    "PASSWORD_HASH_ASYNC_QUEUE_LIMIT", str(int(max(HASH_WORKERS, 1) * HASH_TIMEOUT / 2 / HASH_SECONDS))
+))
+RETRY_AFTER_SECONDS = 1
+
+# استفاده از pbkdf2_sha256 به جای bcrypt برای جلوگیری از خطای 72 بایت
+#  (این ماژول در process های کارگر import می‌شود؛ به app.security و کلیدهای JWT وابسته نیست)
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256", "bcrypt"],
+    default="pbkdf2_sha256",
+    pbkdf2_sha256__default_rounds=30000
+)
+
+
+def verify_password_hash(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _call(function, *args):
+    """در process کارگر اجرا می‌شود: نتیجه و مدت محاسبه"""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHashPool:
+    """
+    ProcessPoolExecutor با سقف تعداد کارهای در جریان
+
+    run_async در handler های async بدون گرفتن thread منتظر نتیجه می‌ماند؛ run (برای کد همگام)
+    thread را نگه می‌دارد و سقف صف تعداد thread هایی را که منتظر هش می‌مانند محدود می‌کند.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT,
+                 timeout: float = HASH_TIMEOUT, async_queue_limit: int = HASH_ASYNC_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.async_queue_limit = async_queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_limit
+
+    @property
+    def async_capacity(self) -> int:
+        return self.workers + self.async_queue_limit
+
+    def start(self):
+        """ساخت process ها (در startup تا اولین login هزینه‌ی راه‌اندازی را ندهد)"""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            executor = self._get_executor()
+        # همه‌ی کارگرها همین حالا بالا می‌آیند
+        for future in [executor.submit(_call, int, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # باید با self._lock صدا زده شود
+        if self._executor is None:
+            # spawn: fork کردن process ای که thread دارد امن نیست
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _reject(self, operation: str, reason: str, status_code: int, detail: str):
+        PASSWORD_HASH_REJECTED.labels(operation, reason).inc()
+        raise HTTPException(
+            status_code=status_code, detail=detail, headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+    def _admit(self, operation: str, capacity: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pending >= capacity:
+                full = True
+            else:
+                full = False
+                self._pending += 1
+                executor = self._get_executor()
+        if full:
+            self._reject(operation, "queue_full", 429, "Too many concurrent authentication requests")
+        PASSWORD_HASH_QUEUE_DEPTH.inc()
+        return executor
+
+    def _release(self):
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+        with self._lock:
+            self._pending -= 1
+
+    def _broken(self, operation: str, executor):
+        # یک کارگر از بین رفته (یا pool بسته شده)؛ درخواست بعدی pool تازه می‌سازد
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        self._reject(operation, "unavailable", 503, "Password hashing is unavailable")
+
+    @staticmethod
+    def _observe(operation: str, started: float, elapsed: float):
+        PASSWORD_HASH_DURATION.labels(operation).observe(elapsed)
+        PASSWORD_HASH_QUEUE_WAIT.observe(time.perf_counter() - started - elapsed)
+
+    def run(self, operation: str, function, *args):
+        if self.workers <= 0:
+            result, elapsed = _call(function, *args)
+            PASSWORD_HASH_DURATION.labels(operation).observe(elapsed)
+            return result
+
+        executor = self._admit(operation, self.capacity)
+        started = time.perf_counter()
+        try:
+            future = executor.submit(_call, function, *args)
+            result, elapsed = future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            self._reject(operation, "timeout", 503, "Password hashing is overloaded")
+        except (BrokenProcessPool, RuntimeError):
+            self._broken(operation, executor)
+        finally:
+            self._release()
+
+        self._observe(operation, started, elapsed)
+        return result
+
+    async def run_async(self, operation: str, function, *args):
+        """مثل run، ولی منتظر ماندن برای process کارگر هیچ threadی را اشغال نمی‌کند"""
+        if self.workers <= 0:
+            # بدون process pool محاسبه در thread pool انجام می‌شود، نه روی event loop
+            return await run_in_threadpool(self.run, operation, function, *args)
+
+        executor = self._admit(operation, self.async_capacity)
+        started = time.perf_counter()
+        try:
+            future = executor.submit(_call, function, *args)
+            result, elapsed = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # wait_for خود future را لغو می‌کند
+            self._reject(operation, "timeout", 503, "Password hashing is overloaded")
+        except (BrokenProcessPool, RuntimeError):
+            self._broken(operation, executor)
+        finally:
+            self._release()
+
+        self._observe(operation, started, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers, "queue_limit": self.queue_limit,
+                "async_queue_limit": self.async_queue_limit,
+                "pending": self._pending, "started": self._executor is not None,
+            }
+
+
+hash_pool = PasswordHashPool()
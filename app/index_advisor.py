@@ -0,0 +1,208 @@
+# app/index_advisor.py - بررسی نقشه‌ی اجرای کوئری‌های واقعی مسیرها و پیشنهاد ایندکس
+#      python -m app.index_advisor [--rows 200]
+#
+#  روی یک پایگاه داده‌ی موقت و پرشده، درخواست‌های PROBES از طریق خود app اجرا می‌شوند، هر کوئری
+#  SELECT با EXPLAIN QUERY PLAN بررسی و پیمایش کامل جدول (SCAN) گزارش می‌شود. کلیدهای خارجی
+#  بدون ایندکس هم جدا فهرست می‌شوند (حذف CASCADE و فیلتر بر اساس والد به آن‌ها نیاز دارند).
+import argparse
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric, String, create_engine, event, insert
+from sqlalchemy.engine import Engine
+
+import app.db
+from app.db import Base, begin_transaction, set_reader_pragma, set_sqlite_pragma
+
+# جدول‌های کوچکی که ReferenceCache عمداً یک‌جا می‌خواند
+REFERENCE_TABLES = ("provinces", "measure_units", "crop_years")
+
+# (مسیر، جدول‌هایی که پیمایش کامل آن‌ها مجاز است)
+#  لیست بدون فیلتر صفحه‌ی اول را به ترتیب کلید اصلی می‌خواند (SCAN با LIMIT)؛ فیلترها و
+#  جستجوی تکی باید از ایندکس استفاده کنند
+PROBES: Sequence[Tuple[str, Tuple[str, ...]]] = (
+    ("/provinces/", ("provinces",)),
+    ("/city/?province_id=1", ()),
+    ("/village/?city_id=1", ()),
+    ("/factory/", ("factory",)),
+    ("/users/", ("users",)),
+    ("/users/1", ()),
+    ("/measure-units/", ("measure_units",)),
+    ("/pesticides/?measure_unit_id=1", ()),
+    ("/seeds/?measure_unit_id=1", ()),
+    ("/crop-years/", ("crop_years",)),
+    ("/products/?measure_unit_id=1", ()),
+    ("/products/?crop_year_id=1", ()),
+    ("/payment-reasons/", ("payment_reasons",)),
+    ("/product-prices/?crop_year_id=1", ()),
+    ("/purity-prices/?crop_year_id=1", ()),
+    ("/farmer/", ("farmers",)),
+    ("/farmer/?national_id=0000000001", ()),
+    ("/farmer/0000000001", ()),
+)
+
+# «SCAN t» یا «SCAN t USING [COVERING] INDEX i»؛ جدول مجازی FTS پیمایش جدول نیست و «SCAN CONSTANT ROW»
+#  تطبیق نمی‌خورد. subquery مادی‌شده (مثل anon_1) هم کامل پیمایش می‌شود و با همان نام گزارش می‌شود.
+_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?! VIRTUAL TABLE)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+class Finding(NamedTuple):
+    path: str
+    table: str
+    statement: str
+    plan: Tuple[str, ...]
+
+
+def full_scans(plan: Sequence[str]) -> List[str]:
+    """جدول‌هایی که در نقشه‌ی اجرا کامل پیمایش می‌شوند"""
+    return [match.group(1) for match in map(_SCAN.match, plan) if match]
+
+
+def explain(connection, statement: str, parameters=()) -> Tuple[str, ...]:
+    """ستون detail خروجی EXPLAIN QUERY PLAN (اتصال خام DBAPI)"""
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    return tuple(row[-1] for row in rows)
+
+
+def missing_fk_indexes(metadata=Base.metadata) -> List[Tuple[str, str]]:
+    """(جدول، ستون) کلیدهای خارجی که هیچ ایندکسی با آن ستون شروع نمی‌شود"""
+    missing = []
+    for table in metadata.sorted_tables:
+        leading = {next(iter(index.columns)).name for index in table.indexes}
+        leading.update(column.name for column in table.primary_key.columns)
+        for fk in table.foreign_keys:
+            if fk.parent.name not in leading:
+                missing.append((table.name, fk.parent.name))
+    return missing
+
+
+# ---------------------------------------------------------------------------
+# پایگاه داده‌ی موقت
+
+def _value(column, i: int, rows: int):
+    if column.foreign_keys:
+        return i % rows + 1
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return True
+    if isinstance(column_type, (Integer, Numeric, Float)):
+        return i + 1
+    if isinstance(column_type, DateTime):
+        return datetime(2030, 1, 1)
+    if column.name == "email":
+        return f"user{i + 1}@example.com"
+    if isinstance(column_type, String) and column_type.length and column_type.length <= 20:
+        return f"{i + 1:0{min(column_type.length, 10)}d}"
+    return f"{column.name} {i + 1}"
+
+
+def seed(engine, rows: int = 200, metadata=Base.metadata):
+    """rows سطر ساختگی در هر جدول (کلیدهای خارجی به سطرهای 1..rows اشاره می‌کنند)"""
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            columns = [
+                column for column in table.columns
+                if column.computed is None and not (column.primary_key and isinstance(column.type, Integer))
+            ]
+            connection.execute(insert(table), [
+                {column.name: _value(column, i, rows) for column in columns} for i in range(rows)
+            ])
+
+
+@contextmanager
+def temporary_database(path: str):
+    """engine های موقت با همان hook ها به جای engine های app.db (مثل fixture تست‌ها)"""
+    from app.fts import ensure_farmer_fts
+    from app.normalize import ensure_search_key_columns
+
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    read_engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    event.listen(read_engine, "connect", set_reader_pragma)
+    event.listen(read_engine, "begin", begin_transaction)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_key_columns(engine, Base.metadata)
+    ensure_farmer_fts(engine)
+
+    saved = app.db.engine, app.db.write_engine, app.db.read_engine
+    app.db.engine, app.db.write_engine, app.db.read_engine = (
+        engine, engine.execution_options(sqlite_begin="IMMEDIATE"), read_engine
+    )
+    try:
+        yield engine
+    finally:
+        app.db.engine, app.db.write_engine, app.db.read_engine = saved
+        engine.dispose()
+        read_engine.dispose()
+
+
+def probe(client, engine, probes=PROBES) -> List[Finding]:
+    """اجرای درخواست‌ها و بررسی نقشه‌ی همه‌ی SELECT های آن‌ها"""
+    from app.cache import count_cache
+
+    findings = []
+    for path, allowed in probes:
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                captured.append((statement, parameters))
+
+        # شمارش‌هایی که از کش جواب داده می‌شوند اجرا نمی‌شوند
+        count_cache.clear()
+        event.listen(Engine, "before_cursor_execute", capture)
+        try:
+            response = client.get(path)
+        finally:
+            event.remove(Engine, "before_cursor_execute", capture)
+        response.raise_for_status()
+
+        connection = engine.raw_connection()
+        try:
+            for statement, parameters in captured:
+                plan = explain(connection.cursor(), statement, parameters)
+                for table in full_scans(plan):
+                    if table not in allowed and table not in REFERENCE_TABLES:
+                        findings.append(Finding(path, table, " ".join(statement.split()), plan))
+        finally:
+            connection.close()
+    return findings
+
+
+def run(rows: int = 200, probes=PROBES) -> Dict[str, list]:
+    from fastapi.testclient import TestClient
+    from main import app as application
+
+    with tempfile.TemporaryDirectory() as workdir:
+        with temporary_database(os.path.join(workdir, "advisor.db")) as engine:
+            seed(engine, rows)
+            # بدون lifespan: ساختار همین‌جا ساخته شده است
+            findings = probe(TestClient(application), engine, probes)
+    return {"full_scans": findings, "missing_fk_indexes": missing_fk_indexes()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag full table scans in the queries each route runs")
+    parser.add_argument("--rows", type=int, default=200, help="rows seeded into every table")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows)
+    for table, column in report["missing_fk_indexes"]:
+        print(f"missing index: {table}.{column} (foreign key)")
+    for finding in report["full_scans"]:
+        print(f"SCAN {finding.table} in GET {finding.path}\n    {finding.statement}")
+        for line in finding.plan:
+            print(f"      {line}")
+    if not report["full_scans"] and not report["missing_fk_indexes"]:
+        print("no full scans")
+    return 1 if report["full_scans"] or report["missing_fk_indexes"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
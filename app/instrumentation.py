@@ -0,0 +1,116 @@
+# app/instrumentation.py - آمار کوئری‌های هر درخواست: تعداد، زمان کل، کندترین کوئری و N+1
+#  به جای echo=True؛ خروجی در هدر Server-Timing و لاگ کوئری‌های کند
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+# اجرای یک کوئری یکسان به این تعداد در یک درخواست مشکوک به N+1 است
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+
+# دستورهای کنترل تراکنش در شمارش N+1 حساب نمی‌شوند
+_CONTROL_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA")
+
+
+class QueryStats:
+    """آمار کوئری‌های یک درخواست"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.total = 0.0
+        self.slowest: Optional[str] = None
+        self.slowest_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest_time:
+            self.slowest, self.slowest_time = statement, duration
+        if not statement.lstrip().upper().startswith(_CONTROL_STATEMENTS):
+            self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """کوئری‌هایی که دست‌کم threshold بار با همین متن اجرا شده‌اند"""
+        return {statement: n for statement, n in self.statements.items() if n >= threshold}
+
+    def server_timing(self, elapsed: float) -> str:
+        parts = [
+            f'db;dur={self.total * 1000:.2f};desc="{self.count} queries"',
+            f"db-slowest;dur={self.slowest_time * 1000:.2f}",
+            f"app;dur={elapsed * 1000:.2f}",
+        ]
+        repeated = self.repeated()
+        if repeated:
+            parts.append(f'db-n-plus-one;desc="{max(repeated.values())}x same query"')
+        return ", ".join(parts)
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# روی کلاس Engine ثبت می‌شود تا همه‌ی engine ها (نویسنده، خواننده‌ها و async) را پوشش دهد
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if duration * 1000 >= SLOW_QUERY_MS:
+        label = stats.label if stats is not None else "-"
+        slow_query_logger.warning(f"🐢 Slow query ({duration * 1000:.1f} ms) in {label}: {' '.join(statement.split())}")
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: برای هر درخواست HTTP یک QueryStats می‌سازد و هنگام شروع پاسخ
+    هدر Server-Timing را اضافه می‌کند
+
+    کوئری‌های بدنه‌ی پاسخ‌های stream شده (export) پس از ارسال هدرها اجرا می‌شوند و
+    فقط در لاگ N+1 پایان درخواست دیده می‌شوند.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(f"{scope['method']} {scope['path']}")
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                timing = stats.server_timing(time.perf_counter() - started)
+                headers.append((b"server-timing", timing.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            for statement, n in stats.repeated().items():
+                logger.warning(f"⚠️ Suspected N+1 in {stats.label}: {n}x {' '.join(statement.split())}")
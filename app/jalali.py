@@ -0,0 +1,47 @@
+# app/jalali.py - تبدیل تاریخ میلادی به شمسی برای پاسخ‌ها
+from datetime import date, datetime
+from decimal import Decimal
+
+
+def gregorian_to_jalali(gy: int, gm: int, gd: int):
+    g_d_m = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+    gy2 = gy + 1 if gm > 2 else gy
+    days = (355666 + (365 * gy) + ((gy2 + 3) // 4) - ((gy2 + 99) // 100)
+            + ((gy2 + 399) // 400) + gd + g_d_m[gm - 1])
+    jy = -1595 + (33 * (days // 12053))
+    days %= 12053
+    jy += 4 * (days // 1461)
+    days %= 1461
+    if days > 365:
+        jy += (days - 1) // 365
+        days = (days - 1) % 365
+    if days < 186:
+        jm = 1 + (days // 31)
+        jd = 1 + (days % 31)
+    else:
+        jm = 7 + ((days - 186) // 30)
+        jd = 1 + ((days - 186) % 30)
+    return jy, jm, jd
+
+
+def to_jalali_string(value):
+    jy, jm, jd = gregorian_to_jalali(value.year, value.month, value.day)
+    result = f"{jy:04d}/{jm:02d}/{jd:02d}"
+    if isinstance(value, datetime):
+        result += value.strftime(" %H:%M:%S")
+    return result
+
+
+def convert_model_to_jalali(obj) -> dict:
+    """
+    تبدیل یک مدل SQLAlchemy به دیکشنری با تاریخ‌های شمسی
+    """
+    result = {}
+    for column in obj.__table__.columns:
+        value = getattr(obj, column.key)
+        if isinstance(value, (datetime, date)):
+            value = to_jalali_string(value)
+        elif isinstance(value, Decimal):
+            value = float(value)
+        result[column.key] = value
+    return result
@@ -0,0 +1,57 @@
+# app/keys.py - کلیدهای امضای JWT مشترک بین همه‌ی worker ها، با چرخش بر اساس kid
+#
+#  منبع کلیدها به ترتیب:
+#    JWT_KEY_FILE   فایل JSON:  {"active": "2026-10", "keys": {"2026-10": "...", "2026-04": "..."}}
+#    JWT_SECRET_KEY یک کلید (kid از JWT_KEY_ID، پیش‌فرض "primary")
+#  اگر هیچ‌کدام تنظیم نشده باشد یک کلید تصادفی برای همین process ساخته می‌شود (فقط توسعه؛
+#  توکن یک worker در worker دیگر و پس از راه‌اندازی دوباره معتبر نیست).
+#
+#  چرخش کلید: کلید جدید را به keys اضافه و همه‌ی worker ها را دوباره راه‌اندازی کنید، سپس
+#  active را به kid جدید تغییر دهید؛ کلید قدیمی را پس از REFRESH_TOKEN_EXPIRE_DAYS حذف کنید.
+import json
+import logging
+import os
+import secrets
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY_ID = "primary"
+
+
+@dataclass
+class SigningKeys:
+    active_kid: str
+    keys: Dict[str, str]
+    ephemeral: bool = field(default=False)
+
+    @property
+    def active_key(self) -> str:
+        return self.keys[self.active_kid]
+
+    def key_for(self, kid: Optional[str]) -> Optional[str]:
+        """کلید مربوط به kid توکن؛ توکن‌های قدیمی بدون kid با کلید فعال بررسی می‌شوند"""
+        if kid is None:
+            return self.active_key
+        return self.keys.get(kid)
+
+
+def load_signing_keys(environ: Mapping[str, str] = os.environ) -> SigningKeys:
+    key_file = environ.get("JWT_KEY_FILE")
+    if key_file:
+        with open(key_file, encoding="utf-8") as f:
+            config = json.load(f)
+        keys = {str(kid): str(secret) for kid, secret in config.get("keys", {}).items()}
+        active_kid = str(config.get("active", ""))
+        if active_kid not in keys:
+            raise ValueError(f"JWT_KEY_FILE {key_file}: active key {active_kid!r} is not in keys")
+        return SigningKeys(active_kid, keys)
+
+    secret = environ.get("JWT_SECRET_KEY")
+    if secret:
+        kid = environ.get("JWT_KEY_ID", DEFAULT_KEY_ID)
+        return SigningKeys(kid, {kid: secret})
+
+    logger.warning("⚠️ JWT_KEY_FILE/JWT_SECRET_KEY not set; using a per-process signing key")
+    return SigningKeys(DEFAULT_KEY_ID, {DEFAULT_KEY_ID: secrets.token_urlsafe(32)}, ephemeral=True)
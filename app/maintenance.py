@@ -0,0 +1,324 @@
+# app/maintenance.py - کارهای نگهداری دوره‌ای پایگاه داده در یک thread پس‌زمینه
+#
+#  هر worker (یا در اجرای چند worker فقط launcher، app/serve.py) یک scheduler دارد؛
+#  DB_MAINTENANCE=0 آن را خاموش می‌کند. اجرای دستی:
+#      python -m app.maintenance stats|checkpoint|analyze|vacuum [--full]|purge
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+
+import app.db
+from app.db import SessionLocal, read_session
+from app.metrics import (
+    DB_TABLE_ROWS, MAINTENANCE_FAILURES, MAINTENANCE_JOB_DURATION, MAINTENANCE_ROWS_PURGED,
+    SQLITE_CHECKPOINT_DURATION, SQLITE_FREELIST_PAGES, SQLITE_PAGES, SQLITE_WAL_BYTES
+)
+from app.models.Auth import Auth
+from app.models.RevokedToken import RevokedToken
+from app.security import REFRESH_TOKEN_EXPIRE_DAYS
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_ENABLED = os.getenv("DB_MAINTENANCE", "1") != "0"
+# هر دسته یک تراکنش کوتاه است و بین دسته‌ها قفل نوشتن آزاد می‌شود
+MAINTENANCE_BATCH_SIZE = int(os.getenv("DB_MAINTENANCE_BATCH_SIZE", "500"))
+MAINTENANCE_BATCH_PAUSE = float(os.getenv("DB_MAINTENANCE_BATCH_PAUSE_MS", "50")) / 1000
+# نشست‌های غیرفعال پس از این مدت از انقضای توکن دسترسی حذف می‌شوند
+AUTH_RETENTION = timedelta(hours=float(os.getenv("AUTH_RETENTION_HOURS", "24")))
+AUTH_PURGE_INTERVAL = float(os.getenv("AUTH_PURGE_INTERVAL_SECONDS", "3600"))
+
+# checkpoint کامل WAL فقط وقتی هیچ خواننده‌ای snapshot قدیمی نگه نداشته باشد ممکن است؛
+#  با busy_timeout کوتاه اگر خواننده‌ها فعال باشند زود برمی‌گردد و نوبت بعد دوباره تلاش می‌شود
+CHECKPOINT_INTERVAL = float(os.getenv("DB_CHECKPOINT_INTERVAL_SECONDS", "60"))
+CHECKPOINT_BUSY_TIMEOUT_MS = int(os.getenv("DB_CHECKPOINT_BUSY_TIMEOUT_MS", "200"))
+OPTIMIZE_INTERVAL = float(os.getenv("DB_OPTIMIZE_INTERVAL_SECONDS", "21600"))
+# سقف سطرهای بررسی‌شده برای هر ایندکس در ANALYZE دوره‌ای (0 = کامل)
+ANALYSIS_LIMIT = int(os.getenv("DB_ANALYSIS_LIMIT", "1000"))
+VACUUM_INTERVAL = float(os.getenv("DB_VACUUM_INTERVAL_SECONDS", "86400"))
+VACUUM_PAGES_PER_STEP = int(os.getenv("DB_VACUUM_PAGES_PER_STEP", "1000"))
+
+
+def _parse_hours(value: str) -> Optional[Tuple[int, int]]:
+    if not value:
+        return None
+    start, end = (int(part) for part in value.split("-"))
+    return start, end
+
+
+# ساعت‌های کم‌ترافیک به وقت محلی، مثلاً "1-5"؛ ANALYZE و vacuum فقط در این بازه اجرا می‌شوند
+QUIET_HOURS = _parse_hours(os.getenv("DB_MAINTENANCE_QUIET_HOURS", ""))
+
+
+def in_quiet_window(now: Optional[datetime] = None, hours: Optional[Tuple[int, int]] = QUIET_HOURS) -> bool:
+    if hours is None:
+        return True
+    hour = (now or datetime.now()).hour
+    start, end = hours
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+# با خاموش شدن app تنظیم می‌شود تا حذف دسته‌ای پس از دسته‌ی جاری متوقف شود
+stopping = threading.Event()
+
+
+def _write_session():
+    return SessionLocal(bind=app.db.write_engine)
+
+
+def delete_in_batches(session_factory, table, condition, batch_size: int = MAINTENANCE_BATCH_SIZE,
+                      pause: float = MAINTENANCE_BATCH_PAUSE) -> int:
+    """حذف سطرهای منطبق با condition، هر بار حداکثر batch_size سطر در یک تراکنش"""
+    key = next(iter(table.primary_key.columns))
+    total = 0
+    while True:
+        with session_factory() as session:
+            batch = select(key).where(condition).limit(batch_size).scalar_subquery()
+            deleted = session.execute(delete(table).where(key.in_(batch))).rowcount
+            session.commit()
+        total += deleted
+        MAINTENANCE_ROWS_PURGED.labels(table.name).inc(deleted)
+        if deleted < batch_size or stopping.wait(pause):
+            return total
+
+
+def record_table_rows(session_factory, *tables):
+    """تعداد سطرها برای metric؛ روی خواننده‌ها، چون count(*) کامل زیر قفل نوشتن همه‌ی نوشتن‌ها را نگه می‌داشت"""
+    with session_factory() as session:
+        for table in tables:
+            DB_TABLE_ROWS.labels(table.name).set(session.scalar(select(func.count()).select_from(table)))
+
+
+def purge_auth_sessions(session_factory=_write_session, now: Optional[datetime] = None,
+                        retention: timedelta = AUTH_RETENTION, batch_size: int = MAINTENANCE_BATCH_SIZE,
+                        read_session_factory=read_session) -> Dict[str, int]:
+    """
+    حذف نشست‌های غیرفعال قدیمی، نشست‌هایی که refresh token آن‌ها حتماً منقضی شده و
+    jti های باطل‌شده‌ای که خود توکن منقضی شده است
+    """
+    now = now or datetime.utcnow()
+    auth, revoked = Auth.__table__, RevokedToken.__table__
+    # refresh token پیش از توکن دسترسی همان سطر صادر شده است
+    refresh_expired = now - timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    purged = {
+        auth.name: delete_in_batches(
+            session_factory, auth,
+            ((auth.c.is_active == False) & (auth.c.expires_at < now - retention)) |
+            (auth.c.expires_at < refresh_expired),
+            batch_size
+        ),
+        revoked.name: delete_in_batches(session_factory, revoked, revoked.c.expires_at < now, batch_size),
+    }
+    record_table_rows(read_session_factory, auth, revoked)
+    return purged
+
+
+# ---------------------------------------------------------------------------
+# WAL، آمار planner و فضای آزاد
+#  روی اتصال خام DBAPI نویسنده اجرا می‌شوند: این PRAGMA ها نباید داخل تراکنش (BEGIN در
+#  begin_transaction) باشند
+
+def database_stats(cursor) -> dict:
+    """اندازه‌ی فایل WAL، صفحه‌های آزاد و حالت auto_vacuum؛ metric ها هم به‌روز می‌شوند"""
+    path = cursor.execute("PRAGMA database_list").fetchone()[2]
+    wal_path = f"{path}-wal"
+    stats = {
+        "page_size": cursor.execute("PRAGMA page_size").fetchone()[0],
+        "pages": cursor.execute("PRAGMA page_count").fetchone()[0],
+        "freelist_pages": cursor.execute("PRAGMA freelist_count").fetchone()[0],
+        "auto_vacuum": cursor.execute("PRAGMA auto_vacuum").fetchone()[0],
+        "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+    }
+    SQLITE_PAGES.set(stats["pages"])
+    SQLITE_FREELIST_PAGES.set(stats["freelist_pages"])
+    SQLITE_WAL_BYTES.set(stats["wal_bytes"])
+    return stats
+
+
+def _raw_writer(engine=None):
+    return (engine or app.db.engine).raw_connection()
+
+
+def checkpoint_wal(engine=None, mode: str = "TRUNCATE", busy_timeout_ms: int = CHECKPOINT_BUSY_TIMEOUT_MS) -> dict:
+    connection = _raw_writer(engine)
+    try:
+        cursor = connection.cursor()
+        previous_timeout = cursor.execute("PRAGMA busy_timeout").fetchone()[0]
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        started = time.perf_counter()
+        try:
+            busy, wal_frames, checkpointed = cursor.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        finally:
+            elapsed = time.perf_counter() - started
+            cursor.execute(f"PRAGMA busy_timeout={previous_timeout}")
+        stats = database_stats(cursor)
+    finally:
+        connection.close()
+    SQLITE_CHECKPOINT_DURATION.labels(mode.lower(), "busy" if busy else "done").observe(elapsed)
+    return {"busy": bool(busy), "wal_frames": wal_frames, "checkpointed_frames": checkpointed,
+            "seconds": round(elapsed, 4), **stats}
+
+
+def optimize_database(engine=None, analysis_limit: int = ANALYSIS_LIMIT) -> dict:
+    """
+    ANALYZE تقریبی (analysis_limit) و PRAGMA optimize
+
+    PRAGMA optimize به تنهایی فقط جدول‌هایی را تحلیل می‌کند که کوئری‌های همان اتصال از آن‌ها
+    استفاده کرده‌اند؛ اتصال نگهداری کوئری‌ای اجرا نکرده است.
+    """
+    connection = _raw_writer(engine)
+    try:
+        cursor = connection.cursor()
+        started = time.perf_counter()
+        cursor.execute(f"PRAGMA analysis_limit={analysis_limit}")
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+        cursor.execute("PRAGMA analysis_limit=0")
+    finally:
+        connection.close()
+    return {"analysis_limit": analysis_limit, "seconds": round(time.perf_counter() - started, 4)}
+
+
+def incremental_vacuum(engine=None, pages_per_step: int = VACUUM_PAGES_PER_STEP) -> dict:
+    """
+    برگرداندن صفحه‌های آزاد به سیستم‌عامل، هر بار pages_per_step صفحه در یک تراکنش کوتاه
+
+    فقط وقتی auto_vacuum=INCREMENTAL باشد کار می‌کند (پایگاه داده‌های جدید، set_sqlite_pragma؛
+    برای پایگاه داده‌ی موجود یک بار python -m app.maintenance vacuum --full).
+    """
+    connection = _raw_writer(engine)
+    released = 0
+    try:
+        cursor = connection.cursor()
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return {"skipped": "auto_vacuum is not INCREMENTAL", **database_stats(cursor)}
+        while not stopping.is_set():
+            free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            if free == 0:
+                break
+            # execute فقط یک گام (یک صفحه) اجرا می‌کند؛ executescript تا پایان
+            cursor.executescript(f"PRAGMA incremental_vacuum({pages_per_step})")
+            released += free - cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            if stopping.wait(MAINTENANCE_BATCH_PAUSE):
+                break
+        return {"released_pages": released, **database_stats(cursor)}
+    finally:
+        connection.close()
+
+
+def full_vacuum(engine=None) -> dict:
+    """VACUUM کامل و فعال کردن auto_vacuum=INCREMENTAL؛ کل پایگاه داده قفل می‌شود (فقط دستی)"""
+    connection = _raw_writer(engine)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("VACUUM")
+        return database_stats(cursor)
+    finally:
+        connection.close()
+
+
+def storage_stats(engine=None) -> dict:
+    connection = _raw_writer(engine)
+    try:
+        return database_stats(connection.cursor())
+    finally:
+        connection.close()
+
+
+class MaintenanceScheduler:
+    """اجرای کارهای نگهداری با فاصله‌ی زمانی ثابت در یک thread پس‌زمینه"""
+
+    def __init__(self):
+        self._jobs = {}  # name -> [interval, function, next_run, quiet_only]
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add_job(self, name: str, interval: float, function: Callable, initial_delay: float = 60,
+                quiet_only: bool = False):
+        """quiet_only: فقط در DB_MAINTENANCE_QUIET_HOURS"""
+        self._jobs[name] = [interval, function, time.monotonic() + min(initial_delay, interval), quiet_only]
+
+    def run_job(self, name: str):
+        interval, function = self._jobs[name][:2]
+        started = time.perf_counter()
+        try:
+            result = function()
+        except Exception:
+            MAINTENANCE_FAILURES.labels(name).inc()
+            logger.exception(f"❌ Maintenance job {name} failed")
+            raise
+        finally:
+            MAINTENANCE_JOB_DURATION.labels(name).observe(time.perf_counter() - started)
+            self._jobs[name][2] = time.monotonic() + interval
+        logger.info(f"🧹 {name}: {result} ({time.perf_counter() - started:.2f}s)")
+        return result
+
+    def _loop(self):
+        while not stopping.is_set():
+            now = time.monotonic()
+            for name, (_, _, next_run, quiet_only) in list(self._jobs.items()):
+                if next_run <= now and not stopping.is_set():
+                    if quiet_only and not in_quiet_window():
+                        self._jobs[name][2] = now + 300
+                        continue
+                    try:
+                        self.run_job(name)
+                    except Exception:
+                        pass  # در run_job ثبت شده؛ نوبت بعدی دوباره اجرا می‌شود
+            next_due = min((job[2] for job in self._jobs.values()), default=now + 60)
+            stopping.wait(max(next_due - time.monotonic(), 0.1))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                stopping.clear()
+                self._thread = threading.Thread(target=self._loop, name="db-maintenance", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """کار در حال اجرا تمام می‌شود (حداکثر یک دسته‌ی دیگر) و thread پایان می‌یابد"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        stopping.set()
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        if thread is None or not thread.is_alive():
+            stopping.clear()
+
+
+scheduler = MaintenanceScheduler()
+scheduler.add_job("purge_auth_sessions", AUTH_PURGE_INTERVAL, purge_auth_sessions)
+scheduler.add_job("checkpoint_wal", CHECKPOINT_INTERVAL, checkpoint_wal)
+scheduler.add_job("optimize", OPTIMIZE_INTERVAL, optimize_database, quiet_only=True)
+scheduler.add_job("incremental_vacuum", VACUUM_INTERVAL, incremental_vacuum, quiet_only=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database maintenance")
+    parser.add_argument("command", choices=["stats", "checkpoint", "analyze", "vacuum", "purge"])
+    parser.add_argument("--full", action="store_true", help="vacuum: full VACUUM and enable incremental auto_vacuum")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        result = storage_stats()
+    elif args.command == "checkpoint":
+        # دستی: تا 5 ثانیه منتظر خواننده‌ها می‌ماند
+        result = checkpoint_wal(busy_timeout_ms=5000)
+    elif args.command == "analyze":
+        result = optimize_database(analysis_limit=0)
+    elif args.command == "vacuum":
+        result = full_vacuum() if args.full else incremental_vacuum()
+    else:
+        result = purge_auth_sessions()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# app/metrics.py - متریک‌های Prometheus برای /metrics
+#
+#  با چند worker هر process متریک‌های خودش را دارد؛ برای جمع شدن درست باید
+#  PROMETHEUS_MULTIPROC_DIR به یک پوشه‌ی خالی و قابل نوشتن اشاره کند و پیش از هر اجرا پاک
+#  شود (app/serve.py این کار را انجام می‌دهد).
+#  بدون این متغیر، registry معمولی همان process استفاده می‌شود.
+import os
+import time
+
+from anyio.to_thread import current_default_thread_limiter
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# ---------------------------------------------------------------------------
+# HTTP
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+HTTP_REQUESTS = Counter("http_requests_total", "Requests by route template and status", ["method", "route", "status"])
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being served", ["method"], multiprocess_mode="livesum"
+)
+
+# ---------------------------------------------------------------------------
+# thread pool و پایگاه داده
+
+THREADPOOL_BUSY = Gauge(
+    "threadpool_busy_threads", "Worker threads in use (anyio default limiter)", multiprocess_mode="livesum"
+)
+THREADPOOL_SIZE = Gauge("threadpool_size", "Worker thread limit", multiprocess_mode="livesum")
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connection checkouts", ["engine"])
+DB_CONNECTION_WAIT = Histogram(
+    "db_connection_wait_seconds", "Time a request waited for a connection slot", ["role"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+SQLITE_BUSY = Counter(
+    "sqlite_busy_errors_total", "Statements that failed with SQLITE_BUSY/LOCKED after busy_timeout retries",
+    ["engine"]
+)
+WRITER_BATCH_SIZE = Histogram(
+    "db_writer_batch_size", "Operations per group-commit batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+WRITER_QUEUE_WAIT = Histogram(
+    "db_writer_queue_wait_seconds", "Time an operation waited in the group-commit queue",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+WRITER_REJECTED = Counter(
+    "db_writer_rejected_total", "Write operations rejected because the group-commit queue was full"
+)
+
+# ---------------------------------------------------------------------------
+# نگهداری (app/maintenance.py)
+
+MAINTENANCE_JOB_DURATION = Histogram(
+    "db_maintenance_job_seconds", "Duration of background maintenance jobs", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+MAINTENANCE_FAILURES = Counter("db_maintenance_failures_total", "Maintenance jobs that raised", ["job"])
+MAINTENANCE_ROWS_PURGED = Counter("db_maintenance_rows_purged_total", "Rows deleted by retention jobs", ["table"])
+SQLITE_CHECKPOINT_DURATION = Histogram(
+    "sqlite_checkpoint_seconds", "wal_checkpoint latency by mode and outcome (busy = readers blocked it)",
+    ["mode", "result"], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+SQLITE_WAL_BYTES = Gauge("sqlite_wal_bytes", "Size of the -wal file", multiprocess_mode="mostrecent")
+SQLITE_PAGES = Gauge("sqlite_pages", "Database size in pages", multiprocess_mode="mostrecent")
+SQLITE_FREELIST_PAGES = Gauge("sqlite_freelist_pages", "Unused pages in the database file", multiprocess_mode="mostrecent")
+DB_TABLE_ROWS = Gauge(
+    "db_table_rows", "Row count measured by the last maintenance run", ["table"], multiprocess_mode="mostrecent"
+)
+
+# ---------------------------------------------------------------------------
+# کش‌ها و رمز عبور
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache, table and result", ["cache", "table", "result"])
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_seconds", "CPU time spent hashing or verifying a password in the hash pool", ["operation"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Time a password operation waited for a hash pool worker",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password operations queued or running in the hash pool",
+    multiprocess_mode="livesum"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password operations rejected by hash pool admission control",
+    ["operation", "reason"]
+)
+
+
+def instrument_engine(engine, name: str):
+    """شمارش checkout ها و خطاهای busy/locked یک engine"""
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    checkouts = DB_POOL_CHECKOUTS.labels(name)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        checked_out.inc()
+
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+
+    def on_error(context):
+        message = str(context.original_exception).lower()
+        if "is locked" in message or "is busy" in message:
+            SQLITE_BUSY.labels(name).inc()
+
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    event.listen(engine, "handle_error", on_error)
+
+
+def update_threadpool():
+    """باید در event loop صدا زده شود"""
+    limiter = current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+
+
+def render() -> bytes:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def mark_process_dead():
+    """حذف gauge های live این process از پوشه‌ی multiprocess هنگام خاموش شدن worker"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware برای تأخیر و تعداد درخواست‌ها به تفکیک الگوی مسیر (نه مسیر واقعی،
+    تا /farmer/{national_id} برای هر کدملی یک سری جدا نسازد)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        update_threadpool()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            update_threadpool()
+            # router الگوی مسیر پیداشده را در scope می‌گذارد
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
@@ -0,0 +1,72 @@
+# app/migrations - migration های نسخه‌دار ساختار پایگاه داده (اجرا با python -m app.schema upgrade)
+#
+#  هر فایل vNNNN_name.py یک تابع upgrade(engine) دارد. نسخه‌ها از 1 پشت سر هم هستند و هیچ‌وقت
+#  تغییر نمی‌کنند؛ برای هر تغییر مدل (جدول، ستون، ایندکس، FTS) یک فایل جدید اضافه کنید.
+#  - DDL تکرارپذیر بنویسید (IF NOT EXISTS)؛ migration نیمه‌کاره دوباره از ابتدا اجرا می‌شود
+#  - پایگاه داده‌ی تازه مستقیم از روی مدل‌ها ساخته می‌شود، پس همان تغییر ممکن است از قبل وجود داشته باشد
+#  - ایندکس روی جدول بزرگ را با create_index_online بسازید
+import logging
+import os
+import time
+from typing import Optional, Sequence
+
+from app.db import apply_sqlite_profile
+
+logger = logging.getLogger(__name__)
+
+# ساخت ایندکس روی جدول بزرگ: جدول در دسته‌هایی بدون قفل خوانده می‌شود تا خود CREATE INDEX
+#  (که در SQLite یک دستور تجزیه‌ناپذیر است) فقط از حافظه بخواند و قفل نوشتن را کوتاه نگه دارد
+MIGRATION_BATCH_SIZE = int(os.getenv("DB_MIGRATION_BATCH_SIZE", "5000"))
+MIGRATION_BATCH_PAUSE = float(os.getenv("DB_MIGRATION_BATCH_PAUSE_MS", "20")) / 1000
+MIGRATION_SORT_THREADS = int(os.getenv("DB_MIGRATION_SORT_THREADS", "4"))
+
+
+def create_index_online(engine, name: str, table: str, columns: Sequence[str], unique: bool = False,
+                        where: str = None, batch_size: int = None, pause: float = None) -> Optional[float]:
+    """
+    ساخت ایندکس روی جدول زنده با کوتاه‌ترین قفل نوشتن ممکن؛ مدت نگه داشتن قفل (ثانیه) یا None اگر وجود داشت
+
+    SQLite ایندکس را در یک دستور می‌سازد و نمی‌توان آن را چند تکه کرد. پس:
+      1. جدول با تراکنش‌های خواندنی کوتاه در دسته‌های batch_size خوانده می‌شود (بدون قفل نوشتن) تا صفحه‌ها در حافظه باشند
+      2. CREATE INDEX با sorter چند thread و temp_store=MEMORY در یک تراکنش IMMEDIATE جدا اجرا می‌شود
+    نوشتن‌های برنامه در این فاصله تا busy_timeout منتظر می‌مانند.
+    """
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    pause = MIGRATION_BATCH_PAUSE if pause is None else pause
+    column_list = ", ".join(columns)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).fetchone():
+            return None
+
+        last = 0
+        while True:
+            rows = cursor.execute(
+                f"SELECT rowid, {column_list} FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, batch_size)
+            ).fetchall()
+            if len(rows) < batch_size:
+                break
+            last = rows[-1][0]
+            time.sleep(pause)
+
+        cursor.execute(f"PRAGMA threads={MIGRATION_SORT_THREADS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        ddl = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({column_list})"
+        if where:
+            ddl += f" WHERE {where}"
+        started = time.perf_counter()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(ddl)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        held = time.perf_counter() - started
+        logger.info(f"Built index {name} on {table} holding the write lock for {held:.3f}s")
+        return held
+    finally:
+        connection.cursor().execute("PRAGMA threads=0")
+        apply_sqlite_profile(connection.cursor())
+        connection.close()
@@ -0,0 +1,262 @@
+# v0001_baseline - ساختار پیش از migration ها (همان کاری که startup در هر بار بالا آمدن انجام می‌داد)
+#
+#  همه‌ی DDL همین‌جا منجمد شده است و به مدل‌ها، app.normalize یا app.models.Farmer وابسته نیست؛
+#  تغییر بعدی مدل‌ها (جدول یا ستون جدید) کاری را که این migration روی پایگاه داده‌ی نسخه‌ی 0
+#  انجام می‌دهد عوض نمی‌کند و migration خودش را دارد.
+#
+#  ایندکس‌ها با create_index_online ساخته می‌شوند. دو کار روی جدول بزرگ یک‌جا و زیر قفل نوشتن
+#  انجام می‌شوند و باید در ساعت کم‌ترافیک اجرا شوند:
+#    - ALTER TABLE ADD COLUMN ستون‌های *_key (VIRTUAL، بدون بازنویسی جدول؛ سریع)
+#    - پر کردن اولیه‌ی farmers_fts با 'rebuild' (خواندن کامل farmers در یک تراکنش)
+import logging
+import sqlite3
+
+from sqlalchemy import text
+
+from app.migrations import create_index_online
+
+logger = logging.getLogger(__name__)
+
+# یکسان‌سازی متن فارسی در زمان این نسخه (کپی app.normalize.PERSIAN_REPLACEMENTS)
+_REPLACEMENTS = [
+    ("ي", "ی"), ("ى", "ی"), ("ك", "ک"), ("ة", "ه"), ("ۀ", "ه"),
+    ("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("‌", " "), ("ـ", ""),
+] + [(chr(code), "") for code in (*range(0x064B, 0x0656), 0x0670)]
+
+
+def search_key_ddl(column: str) -> str:
+    expression = column
+    for source, target in _REPLACEMENTS:
+        expression = f"replace({expression}, '{source}', '{target}')"
+    return f"VARCHAR NOT NULL GENERATED ALWAYS AS (trim(lower({expression})))"
+
+
+TABLES = [
+    f"""CREATE TABLE IF NOT EXISTS provinces (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        name_key {search_key_ddl("name")},
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS factory (
+        id INTEGER NOT NULL,
+        factory_name VARCHAR(255) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR(100) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        full_name VARCHAR(255),
+        is_active BOOLEAN NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (username),
+        UNIQUE (email)
+    )""",
+    """CREATE TABLE IF NOT EXISTS auth (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        access_token VARCHAR(500) NOT NULL,
+        refresh_token VARCHAR(64) NOT NULL,
+        token_type VARCHAR(50) NOT NULL,
+        is_active BOOLEAN NOT NULL,
+        expires_at DATETIME NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS measure_units (
+        id INTEGER NOT NULL,
+        unit_name VARCHAR(100) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (unit_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS crop_years (
+        id INTEGER NOT NULL,
+        crop_year_name VARCHAR(100) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (crop_year_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS payment_reasons (
+        id INTEGER NOT NULL,
+        reason_name VARCHAR(255) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (reason_name)
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS farmers (
+        id INTEGER NOT NULL,
+        national_id VARCHAR(20) NOT NULL,
+        full_name VARCHAR(255) NOT NULL,
+        full_name_key {search_key_ddl("full_name")},
+        father_name VARCHAR(255) NOT NULL,
+        phone_number VARCHAR(20) NOT NULL,
+        sheba_number_1 VARCHAR(30),
+        sheba_number_2 VARCHAR(30),
+        card_number VARCHAR(20),
+        address VARCHAR(500),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS table_versions (
+        table_name VARCHAR(100) NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (table_name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS revoked_tokens (
+        jti VARCHAR(32) NOT NULL,
+        expires_at DATETIME NOT NULL,
+        PRIMARY KEY (jti)
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS city (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        name_key {search_key_ddl("name")},
+        province_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(province_id) REFERENCES provinces (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS pesticides (
+        id INTEGER NOT NULL,
+        pesticide_name VARCHAR(255) NOT NULL,
+        measure_unit_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS seeds (
+        id INTEGER NOT NULL,
+        seed_name VARCHAR(255) NOT NULL,
+        measure_unit_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS products (
+        id INTEGER NOT NULL,
+        product_name VARCHAR(255) NOT NULL,
+        product_name_key {search_key_ddl("product_name")},
+        measure_unit_id INTEGER NOT NULL,
+        crop_year_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE,
+        FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS product_prices (
+        id INTEGER NOT NULL,
+        crop_year_id INTEGER NOT NULL,
+        sugar_amount_per_ton_kg NUMERIC(10, 2) NOT NULL,
+        sugar_price_per_kg NUMERIC(10, 2) NOT NULL,
+        pulp_amount_per_ton_kg NUMERIC(10, 2) NOT NULL,
+        pulp_price_per_kg NUMERIC(10, 2) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS purity_prices (
+        id INTEGER NOT NULL,
+        crop_year_id INTEGER NOT NULL,
+        base_purity NUMERIC(5, 2) NOT NULL,
+        base_purity_price NUMERIC(10, 2) NOT NULL,
+        price_difference NUMERIC(10, 2) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+    )""",
+    f"""CREATE TABLE IF NOT EXISTS village (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        name_key {search_key_ddl("name")},
+        city_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(city_id) REFERENCES city (id) ON DELETE CASCADE
+    )""",
+]
+
+# ستون‌های کلید جستجو برای جدول‌هایی که پیش از این نسخه بدون آن‌ها ساخته شده‌اند: (جدول، ستون، ستون مبدأ)
+KEY_COLUMNS = [
+    ("provinces", "name_key", "name"),
+    ("city", "name_key", "name"),
+    ("village", "name_key", "name"),
+    ("products", "product_name_key", "product_name"),
+    ("farmers", "full_name_key", "full_name"),
+]
+
+# (نام، جدول، ستون‌ها، unique، شرط)
+INDEXES = [
+    ("ix_auth_active_user_id", "auth", ["user_id"], False, "is_active = 1"),
+    ("ix_auth_refresh_token", "auth", ["refresh_token"], False, None),
+    ("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"], False, None),
+    ("ix_factory_factory_name", "factory", ["factory_name"], True, None),
+    ("ix_farmers_national_id", "farmers", ["national_id"], True, None),
+    ("uq_city_name_province_id", "city", ["name", "province_id"], True, None),
+    ("uq_village_name_city_id", "village", ["name", "city_id"], True, None),
+    ("ix_pesticides_pesticide_name", "pesticides", ["pesticide_name"], True, None),
+    ("ix_seeds_seed_name", "seeds", ["seed_name"], True, None),
+    ("ix_products_product_name", "products", ["product_name"], True, None),
+    ("ix_product_prices_crop_year_id", "product_prices", ["crop_year_id"], True, None),
+    ("ix_purity_prices_crop_year_id", "purity_prices", ["crop_year_id"], True, None),
+    ("ix_provinces_name_key", "provinces", ["name_key"], False, None),
+    ("ix_city_name_key", "city", ["name_key"], False, None),
+    ("ix_village_name_key", "village", ["name_key"], False, None),
+    ("ix_products_product_name_key", "products", ["product_name_key"], False, None),
+    ("ix_farmers_full_name_key", "farmers", ["full_name_key"], False, None),
+]
+
+_FTS_COLUMNS = "national_id, full_name, father_name, phone_number"
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS farmers_fts USING fts5(
+        {_FTS_COLUMNS}, content='farmers', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ai AFTER INSERT ON farmers BEGIN
+        INSERT INTO farmers_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name, new.father_name, new.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ad AFTER DELETE ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name, old.father_name, old.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_au AFTER UPDATE OF {_FTS_COLUMNS} ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name, old.father_name, old.phone_number);
+        INSERT INTO farmers_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name, new.father_name, new.phone_number);
+    END""",
+]
+
+
+def upgrade(engine):
+    # جدول‌هایی که هنوز وجود ندارند (جدول موجود دست نمی‌خورد)
+    with engine.begin() as conn:
+        for statement in TABLES:
+            conn.execute(text(statement))
+        for table, column, source in KEY_COLUMNS:
+            columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_xinfo({table})")}
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {search_key_ddl(source)}"))
+
+    for name, table, columns, unique, where in INDEXES:
+        try:
+            create_index_online(engine, name, table, columns, unique=unique, where=where)
+        except sqlite3.IntegrityError as e:
+            # داده‌ی تکراری موجود؛ تا پاک‌سازی دستی ایندکس ساخته نمی‌شود
+            logger.warning(f"⚠️ Could not create unique index {name}: {e}")
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='farmers_fts'")
+        ).first()
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO farmers_fts(farmers_fts) VALUES('rebuild')"))
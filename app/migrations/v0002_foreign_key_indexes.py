@@ -0,0 +1,16 @@
+# v0002_foreign_key_indexes - ایندکس کلیدهای خارجی (فیلتر لیست‌ها و حذف CASCADE بدون پیمایش جدول)
+from app.migrations import create_index_online
+
+INDEXES = [
+    ("ix_city_province_id", "city", ["province_id"]),
+    ("ix_village_city_id", "village", ["city_id"]),
+    ("ix_pesticides_measure_unit_id", "pesticides", ["measure_unit_id"]),
+    ("ix_seeds_measure_unit_id", "seeds", ["measure_unit_id"]),
+    ("ix_products_measure_unit_id", "products", ["measure_unit_id"]),
+    ("ix_products_crop_year_id", "products", ["crop_year_id"]),
+]
+
+
+def upgrade(engine):
+    for name, table, columns in INDEXES:
+        create_index_online(engine, name, table, columns)
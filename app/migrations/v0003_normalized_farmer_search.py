@@ -0,0 +1,46 @@
+# v0003_normalized_farmer_search - farmers_fts روی متن یکسان‌شده (full_name_key و father_name_key)
+#
+#  جستجوی «علي» باید «علی» را هم پیدا کند، پس ایندکس FTS به جای نام‌های خام از ستون‌های *_key ساخته
+#  می‌شود. جدول FTS و trigger ها دوباره ساخته و با 'rebuild' پر می‌شوند؛ این دستور کل farmers را در یک
+#  تراکنش و زیر قفل نوشتن می‌خواند، پس روی پایگاه داده‌ی بزرگ در ساعت کم‌ترافیک اجرا شود.
+#  ADD COLUMN ستون VIRTUAL است و جدول بازنویسی نمی‌شود.
+from sqlalchemy import text
+
+from app.migrations.v0001_baseline import search_key_ddl
+
+_FTS_COLUMNS = "national_id, full_name_key, father_name_key, phone_number"
+_SOURCE_COLUMNS = "national_id, full_name, father_name, phone_number"
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS farmers_fts USING fts5(
+        {_FTS_COLUMNS}, content='farmers', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ai AFTER INSERT ON farmers BEGIN
+        INSERT INTO farmers_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name_key, new.father_name_key, new.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ad AFTER DELETE ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name_key, old.father_name_key, old.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_au AFTER UPDATE OF {_SOURCE_COLUMNS} ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name_key, old.father_name_key, old.phone_number);
+        INSERT INTO farmers_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name_key, new.father_name_key, new.phone_number);
+    END""",
+]
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_xinfo(farmers)")}
+        if "father_name_key" not in columns:
+            conn.execute(text(f"ALTER TABLE farmers ADD COLUMN father_name_key {search_key_ddl('father_name')}"))
+
+        for trigger in ("farmers_fts_ai", "farmers_fts_ad", "farmers_fts_au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        conn.execute(text("DROP TABLE IF EXISTS farmers_fts"))
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO farmers_fts(farmers_fts) VALUES('rebuild')"))
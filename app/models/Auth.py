@@ -1,16 +1,24 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Boolean, DateTime, func
+from sqlalchemy import String, Integer, Boolean, DateTime, Index, func, text
 from datetime import datetime
 from app.db import Base
 
 class Auth(Base):
     __tablename__ = "auth"
+    __table_args__ = (
+        # ایندکس جزئی: فقط نشست‌های فعال، نه همه‌ی login های گذشته. SQLite فقط وقتی از آن
+        #  استفاده می‌کند که کوئری is_active را با ثابت مقایسه کند (Auth.is_active == True، نه پارامتر)
+        Index("ix_auth_active_user_id", "user_id", sqlite_where=text("is_active = 1")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    access_token: Mapped[str] = mapped_column(String(500), nullable=False)
-    refresh_token: Mapped[str] = mapped_column(String(500), nullable=False)
+    # نام ستون‌ها همان قبلی است تا پایگاه داده‌ی موجود بدون migration کار کند:
+    #  access_token: فقط jti توکن دسترسی (برای باطل کردن آن هنگام logout)
+    #  refresh_token: SHA-256 هگز refresh token با ایندکس، نه خود توکن 500 کاراکتری
+    access_jti: Mapped[str] = mapped_column("access_token", String(500), nullable=False)
+    refresh_token_hash: Mapped[str] = mapped_column("refresh_token", String(64), nullable=False, index=True)
     token_type: Mapped[str] = mapped_column(String(50), default="bearer")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,15 +1,22 @@
 from app.db import Base as SQLAlchemyBase
+from app.normalize import search_key_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey
+from sqlalchemy import String, Integer, ForeignKey, Index
 from typing import List
 
 
 class City(SQLAlchemyBase):
     __tablename__ = "city"
+    __table_args__ = (
+        # نام شهر در هر استان یکتاست
+        Index("uq_city_name_province_id", "name", "province_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
-    province_id: Mapped[int] = mapped_column(Integer, ForeignKey("provinces.id", ondelete="CASCADE"), nullable=False)
+    name_key: Mapped[str] = search_key_column("name")  # نسخه‌ی یکسان‌شده برای جستجو
+    province_id: Mapped[int] = mapped_column(Integer, ForeignKey("provinces.id", ondelete="CASCADE"), nullable=False,
+                                             index=True)
 
     # رابطه با استان
     province: Mapped["Provinces"] = relationship("Provinces", back_populates="cities")
@@ -8,7 +8,7 @@ class Factory(Base):
     __tablename__ = "factory"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    factory_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    factory_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
                                                  onupdate=func.now())
\ No newline at end of file
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, func
+from sqlalchemy import String, Integer, DateTime, func, event, DDL
 from datetime import datetime
 from app.db import Base
+from app.normalize import search_key_column
 
 
 class Farmer(Base):
@@ -10,7 +11,9 @@ class Farmer(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     national_id: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True)
     full_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    full_name_key: Mapped[str] = search_key_column("full_name")  # نسخه‌ی یکسان‌شده برای جستجو
     father_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    father_name_key: Mapped[str] = search_key_column("father_name", index=False)  # فقط برای farmers_fts
     phone_number: Mapped[str] = mapped_column(String(20), nullable=False)
     sheba_number_1: Mapped[str] = mapped_column(String(30), nullable=True)
     sheba_number_2: Mapped[str] = mapped_column(String(30), nullable=True)
@@ -19,4 +22,34 @@ class Farmer(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # رابطه با User (اگر نیاز باشد)
-    # user: Mapped["User"] = relationship("User", back_populates="farmer", uselist=False)
\ No newline at end of file
+    # user: Mapped["User"] = relationship("User", back_populates="farmer", uselist=False)
+
+
+# ایندکس متن کامل FTS5 (tokenizer سه‌حرفی برای جستجوی زیررشته) که با trigger همگام می‌ماند
+#  نام‌ها از ستون‌های یکسان‌شده (*_key) ایندکس می‌شوند و عبارت جستجو هم با normalize_persian یکسان
+#  می‌شود (app.fts). trigger به‌روزرسانی روی ستون‌های مبدأ است چون ستون محاسبه‌شده در SET نمی‌آید.
+FARMER_FTS_COLUMNS = "national_id, full_name_key, father_name_key, phone_number"
+FARMER_FTS_SOURCE_COLUMNS = "national_id, full_name, father_name, phone_number"
+
+FARMER_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS farmers_fts USING fts5(
+        {FARMER_FTS_COLUMNS}, content='farmers', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ai AFTER INSERT ON farmers BEGIN
+        INSERT INTO farmers_fts(rowid, {FARMER_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name_key, new.father_name_key, new.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_ad AFTER DELETE ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {FARMER_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name_key, old.father_name_key, old.phone_number);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS farmers_fts_au AFTER UPDATE OF {FARMER_FTS_SOURCE_COLUMNS} ON farmers BEGIN
+        INSERT INTO farmers_fts(farmers_fts, rowid, {FARMER_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.national_id, old.full_name_key, old.father_name_key, old.phone_number);
+        INSERT INTO farmers_fts(rowid, {FARMER_FTS_COLUMNS})
+        VALUES (new.id, new.national_id, new.full_name_key, new.father_name_key, new.phone_number);
+    END""",
+]
+
+for _statement in FARMER_FTS_DDL:
+    event.listen(Farmer.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
@@ -8,9 +8,9 @@ class Pesticide(Base):
     __tablename__ = "pesticides"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    pesticide_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    pesticide_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     measure_unit_id: Mapped[int] = mapped_column(Integer, ForeignKey("measure_units.id", ondelete="CASCADE"),
-                                                 nullable=False)
+                                                 nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # رابطه با MeasureUnit
@@ -2,16 +2,19 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer, DateTime, func, ForeignKey
 from datetime import datetime
 from app.db import Base
+from app.normalize import search_key_column
 
 
 class Product(Base):
     __tablename__ = "products"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    product_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    product_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
+    product_name_key: Mapped[str] = search_key_column("product_name")  # نسخه‌ی یکسان‌شده برای جستجو
     measure_unit_id: Mapped[int] = mapped_column(Integer, ForeignKey("measure_units.id", ondelete="CASCADE"),
-                                                 nullable=False)
-    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False)
+                                                 nullable=False, index=True)
+    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False,
+                                              index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # رابطه با MeasureUnit
@@ -8,7 +8,8 @@ class ProductPrice(Base):
     __tablename__ = "product_prices"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False)
+    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False,
+                                              unique=True, index=True)  # یک قیمت برای هر سال زراعی
     sugar_amount_per_ton_kg: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)  # مقدار شکر بر تن (کیلوگرم)
     sugar_price_per_kg: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)  # قیمت شکر بر کیلوگرم
     pulp_amount_per_ton_kg: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)  # مقدار تفاله بر تن (کیلوگرم)
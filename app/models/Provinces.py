@@ -1,4 +1,5 @@
 from app.db import Base as SQLAlchemyBase
+from app.normalize import search_key_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer
 from typing import List
@@ -9,6 +10,7 @@ class Provinces(SQLAlchemyBase):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    name_key: Mapped[str] = search_key_column("name")  # نسخه‌ی یکسان‌شده برای جستجو
 
     # رابطه با شهرها
     cities: Mapped[List["City"]] = relationship("City", back_populates="province", cascade="all, delete-orphan")
\ No newline at end of file
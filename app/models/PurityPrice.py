@@ -8,7 +8,8 @@ class PurityPrice(Base):
     __tablename__ = "purity_prices"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False)
+    crop_year_id: Mapped[int] = mapped_column(Integer, ForeignKey("crop_years.id", ondelete="CASCADE"), nullable=False,
+                                              unique=True, index=True)  # یک قیمت برای هر سال زراعی
     base_purity: Mapped[float] = mapped_column(Numeric(5, 2), nullable=False)  # خلوص پایه (درصد)
     base_purity_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)  # قیمت پایه
     price_difference: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)  # تفاوت قیمت به ازای هر درصد
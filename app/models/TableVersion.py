@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, func
+from datetime import datetime
+from app.db import Base
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    # شمارنده‌ی تغییرات هر جدول؛ با هر commit که در جدول بنویسد یکی زیاد می‌شود
+    table_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,14 +1,20 @@
 from app.db import Base as SQLAlchemyBase
+from app.normalize import search_key_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey
+from sqlalchemy import String, Integer, ForeignKey, Index
 
 
 class Village(SQLAlchemyBase):
     __tablename__ = "village"
+    __table_args__ = (
+        # نام روستا در هر شهر یکتاست
+        Index("uq_village_name_city_id", "name", "city_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
-    city_id: Mapped[int] = mapped_column(Integer, ForeignKey("city.id", ondelete="CASCADE"), nullable=False)
+    name_key: Mapped[str] = search_key_column("name")  # نسخه‌ی یکسان‌شده برای جستجو
+    city_id: Mapped[int] = mapped_column(Integer, ForeignKey("city.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # رابطه با شهر
     city: Mapped["City"] = relationship("City", back_populates="villages")
\ No newline at end of file
@@ -12,9 +12,12 @@ from .Product import Product
 from .PaymentReason import PaymentReason
 from .ProductPrice import ProductPrice
 from .PurityPrice import PurityPrice
+from .Farmer import Farmer
+from .TableVersion import TableVersion
+from .RevokedToken import RevokedToken
 
 __all__ = [
     "Provinces", "City", "Village", "Factory", "User", "Auth",
     "MeasureUnit", "Pesticide", "Seed", "CropYear", "Product",
-    "PaymentReason", "ProductPrice", "PurityPrice","Farmer"
+    "PaymentReason", "ProductPrice", "PurityPrice","Farmer", "TableVersion", "RevokedToken"
 ]
\ No newline at end of file
@@ -0,0 +1,99 @@
+# app/normalize.py - یکسان‌سازی متن فارسی برای جستجو
+#  هر نام قابل جستجو یک ستون محاسبه‌شده‌ی ایندکس‌دار (مثلاً name_key) دارد که همین
+#  یکسان‌سازی را در SQLite انجام می‌دهد؛ ورودی کاربر هم با normalize_persian یکسان می‌شود.
+from sqlalchemy import Computed, String, inspect, text
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.schema import CreateColumn
+
+ZWNJ = "‌"
+
+PERSIAN_REPLACEMENTS = [
+    ("ي", "ی"),  # ي عربی -> ی
+    ("ى", "ی"),  # ى -> ی
+    ("ك", "ک"),  # ك عربی -> ک
+    ("ة", "ه"),  # ة -> ه
+    ("ۀ", "ه"),  # ۀ -> ه
+    ("أ", "ا"),  # أ -> ا
+    ("إ", "ا"),  # إ -> ا
+    ("آ", "ا"),  # آ -> ا
+    (ZWNJ, " "),  # نیم‌فاصله -> فاصله
+    ("ـ", ""),  # کشیده
+] + [
+    (chr(code), "") for code in (*range(0x064B, 0x0656), 0x0670)  # اعراب و همزه/مد روی حرف
+]
+# توجه: replace های تو در تو در SQLite محدودیت عمق parser دارند (حدود ۳۰ سطح)،
+# پس این فهرست باید کوتاه بماند
+
+# lower() در SQLite فقط حروف ASCII را کوچک می‌کند
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# بزرگ‌ترین کاراکتر یونیکد؛ سقف بازه برای جستجوی «شروع با»
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize_persian(value):
+    """یکسان‌سازی متن دقیقاً مطابق ستون محاسبه‌شده‌ی پایگاه داده"""
+    if value is None:
+        return None
+    for source, target in PERSIAN_REPLACEMENTS:
+        value = value.replace(source, target)
+    return value.translate(_ASCII_LOWER).strip(" ")
+
+
+def normalized_sql(column_name: str) -> str:
+    expression = column_name
+    for source, target in PERSIAN_REPLACEMENTS:
+        expression = f"replace({expression}, '{source}', '{target}')"
+    return f"trim(lower({expression}))"
+
+
+def search_key_column(source_column: str, index: bool = True):
+    """ستون محاسبه‌شده (و به طور پیش‌فرض ایندکس‌دار) نسخه‌ی یکسان‌شده‌ی یک ستون متنی"""
+    return mapped_column(
+        String,
+        Computed(normalized_sql(source_column)),
+        index=index,
+        info={"search_key": True}
+    )
+
+
+def prefix_filter(key_column, term: str):
+    """شرط «شروع با» به صورت بازه تا SQLite از ایندکس B-tree استفاده کند"""
+    prefix = normalize_persian(term)
+    return (key_column >= prefix) & (key_column < prefix + _MAX_CHAR)
+
+
+def contains_filter(key_column, term: str):
+    return key_column.contains(normalize_persian(term), autoescape=True)
+
+
+def search_filter(key_column, term: str, mode: str = "contains"):
+    if mode == "prefix":
+        return prefix_filter(key_column, term)
+    return contains_filter(key_column, term)
+
+
+def ensure_search_key_columns(bind, metadata):
+    """
+    افزودن ستون‌های search key و ایندکس آن‌ها به جدول‌های پایگاه داده‌ی موجود
+
+    ستون‌ها VIRTUAL هستند، پس ALTER TABLE بدون بازنویسی جدول انجام می‌شود.
+    """
+    added = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not column.info.get("search_key") or column.name in existing_columns:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+                added.append(f"{table.name}.{column.name}")
+                for index in table.indexes:
+                    if column.name in index.columns:
+                        index.create(conn, checkfirst=True)
+    return added
@@ -0,0 +1,218 @@
+# app/pagination.py - صفحه‌بندی مشترک همه‌ی لیست‌ها (offset و keyset)
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, asc, desc, func, or_, select, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+from app.cache import count_cache, statement_tables
+from app.conditional import read_versions
+
+
+@dataclass
+class Page:
+    items: List[Any] = field(default_factory=list)
+    total: Optional[int] = 0
+    page: int = 1
+    size: int = 50
+    pages: Optional[int] = 1
+    has_next: bool = False
+    has_prev: bool = False
+    next_cursor: Optional[str] = None
+
+
+def resolve_sort_column(model, sort_by: Optional[str], sort_columns: Optional[dict] = None):
+    """
+    ستون مرتب‌سازی؛ اگر فیلد نامعتبر باشد به id برمی‌گردد
+    """
+    if sort_by and sort_columns and sort_by in sort_columns:
+        return sort_by, sort_columns[sort_by]
+    columns = model.__mapper__.columns
+    if sort_by and sort_by in columns:
+        return sort_by, getattr(model, sort_by)
+    return "id", model.id
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return value
+
+
+def encode_cursor(sort_by: str, sort_order: str, item_id: int, value) -> str:
+    payload = {
+        "k": sort_by,
+        "o": sort_order,
+        "id": item_id,
+        "v": _encode_value(value),
+    }
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str, sort_column) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        payload["id"] = int(payload["id"])
+        payload["v"] = _decode_value(sort_column, payload.get("v"))
+    except (ValueError, KeyError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # کرسر فقط با همان مرتب‌سازی که ساخته شده معتبر است
+    if payload.get("k") != sort_by or payload.get("o") != sort_order:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort parameters")
+
+    return payload
+
+
+def _keyset_filter(model, sort_column, sort_order: str, payload: dict, mapped: bool = True):
+    """
+    شرط «بعد از آخرین ردیف» بر اساس (ستون مرتب‌سازی، id)
+    """
+    last_id = payload["id"]
+    descending = sort_order == "desc"
+
+    if sort_column is model.id:
+        return model.id < last_id if descending else model.id > last_id
+
+    if not mapped:
+        # ستون محاسبه‌شده (مثل امتیاز جستجو) فقط با مقدار داخل کرسر مقایسه می‌شود
+        if descending:
+            return tuple_(sort_column, model.id) < tuple_(payload["v"], last_id)
+        return tuple_(sort_column, model.id) > tuple_(payload["v"], last_id)
+
+    if payload["v"] is None:
+        # در SQLite مقدار NULL در ترتیب صعودی اول و در نزولی آخر است
+        if descending:
+            return and_(sort_column.is_(None), model.id < last_id)
+        return or_(sort_column.isnot(None), and_(sort_column.is_(None), model.id > last_id))
+
+    # مقدار دقیق ستون از خود ردیف خوانده می‌شود تا فرمت ذخیره‌شده (مثلاً تاریخ) عیناً مقایسه شود؛
+    # اگر ردیف حذف شده باشد مقدار داخل کرسر جایگزین می‌شود
+    anchor = func.coalesce(
+        select(sort_column).where(model.id == last_id).correlate(None).scalar_subquery(),
+        type_coerce(payload["v"], sort_column.type)
+    )
+    if descending:
+        condition = tuple_(sort_column, model.id) < tuple_(anchor, last_id)
+        if model.__mapper__.columns[payload["k"]].nullable:
+            condition = or_(condition, sort_column.is_(None))
+        return condition
+    return tuple_(sort_column, model.id) > tuple_(anchor, last_id)
+
+
+def count_total(session: Session, query: Select) -> int:
+    """
+    تعداد کل سطرهای کوئری، با استفاده از کش تعداد
+
+    نسخه‌ی جدول‌ها (یک جستجوی کلید اصلی در table_versions) جزو کلید است تا نوشتن در
+    worker های دیگر هم تعداد کش‌شده را کهنه کند.
+    """
+    tables = statement_tables(query)
+    count_query = select(func.count()).select_from(query.subquery())
+    key = count_cache.make_key(count_query, read_versions(session, tables))
+
+    total = count_cache.get(key)
+    if total is None:
+        total = session.execute(count_query).scalar() or 0
+        count_cache.set(key, tables, total)
+    return total
+
+
+def paginate(
+        session: Session,
+        query: Select,
+        model,
+        page: int = 1,
+        size: int = 50,
+        sort_by: Optional[str] = "id",
+        sort_order: Optional[str] = "asc",
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        sort_columns: Optional[dict] = None
+) -> Page:
+    """
+    اجرای کوئری لیست با صفحه‌بندی offset (page/size) یا keyset (cursor)
+
+    حالت keyset با ارسال پارامتر cursor فعال می‌شود (مقدار خالی یعنی صفحه‌ی اول)
+    و هزینه‌ی آن مستقل از عمق صفحه است. با include_total=False کوئری شمارش
+    اجرا نمی‌شود و total و pages برابر None برمی‌گردند. sort_columns ستون‌های
+    مرتب‌سازی اضافه (غیر از ستون‌های مدل) را با نامشان مشخص می‌کند.
+    """
+    sort_order = "desc" if sort_order and sort_order.lower() == "desc" else "asc"
+    sort_by, sort_column = resolve_sort_column(model, sort_by, sort_columns)
+    mapped = not (sort_columns and sort_by in sort_columns)
+
+    # محاسبه کل تعداد (اختیاری)
+    total = pages = None
+    if include_total:
+        total = count_total(session, query)
+        pages = (total + size - 1) // size if total > 0 else 1
+
+    # اعمال مرتب‌سازی (id برای ترتیب پایدار بین مقادیر برابر)
+    direction = desc if sort_order == "desc" else asc
+    if sort_column is model.id:
+        query = query.order_by(direction(model.id))
+    else:
+        query = query.order_by(direction(sort_column), direction(model.id))
+
+    if cursor is None:
+        # حالت قدیمی page/size
+        query = query.offset((page - 1) * size)
+        has_prev = page > 1
+    else:
+        if cursor:
+            payload = decode_cursor(cursor, sort_by, sort_order, sort_column)
+            query = query.where(_keyset_filter(model, sort_column, sort_order, payload, mapped))
+        has_prev = bool(cursor)
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه‌ی بعد، بدون نیاز به total
+    query = query.limit(size + 1)
+    if mapped:
+        items = session.execute(query).scalars().all()
+        values = [getattr(item, sort_by) for item in items]
+    else:
+        rows = session.execute(query.add_columns(sort_column)).all()
+        items = [row[0] for row in rows]
+        values = [row[1] for row in rows]
+    has_next = len(items) > size
+    items = items[:size]
+
+    next_cursor = None
+    if has_next and items:
+        next_cursor = encode_cursor(sort_by, sort_order, items[-1].id, values[size - 1])
+
+    return Page(
+        items=items,
+        total=total,
+        page=page,
+        size=size,
+        pages=pages,
+        has_next=has_next,
+        has_prev=has_prev,
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,140 @@
+# app/revocation.py - اعتبارسنجی بدون حالت توکن دسترسی و فهرست درون‌پردازه‌ای jti های باطل‌شده
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.conditional import read_versions
+from app.db import read_session
+from app.models.RevokedToken import RevokedToken
+from app.security import verify_token
+
+# هر چند ثانیه نسخه‌ی جدول revoked_tokens بررسی می‌شود (باطل شدن در worker های دیگر با این تأخیر دیده می‌شود)
+DENYLIST_REFRESH_SECONDS = 5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TokenDenylist:
+    """
+    jti توکن‌های دسترسی باطل‌شده که هنوز منقضی نشده‌اند
+
+    فقط وقتی نسخه‌ی جدول revoked_tokens (table_versions) عوض شده باشد دوباره خوانده
+    می‌شود؛ هر jti به صورت 16 بایت نگه داشته می‌شود.
+    """
+
+    def __init__(self, refresh_seconds: float = DENYLIST_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._jtis = {}  # jti (bytes) -> expires_at
+        self._version = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(jti: str) -> Optional[bytes]:
+        try:
+            return bytes.fromhex(jti)
+        except (TypeError, ValueError):
+            return None
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._checked_at > self.refresh_seconds
+
+    def refresh(self, session_factory=read_session):
+        with session_factory() as session:
+            version, _ = read_versions(session, [RevokedToken.__tablename__])[RevokedToken.__tablename__]
+            if version == self._version:
+                self._checked_at = time.monotonic()
+                return
+            rows = session.execute(
+                select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > _utcnow())
+            ).all()
+        with self._lock:
+            self._jtis = {self._key(jti): expires_at for jti, expires_at in rows}
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def add(self, jti: str, expires_at: datetime):
+        """ثبت در همین process بدون منتظر ماندن برای خواندن دوباره از پایگاه داده"""
+        key = self._key(jti)
+        if key is not None:
+            with self._lock:
+                self._jtis[key] = expires_at
+
+    def __contains__(self, jti: str) -> bool:
+        return self._key(jti) in self._jtis
+
+    def __len__(self) -> int:
+        return len(self._jtis)
+
+    def clear(self):
+        with self._lock:
+            self._jtis = {}
+            self._version = None
+            self._checked_at = float("-inf")
+
+
+denylist = TokenDenylist()
+
+
+def revoke_access_token(session: Session, jti: str, expires_at: datetime):
+    """باطل کردن یک توکن دسترسی تا زمان انقضای آن"""
+    if TokenDenylist._key(jti) is None or expires_at is None:
+        # توکن‌های قدیمی بدون jti قابل باطل کردن نیستند و خودشان منقضی می‌شوند
+        return
+    expires_at = expires_at.replace(tzinfo=None)
+    if expires_at <= _utcnow():
+        return
+    session.execute(
+        insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing()
+    )
+    # تا commit نشده ممکن است rollback شود؛ در after_commit به فهرست اضافه می‌شود
+    session.info.setdefault("revoked_jtis", {})[jti] = expires_at
+
+
+@event.listens_for(Session, "after_commit")
+def _add_committed_revocations(session):
+    for jti, expires_at in session.info.pop("revoked_jtis", {}).items():
+        denylist.add(jti, expires_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session):
+    session.info.pop("revoked_jtis", None)
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+_UNAUTHORIZED_HEADERS = {"WWW-Authenticate": "Bearer"}
+
+
+async def get_token_claims(
+        credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)]
+) -> dict:
+    """
+    اعتبارسنجی توکن دسترسی فقط با امضا و تاریخ انقضا و فهرست باطل‌شده‌ها (بدون کوئری برای هر درخواست)
+    """
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers=_UNAUTHORIZED_HEADERS)
+
+    payload = verify_token(credentials.credentials)
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Invalid access token", headers=_UNAUTHORIZED_HEADERS)
+
+    if denylist.is_stale():
+        await run_in_threadpool(denylist.refresh)
+    if payload.get("jti") in denylist:
+        raise HTTPException(status_code=401, detail="Token has been revoked", headers=_UNAUTHORIZED_HEADERS)
+    return payload
+
+
+TokenClaims = Annotated[dict, Depends(get_token_claims)]
@@ -0,0 +1,125 @@
+# app/routers/AsyncRoutes.py - نسخه‌ی async مسیرهای پرترافیک روی aiosqlite
+#  با DB_ASYNC_READS=1 در main.py جایگزین همان مسیرهای sync می‌شوند (همان path و همان ترتیب)
+import functools
+import inspect
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+
+from app.conditional import ConditionalGet, read_versions
+from app.db import run_in_session
+from app.db_async import AsyncSessionDep
+from ..schemas.Auth import RefreshTokenResponse
+from ..schemas.City import PaginatedCityResponse
+from ..schemas.Farmer import FarmerOut, PaginatedFarmerResponse
+from ..schemas.Provinces import PaginatedResponse
+from ..schemas.Village import PaginatedVillageResponse
+from ..models.City import City
+from ..models.Farmer import Farmer
+from ..models.Provinces import Provinces
+from ..models.Village import Village
+from . import Auth, City as city_routes, Farmer as farmer_routes, Provinces as provinces_routes
+from . import Village as village_routes
+
+router = APIRouter()
+
+
+class AsyncConditionalGet(ConditionalGet):
+    """همان ConditionalGet برای مسیرهای async"""
+
+    async def __call__(self, request: Request, response: Response, session: AsyncSessionDep):
+        versions = await session.run_sync(read_versions, self.tables)
+        self.check(request, response, versions)
+
+
+def as_async(handler):
+    """
+    اجرای یک handler همگام روی AsyncSession
+
+    منطق handler (صفحه‌بندی، کش‌ها، ...) دست نمی‌خورد؛ فقط ورودی/خروجی پایگاه داده از
+    aiosqlite می‌گذرد و درخواست یک thread از thread pool را اشغال نمی‌کند.
+    """
+    signature = inspect.signature(handler)
+
+    @functools.wraps(handler)
+    async def endpoint(session, **params):
+        return await session.run_sync(lambda sync_session: handler(session=sync_session, **params))
+
+    endpoint.__signature__ = signature.replace(parameters=[
+        parameter.replace(annotation=AsyncSessionDep) if parameter.name == "session" else parameter
+        for parameter in signature.parameters.values()
+    ])
+    return endpoint
+
+
+def on_writer(handler):
+    """
+    اجرای یک handler نوشتنی همگام با run_in_session
+
+    مسیر aiosqlite فقط خواننده است؛ نوشتن از همان جای اتصال نویسنده و همان اتصال همگام مسیرهای
+    sync می‌گذرد و نویسنده‌ی دوم ساخته نمی‌شود.
+    """
+    signature = inspect.signature(handler)
+
+    @functools.wraps(handler)
+    async def endpoint(**params):
+        return await run_in_session(lambda session: handler(session=session, **params))
+
+    endpoint.__signature__ = signature.replace(parameters=[
+        parameter for parameter in signature.parameters.values() if parameter.name != "session"
+    ])
+    return endpoint
+
+
+router.add_api_route(
+    "/farmer/", as_async(farmer_routes.get_all_farmers), methods=["GET"], tags=["Farmer"],
+    response_model=PaginatedFarmerResponse, dependencies=[Depends(AsyncConditionalGet(Farmer))]
+)
+
+
+@router.get("/farmer/{national_id}", response_model=FarmerOut, tags=["Farmer"],
+            dependencies=[Depends(AsyncConditionalGet(Farmer))])
+async def get_farmer_by_national_id(
+        session: AsyncSessionDep,
+        national_id: str = Path(..., description="National ID of the farmer")
+):
+    """
+    Get farmer by national ID
+    """
+    farmer = await session.scalar(select(Farmer).where(Farmer.national_id == national_id))
+
+    if not farmer:
+        raise HTTPException(status_code=404, detail="Farmer not found")
+
+    return farmer
+
+
+router.add_api_route(
+    "/provinces/", as_async(provinces_routes.get_provinces), methods=["GET"], tags=["Provinces"],
+    response_model=PaginatedResponse, dependencies=[Depends(AsyncConditionalGet(Provinces))]
+)
+router.add_api_route(
+    "/city/", as_async(city_routes.get_cities), methods=["GET"], tags=["City"],
+    response_model=PaginatedCityResponse, dependencies=[Depends(AsyncConditionalGet(City))]
+)
+router.add_api_route(
+    "/village/", as_async(village_routes.get_villages), methods=["GET"], tags=["Village"],
+    response_model=PaginatedVillageResponse, dependencies=[Depends(AsyncConditionalGet(Village))]
+)
+router.add_api_route(
+    "/refresh-token", on_writer(Auth.refresh_access_token), methods=["POST"], tags=["Auth"],
+    response_model=RefreshTokenResponse
+)
+
+
+def use_async_routes(app):
+    """جایگزینی مسیرهای sync برنامه با نسخه‌ی async همین router در همان جایگاه"""
+    replacements = {(route.path, frozenset(route.methods)): route for route in router.routes}
+    routes = []
+    for route in app.router.routes:
+        key = (route.path, frozenset(route.methods)) if isinstance(route, APIRoute) else None
+        routes.append(replacements.pop(key, route))
+    if replacements:
+        raise RuntimeError(f"No sync route to replace for: {sorted(path for path, _ in replacements)}")
+    app.router.routes[:] = routes
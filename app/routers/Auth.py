@@ -1,64 +1,64 @@
 from fastapi import APIRouter, HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update
 from datetime import datetime, timedelta
-from app.db import SessionDep
+from app.db import SessionDep, run_in_session
 from ..schemas.Auth import (
     TokenRequest, TokenResponse, RefreshTokenRequest,
     RefreshTokenResponse, ChangePasswordRequest, LogoutRequest
 )
 from ..models.User import User
 from ..models.Auth import Auth
+from app.revocation import TokenClaims, revoke_access_token
 from app.security import (
-    verify_password, get_password_hash, create_access_token,
-    create_refresh_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
+    verify_password_async, get_password_hash_async, create_access_token,
+    create_refresh_token, verify_token, hash_token, new_jti, ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter(prefix="", tags=["Auth"])
 
 
-@router.post("/token", response_model=TokenResponse)
-def login_for_access_token(session: SessionDep, token_request: TokenRequest):
-    user = session.execute(
-        select(User).where(
-            (User.username == token_request.username) |
-            (User.email == token_request.username)
-        )
-    ).scalar_one_or_none()
+def deactivate_sessions(session, *conditions):
+    """
+    غیرفعال کردن نشست‌های فعال با یک UPDATE (بدون بارگذاری سطرها در ORM)
 
-    if not user:
-        raise HTTPException(status_code=400, detail="Invalid username or password")
+    سطرهای غیرفعال‌شده (user_id, access_jti, refresh_token_hash, expires_at) برگردانده می‌شوند.
+    """
+    return session.execute(
+        update(Auth)
+        .where(Auth.is_active == True, *conditions)
+        .values(is_active=False)
+        .returning(Auth.user_id, Auth.access_jti, Auth.refresh_token_hash, Auth.expires_at)
+        .execution_options(synchronize_session=False)
+    ).all()
 
-    if not user.is_active:
-        raise HTTPException(status_code=400, detail="User is inactive")
-
-    if not verify_password(token_request.password, user.password_hash):
-        raise HTTPException(status_code=400, detail="Invalid username or password")
 
-    existing_tokens = session.execute(
-        select(Auth).where(
-            (Auth.user_id == user.id) &
-            (Auth.is_active == True)
+def find_login_user(session, username: str):
+    return session.execute(
+        select(User).where(
+            (User.username == username) |
+            (User.email == username)
         )
-    ).scalars().all()
+    ).scalar_one_or_none()
+
 
-    for token in existing_tokens:
-        token.is_active = False
-    session.commit()
+def start_session(session, user) -> TokenResponse:
+    """نشست‌های قبلی کاربر غیرفعال و نشست تازه ثبت می‌شود (رمز عبور پیش از این بررسی شده است)"""
+    deactivate_sessions(session, Auth.user_id == user.id)
 
     token_data = {"sub": str(user.id), "username": user.username}
-    access_token = create_access_token(token_data)
+    access_jti = new_jti()
+    access_token = create_access_token({**token_data, "jti": access_jti})
     refresh_token = create_refresh_token(token_data)
 
     expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     auth_db = Auth(
         user_id=user.id,
-        access_token=access_token,
-        refresh_token=refresh_token,
+        access_jti=access_jti,
+        refresh_token_hash=hash_token(refresh_token),
         expires_at=expires_at
     )
 
     session.add(auth_db)
-    session.commit()
 
     return TokenResponse(
         access_token=access_token,
@@ -67,45 +67,58 @@ def login_for_access_token(session: SessionDep, token_request: TokenRequest):
     )
 
 
+# هش رمز عبور ده‌ها میلی‌ثانیه طول می‌کشد؛ بررسی آن بیرون از هر تراکنش و بدون گرفتن thread
+#  انجام می‌شود تا تنها اتصال نویسنده و قفل BEGIN IMMEDIATE فقط برای نوشتن کوتاه نشست گرفته شوند
+@router.post("/token", response_model=TokenResponse)
+async def login_for_access_token(token_request: TokenRequest):
+    user = await run_in_session(find_login_user, token_request.username, read_only=True)
+
+    if not user:
+        raise HTTPException(status_code=400, detail="Invalid username or password")
+
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="User is inactive")
+
+    if not await verify_password_async(token_request.password, user.password_hash):
+        raise HTTPException(status_code=400, detail="Invalid username or password")
+
+    return await run_in_session(start_session, user)
+
+
 @router.post("/refresh-token", response_model=RefreshTokenResponse)
 def refresh_access_token(session: SessionDep, refresh_request: RefreshTokenRequest):
     payload = verify_token(refresh_request.refresh_token)
     if not payload or payload.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    auth_db = session.execute(
-        select(Auth).where(
-            (Auth.refresh_token == refresh_request.refresh_token) &
-            (Auth.is_active == True)
-        )
-    ).scalar_one_or_none()
+    # پیدا کردن و غیرفعال کردن نشست در یک دستور؛ دو refresh همزمان با یک توکن هر دو موفق نمی‌شوند
+    sessions = deactivate_sessions(session, Auth.refresh_token_hash == hash_token(refresh_request.refresh_token))
 
-    if not auth_db:
+    if not sessions:
         raise HTTPException(status_code=401, detail="Refresh token not found or expired")
 
+    auth_db = sessions[0]
     user = session.execute(
         select(User).where(User.id == auth_db.user_id)
     ).scalar_one_or_none()
 
     if not user or not user.is_active:
+        # خطا تراکنش را rollback می‌کند و نشست فعال می‌ماند
         raise HTTPException(status_code=401, detail="User not found or inactive")
 
-    auth_db.is_active = False
-    session.commit()
-
     token_data = {"sub": str(user.id), "username": user.username}
-    new_access_token = create_access_token(token_data)
+    access_jti = new_jti()
+    new_access_token = create_access_token({**token_data, "jti": access_jti})
 
     expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     new_auth_db = Auth(
         user_id=user.id,
-        access_token=new_access_token,
-        refresh_token=auth_db.refresh_token,
+        access_jti=access_jti,
+        refresh_token_hash=auth_db.refresh_token_hash,
         expires_at=expires_at
     )
 
     session.add(new_auth_db)
-    session.commit()
 
     return RefreshTokenResponse(
         access_token=new_access_token,
@@ -115,41 +128,40 @@ def refresh_access_token(session: SessionDep, refresh_request: RefreshTokenReque
 
 @router.post("/logout")
 def logout(session: SessionDep, logout_request: LogoutRequest):
-    auth_db = session.execute(
-        select(Auth).where(
-            (Auth.refresh_token == logout_request.refresh_token) &
-            (Auth.is_active == True)
-        )
-    ).scalar_one_or_none()
-
-    if auth_db:
-        auth_db.is_active = False
-        session.commit()
+    for auth_db in deactivate_sessions(session, Auth.refresh_token_hash == hash_token(logout_request.refresh_token)):
+        # توکن دسترسی همین نشست هم تا انقضایش باطل می‌شود
+        revoke_access_token(session, auth_db.access_jti, auth_db.expires_at)
 
     return {"message": "Successfully logged out"}
 
 
+def replace_password(session, user, new_password_hash: str):
+    # اگر رمز عبور بین بررسی و این تراکنش عوض شده باشد، رمز فعلی دیگر درست نیست
+    changed = session.execute(
+        update(User)
+        .where(User.id == user.id, User.password_hash == user.password_hash)
+        .values(password_hash=new_password_hash)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not changed:
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+
+    for auth_token in deactivate_sessions(session, Auth.user_id == user.id):
+        revoke_access_token(session, auth_token.access_jti, auth_token.expires_at)
+
+
 @router.post("/changepassword/")
-def change_password(session: SessionDep, change_request: ChangePasswordRequest):
-    user = session.execute(select(User).order_by(User.id)).first()
+async def change_password(claims: TokenClaims, change_request: ChangePasswordRequest):
+    # کاربر از توکن دسترسی (نه اولین کاربر جدول)
+    user = await run_in_session(lambda session: session.get(User, int(claims["sub"])), read_only=True)
 
     if not user:
         raise HTTPException(status_code=404, detail="No user found")
 
-    user = user[0]
-
-    if not verify_password(change_request.current_password, user.password_hash):
+    if not await verify_password_async(change_request.current_password, user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
-    user.password_hash = get_password_hash(change_request.new_password)
-
-    auth_tokens = session.execute(
-        select(Auth).where(Auth.user_id == user.id)
-    ).scalars().all()
-
-    for auth_token in auth_tokens:
-        auth_token.is_active = False
-
-    session.commit()
+    new_password_hash = await get_password_hash_async(change_request.new_password)
+    await run_in_session(replace_password, user, new_password_hash)
 
-    return {"message": "Password changed successfully"}
\ No newline at end of file
+    return {"message": "Password changed successfully"}
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.export import EXPORT_FORMAT_PATTERN, export_columns, stream_export
+from app.normalize import search_filter
+from app.pagination import paginate
 from ..schemas.City import CityCreate, CityOut, PaginatedCityResponse
 from ..models.City import City
-from ..models.Provinces import Provinces
 
 router = APIRouter(prefix="/city", tags=["City"])
 
@@ -14,35 +18,16 @@ def create_city(session: SessionDep, city: CityCreate):
     """
     Create a new city
     """
-    # بررسی وجود استان
-    province = session.execute(
-        select(Provinces).where(Provinces.id == city.province_id)
-    ).scalar_one_or_none()
-
-    if not province:
-        raise HTTPException(status_code=404, detail="Province not found")
-
-    # بررسی وجود شهر تکراری
-    existing_city = session.execute(
-        select(City).where(
-            City.name == city.name,
-            City.province_id == city.province_id
-        )
-    ).scalar_one_or_none()
-
-    if existing_city:
-        raise HTTPException(status_code=400, detail="City already exists in this province")
-
-    # ایجاد شهر جدید
-    city_db = City(name=city.name, province_id=city.province_id)
-    session.add(city_db)
-    session.commit()
-    session.refresh(city_db)
-
-    return city_db
+    # وجود استان (کلید خارجی) و تکراری نبودن شهر (ایندکس یکتا) را پایگاه داده بررسی می‌کند
+    return insert_returning(
+        session, City, {"name": city.name, "province_id": city.province_id},
+        duplicate_detail="City already exists in this province",
+        missing_detail="Province not found"
+    )
 
 
-@router.get("/", response_model=PaginatedCityResponse)
+@router.get("/", response_model=PaginatedCityResponse,
+            dependencies=[Depends(ConditionalGet(City))])
 def get_cities(
         session: SessionDep,
         page: int = Query(1, description="Page number", ge=1),
@@ -50,7 +35,10 @@ def get_cities(
         sort_by: Optional[str] = Query("id", description="Sort field"),
         sort_order: Optional[str] = Query("asc", description="Sort order", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None, description="Search term"),
-        province_id: Optional[int] = Query(None, description="Filter by province ID")
+        province_id: Optional[int] = Query(None, description="Filter by province ID"),
+        search_mode: str = Query("contains", description="Name match mode", regex="^(contains|prefix)$"),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     Get list of cities with pagination, sorting and filtering
@@ -64,51 +52,47 @@ def get_cities(
 
     # اعمال جستجو
     if search:
-        query = query.where(City.name.ilike(f"%{search}%"))
-
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = session.execute(count_query)
-    total = total_result.scalar()
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(City, sort_by)
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(City.id))
-            else:
-                query = query.order_by(asc(City.id))
-    else:
-        query = query.order_by(City.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    items = result.scalars().all()
+        query = query.where(search_filter(City.name_key, search, search_mode))
+
+    result = paginate(
+        session, query, City,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
 
     return PaginatedCityResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        items=result.items,
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
+@router.get("/export")
+def export_cities(
+        export_format: str = Query("ndjson", alias="format", description="ndjson or csv", regex=EXPORT_FORMAT_PATTERN),
+        search: Optional[str] = Query(None, description="Search term"),
+        province_id: Optional[int] = Query(None, description="Filter by province ID"),
+        search_mode: str = Query("contains", description="Name match mode", regex="^(contains|prefix)$")
+):
+    """
+    Stream all cities matching the filters as NDJSON or CSV
+    """
+    query = select(*export_columns(City, CityOut))
+
+    if province_id:
+        query = query.where(City.province_id == province_id)
+
+    if search:
+        query = query.where(search_filter(City.name_key, search, search_mode))
+
+    return stream_export(query.order_by(City.id), CityOut, export_format, "cities")
+
+
 @router.delete("/{city_id}")
 def delete_city(session: SessionDep, city_id: int):
     """
@@ -122,6 +106,5 @@ def delete_city(session: SessionDep, city_id: int):
         raise HTTPException(status_code=404, detail="City not found")
 
     session.delete(city)
-    session.commit()
 
     return {"message": f"City {city_id} deleted successfully"}
\ No newline at end of file
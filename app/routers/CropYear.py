@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.pagination import paginate
 from ..schemas.CropYear import CropYearCreate, CropYearOut, PaginatedCropYearResponse
 from ..models.CropYear import CropYear
 
@@ -13,29 +16,23 @@ def create_crop_year(session: SessionDep, crop_year: CropYearCreate):
     """
     ایجاد سال زراعی جدید
     """
-    existing_crop_year = session.execute(
-        select(CropYear).where(CropYear.crop_year_name == crop_year.crop_year_name)
-    ).scalar_one_or_none()
-
-    if existing_crop_year:
-        raise HTTPException(status_code=400, detail="Crop year name already exists")
-
-    crop_year_db = CropYear(crop_year_name=crop_year.crop_year_name)
-    session.add(crop_year_db)
-    session.commit()
-    session.refresh(crop_year_db)
-
-    return crop_year_db
+    return insert_returning(
+        session, CropYear, {"crop_year_name": crop_year.crop_year_name},
+        duplicate_detail="Crop year name already exists"
+    )
 
 
-@router.get("/", response_model=PaginatedCropYearResponse)
+@router.get("/", response_model=PaginatedCropYearResponse,
+            dependencies=[Depends(ConditionalGet(CropYear))])
 def get_crop_years(
         session: SessionDep,
         page: int = Query(1, ge=1),
         size: int = Query(50, ge=1, le=100),
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
-        search: Optional[str] = Query(None)
+        search: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست سال‌های زراعی با صفحه‌بندی
@@ -45,39 +42,21 @@ def get_crop_years(
     if search:
         query = query.where(CropYear.crop_year_name.ilike(f"%{search}%"))
 
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    if sort_by:
-        try:
-            sort_column = getattr(CropYear, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(CropYear.id))
-            else:
-                query = query.order_by(asc(CropYear.id))
-    else:
-        query = query.order_by(CropYear.id)
-
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    result = session.execute(query)
-    items = result.scalars().all()
+    result = paginate(
+        session, query, CropYear,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
 
     return PaginatedCropYearResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        items=result.items,
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -94,6 +73,5 @@ def delete_crop_year(session: SessionDep, crop_year_id: int):
         raise HTTPException(status_code=404, detail="Crop year not found")
 
     session.delete(crop_year)
-    session.commit()
 
     return {"message": f"Crop year {crop_year_id} deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,73 @@
+import sqlite3
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError
+
+import app.db
+from app.db import SQLITE_PROFILE, SQLITE_PROFILE_NAME, SessionDep, connect_args, read_pragmas, set_sqlite_pragma
+from app.maintenance import database_stats
+from app.revocation import get_token_claims
+
+# مسیر فایل و تنظیمات پایگاه داده را نشان می‌دهد؛ فقط با توکن دسترسی
+router = APIRouter(prefix="/debug", tags=["Debug"], dependencies=[Depends(get_token_claims)])
+
+# گزارش تشخیصی حداکثر این مدت برای گرفتن اتصال نمونه‌ی نویسنده منتظر می‌ماند
+WRITER_PROBE_TIMEOUT = 0.2
+# PRAGMA هایی که روی اتصال نویسنده با خواننده‌ها فرق دارند
+WRITER_PRAGMAS = ("foreign_keys", "busy_timeout", "query_only")
+
+
+def pool_status(pool) -> dict:
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "idle": pool.checkedin()}
+
+
+_probe_engines = {}
+
+
+def _probe_engine(timeout: float):
+    """
+    engine جدا با همان hook اتصال نویسنده و یک اتصال؛ تنها اتصال نویسنده‌ی برنامه هرگز
+    گرفته نمی‌شود و pool_timeout کوتاه انتظار را محدود می‌کند
+    """
+    key = (str(app.db.engine.url), timeout)
+    if key not in _probe_engines:
+        engine = create_engine(app.db.engine.url, connect_args=connect_args,
+                               pool_size=1, max_overflow=0, pool_timeout=timeout)
+        event.listen(engine, "connect", set_sqlite_pragma)
+        _probe_engines[key] = engine
+    return _probe_engines[key]
+
+
+def writer_pragmas(timeout: float = WRITER_PROBE_TIMEOUT):
+    """PRAGMA های یک اتصال با تنظیمات نویسنده؛ اگر در این مدت اتصالی آزاد نشود None"""
+    try:
+        with _probe_engine(timeout).connect() as connection:
+            return read_pragmas(connection, WRITER_PRAGMAS)
+    except TimeoutError:
+        return None
+
+
+@router.get("/db")
+def get_db_settings(session: SessionDep):
+    """
+    پروفایل SQLite فعال، مقدار واقعی PRAGMA ها روی یک اتصال خواننده و اتصال نویسنده و
+    اندازه‌ی WAL و صفحه‌های آزاد
+    """
+    # session درخواست GET روی خواننده‌هاست؛ اگر گزارش دیگری اتصال نمونه را گرفته باشد «busy»
+    reader = read_pragmas(session.connection())
+    storage = database_stats(session.connection().connection.cursor())
+    writer = writer_pragmas() or "busy"
+
+    return {
+        "profile": SQLITE_PROFILE_NAME,
+        "configured": SQLITE_PROFILE,
+        "sqlite_version": sqlite3.sqlite_version,
+        "writer": writer,
+        "reader": reader,
+        "storage": storage,
+        "pools": {
+            "writer": pool_status(app.db.engine.pool),
+            "reader": pool_status(app.db.read_engine.pool),
+        },
+    }
@@ -1,8 +1,11 @@
 # app/routers/Factory.py
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.pagination import paginate
 from ..schemas.Factory import FactoryCreate, FactoryOut, PaginatedFactoryResponse
 from ..models.Factory import Factory
 
@@ -14,31 +17,23 @@ def create_factory(session: SessionDep, factory: FactoryCreate):
     """
     ایجاد یک کارخانه جدید
     """
-    # بررسی تکراری بودن نام کارخانه
-    existing_factory = session.execute(
-        select(Factory).where(Factory.factory_name == factory.factory_name)
-    ).scalar_one_or_none()
-
-    if existing_factory:
-        raise HTTPException(status_code=400, detail="Factory with this name already exists")
-
-    # ایجاد کارخانه جدید
-    factory_db = Factory(factory_name=factory.factory_name)
-    session.add(factory_db)
-    session.commit()
-    session.refresh(factory_db)
-
-    return factory_db
+    return insert_returning(
+        session, Factory, {"factory_name": factory.factory_name},
+        duplicate_detail="Factory with this name already exists"
+    )
 
 
-@router.get("/", response_model=PaginatedFactoryResponse)
+@router.get("/", response_model=PaginatedFactoryResponse,
+            dependencies=[Depends(ConditionalGet(Factory))])
 def get_factories(
         session: SessionDep,
         page: int = Query(1, ge=1),
         size: int = Query(50, ge=1, le=100),
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
-        search: Optional[str] = Query(None)
+        search: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست کارخانه‌ها با صفحه‌بندی، مرتب‌سازی و جستجو
@@ -50,46 +45,21 @@ def get_factories(
     if search:
         query = query.where(Factory.factory_name.ilike(f"%{search}%"))
 
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = session.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Factory, sort_by)
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(Factory.id))
-            else:
-                query = query.order_by(asc(Factory.id))
-    else:
-        query = query.order_by(Factory.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    items = result.scalars().all()
+    result = paginate(
+        session, query, Factory,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
 
     return PaginatedFactoryResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        items=result.items,
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -106,6 +76,5 @@ def delete_factory(session: SessionDep, factory_id: int):
         raise HTTPException(status_code=404, detail="Factory not found")
 
     session.delete(factory)
-    session.commit()
 
     return {"message": f"Factory {factory_id} deleted successfully"}
\ No newline at end of file
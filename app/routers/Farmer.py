@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Query, HTTPException, Path
-from sqlalchemy import select, asc, desc, func
+import csv
+from fastapi import APIRouter, Query, HTTPException, Path, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from typing import Optional
+from app.bulk import BULK_FORMAT_PATTERN, CONFLICT_PATTERN, BulkUpsert, parse_records
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.writer import group_commit
+from app.export import EXPORT_FORMAT_PATTERN, export_columns, stream_export
+from app.fts import can_use_fts, farmer_column_match, farmer_search_subquery
+from app.normalize import contains_filter, search_filter
+from app.pagination import paginate
 from ..schemas.Farmer import (
     FarmerCreate, FarmerOut, FarmerUpdate,
-    PaginatedFarmerResponse, FarmerIdToUserIdResponse
+    PaginatedFarmerResponse, FarmerIdToUserIdResponse, FarmerBulkResult
 )
 from ..models.Farmer import Farmer
 from ..models.User import User  # برای endpoint آخر
@@ -12,38 +22,83 @@ from ..models.User import User  # برای endpoint آخر
 router = APIRouter(prefix="/farmer", tags=["Farmer"])
 
 
+def filter_farmers(query, national_id=None, full_name=None, search=None, search_mode="contains"):
+    """
+    اعمال فیلترهای لیست کشاورزان؛ در جستجوی FTS زیرکوئری تطبیق‌ها هم برگردانده می‌شود
+    """
+    matches = None
+
+    if national_id and can_use_fts(national_id):
+        query = query.where(farmer_column_match("national_id", national_id))
+    elif national_id:
+        query = query.where(Farmer.national_id.ilike(f"%{national_id}%"))
+
+    if full_name:
+        query = query.where(search_filter(Farmer.full_name_key, full_name, search_mode))
+
+    if search and can_use_fts(search):
+        # جستجو از طریق ایندکس FTS5
+        matches = farmer_search_subquery(search)
+        query = query.join(matches, matches.c.farmer_id == Farmer.id)
+    elif search:
+        # عبارت‌های کوتاه‌تر از سه حرف با ایندکس سه‌حرفی قابل جستجو نیستند
+        query = query.where(
+            Farmer.national_id.ilike(f"%{search}%") |
+            contains_filter(Farmer.full_name_key, search) |
+            contains_filter(Farmer.father_name_key, search) |
+            Farmer.phone_number.ilike(f"%{search}%")
+        )
+
+    return query, matches
+
+
 @router.post("/", response_model=FarmerOut)
+@group_commit
 def create_farmer(session: SessionDep, farmer: FarmerCreate):
     """
     Create a new farmer
     """
-    # بررسی وجود کشاورز با کدملی تکراری
-    existing_farmer = session.execute(
-        select(Farmer).where(Farmer.national_id == farmer.national_id)
-    ).scalar_one_or_none()
+    return insert_returning(
+        session, Farmer, farmer.model_dump(),
+        duplicate_detail="Farmer with this national ID already exists"
+    )
 
-    if existing_farmer:
-        raise HTTPException(status_code=400, detail="Farmer with this national ID already exists")
 
-    # ایجاد کشاورز جدید
-    farmer_db = Farmer(**farmer.dict())
-    session.add(farmer_db)
-    session.commit()
-    session.refresh(farmer_db)
+@router.post("/bulk", response_model=FarmerBulkResult)
+async def bulk_import_farmers(
+        request: Request,
+        session: SessionDep,
+        data_format: str = Query("ndjson", alias="format", description="ndjson or csv", regex=BULK_FORMAT_PATTERN),
+        on_conflict: str = Query("update", description="Existing national ID: update or ignore", regex=CONFLICT_PATTERN)
+):
+    """
+    Import farmers from a CSV or NDJSON request body in chunked upserts
+    """
+    body = await request.body()
+    try:
+        records = list(parse_records(body, data_format))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable {data_format} body: {e}")
 
-    return farmer_db
+    importer = BulkUpsert(session, Farmer, FarmerCreate, key="national_id", on_conflict=on_conflict)
+    # نوشتن در پایگاه داده blocking است و نباید event loop را نگه دارد
+    return await run_in_threadpool(importer.run, records)
 
 
-@router.get("/", response_model=PaginatedFarmerResponse)
+@router.get("/", response_model=PaginatedFarmerResponse,
+            dependencies=[Depends(ConditionalGet(Farmer))])
 def get_all_farmers(
         session: SessionDep,
         page: int = Query(1, description="Page number", ge=1),
         size: int = Query(50, description="Page size", ge=1, le=100),
-        sort_by: str = Query("id", description="Sort field"),
+        sort_by: Optional[str] = Query(None, description="Sort field (relevance by default when searching)"),
         sort_order: str = Query("asc", description="Sort order", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None, description="Search term"),
         national_id: Optional[str] = Query(None, description="Filter by national ID"),
-        full_name: Optional[str] = Query(None, description="Filter by full name")
+        full_name: Optional[str] = Query(None, description="Filter by full name"),
+        search_mode: str = Query("contains", description="Full name match mode", regex="^(contains|prefix)$"),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     Get all farmers with pagination, sorting and filtering
@@ -52,62 +107,48 @@ def get_all_farmers(
     query = select(Farmer)
 
     # اعمال فیلترها
-    if national_id:
-        query = query.where(Farmer.national_id.ilike(f"%{national_id}%"))
-
-    if full_name:
-        query = query.where(Farmer.full_name.ilike(f"%{full_name}%"))
-
-    if search:
-        search_filter = (
-                Farmer.national_id.ilike(f"%{search}%") |
-                Farmer.full_name.ilike(f"%{search}%") |
-                Farmer.father_name.ilike(f"%{search}%") |
-                Farmer.phone_number.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
-
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = session.execute(count_query)
-    total = total_result.scalar()
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Farmer, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(Farmer.id))
-            else:
-                query = query.order_by(asc(Farmer.id))
-    else:
-        query = query.order_by(Farmer.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    items = result.scalars().all()
+    query, matches = filter_farmers(query, national_id, full_name, search, search_mode)
+
+    sort_columns = None
+    if matches is not None:
+        # مرتب‌سازی بر اساس میزان تطبیق
+        sort_columns = {"relevance": matches.c.rank}
+        if not sort_by:
+            sort_by = "relevance"
+
+    result = paginate(
+        session, query, Farmer,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total, sort_columns=sort_columns
+    )
 
     return PaginatedFarmerResponse(
-        total=total,
-        size=size,
-        pages=pages,
-        items=items
+        total=result.total,
+        size=result.size,
+        pages=result.pages,
+        items=result.items,
+        next_cursor=result.next_cursor
     )
 
 
-@router.get("/{national_id}", response_model=FarmerOut)
+@router.get("/export")
+def export_farmers(
+        export_format: str = Query("ndjson", alias="format", description="ndjson or csv", regex=EXPORT_FORMAT_PATTERN),
+        search: Optional[str] = Query(None, description="Search term"),
+        national_id: Optional[str] = Query(None, description="Filter by national ID"),
+        full_name: Optional[str] = Query(None, description="Filter by full name"),
+        search_mode: str = Query("contains", description="Full name match mode", regex="^(contains|prefix)$")
+):
+    """
+    Stream all farmers matching the filters as NDJSON or CSV
+    """
+    query = select(*export_columns(Farmer, FarmerOut))
+    query, _ = filter_farmers(query, national_id, full_name, search, search_mode)
+    return stream_export(query.order_by(Farmer.id), FarmerOut, export_format, "farmers")
+
+
+@router.get("/{national_id}", response_model=FarmerOut,
+            dependencies=[Depends(ConditionalGet(Farmer))])
 def get_farmer_by_national_id(
         session: SessionDep,
         national_id: str = Path(..., description="National ID of the farmer")
@@ -149,8 +190,7 @@ def update_farmer(
         if value is not None:
             setattr(farmer, field, value)
 
-    session.commit()
-    session.refresh(farmer)
+    session.flush()
 
     return farmer
 
@@ -171,12 +211,12 @@ def delete_farmer(
         raise HTTPException(status_code=404, detail="Farmer not found")
 
     session.delete(farmer)
-    session.commit()
 
     return {"message": f"Farmer with national ID {national_id} deleted successfully"}
 
 
-@router.get("/farmer-id-to-user-id/{farmer_id}", response_model=FarmerIdToUserIdResponse)
+@router.get("/farmer-id-to-user-id/{farmer_id}", response_model=FarmerIdToUserIdResponse,
+            dependencies=[Depends(ConditionalGet(Farmer, User))])
 def get_user_id_from_farmer_id(
         session: SessionDep,
         farmer_id: int = Path(..., description="Farmer ID", ge=1)
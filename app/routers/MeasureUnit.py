@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.pagination import paginate
 from ..schemas.MeasureUnit import MeasureUnitCreate, MeasureUnitOut, PaginatedMeasureUnitResponse
 from ..models.MeasureUnit import MeasureUnit
 
@@ -13,29 +16,23 @@ def create_measure_unit(session: SessionDep, measure_unit: MeasureUnitCreate):
     """
     ایجاد واحد اندازه‌گیری جدید
     """
-    existing_unit = session.execute(
-        select(MeasureUnit).where(MeasureUnit.unit_name == measure_unit.unit_name)
-    ).scalar_one_or_none()
-
-    if existing_unit:
-        raise HTTPException(status_code=400, detail="Unit name already exists")
-
-    unit_db = MeasureUnit(unit_name=measure_unit.unit_name)
-    session.add(unit_db)
-    session.commit()
-    session.refresh(unit_db)
-
-    return unit_db
+    return insert_returning(
+        session, MeasureUnit, {"unit_name": measure_unit.unit_name},
+        duplicate_detail="Unit name already exists"
+    )
 
 
-@router.get("/", response_model=PaginatedMeasureUnitResponse)
+@router.get("/", response_model=PaginatedMeasureUnitResponse,
+            dependencies=[Depends(ConditionalGet(MeasureUnit))])
 def get_measure_units(
         session: SessionDep,
         page: int = Query(1, ge=1),
         size: int = Query(50, ge=1, le=100),
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
-        search: Optional[str] = Query(None)
+        search: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست واحدهای اندازه‌گیری با صفحه‌بندی
@@ -47,45 +44,21 @@ def get_measure_units(
     if search:
         query = query.where(MeasureUnit.unit_name.ilike(f"%{search}%"))
 
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(MeasureUnit, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(MeasureUnit.id))
-            else:
-                query = query.order_by(asc(MeasureUnit.id))
-    else:
-        query = query.order_by(MeasureUnit.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    items = result.scalars().all()
+    result = paginate(
+        session, query, MeasureUnit,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
 
     return PaginatedMeasureUnitResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        items=result.items,
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -102,6 +75,5 @@ def delete_measure_unit(session: SessionDep, unit_id: int):
         raise HTTPException(status_code=404, detail="Measure unit not found")
 
     session.delete(unit)
-    session.commit()
 
     return {"message": f"Measure unit {unit_id} deleted successfully"}
\ No newline at end of file
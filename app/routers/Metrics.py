@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.metrics import render, update_threadpool
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    متریک‌ها در قالب متنی Prometheus (با چند worker، مجموع همه‌ی process ها)
+    """
+    update_threadpool()
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
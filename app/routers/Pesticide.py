@@ -1,8 +1,12 @@
 # app/routers/Pesticide.py - نسخه اصلاح شده
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.cache import reference_cache
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.pagination import paginate
 from ..schemas.Pesticide import PesticideCreate, PesticideOut, PaginatedPesticideResponse
 from ..models.Pesticide import Pesticide
 from ..models.MeasureUnit import MeasureUnit
@@ -15,32 +19,20 @@ def create_pesticide(session: SessionDep, pesticide: PesticideCreate):
     """
     ایجاد سم جدید
     """
-    # بررسی وجود MeasureUnit
-    measure_unit = session.execute(
-        select(MeasureUnit).where(MeasureUnit.id == pesticide.measure_unit_id)
-    ).scalar_one_or_none()
+    # بررسی وجود MeasureUnit (از کش داده‌های پایه)
+    measure_unit = reference_cache.get(session, MeasureUnit, pesticide.measure_unit_id)
 
     if not measure_unit:
         raise HTTPException(status_code=404, detail="Measure unit not found")
 
-    # بررسی تکراری بودن نام سم
-    existing_pesticide = session.execute(
-        select(Pesticide).where(Pesticide.pesticide_name == pesticide.pesticide_name)
-    ).scalar_one_or_none()
-
-    if existing_pesticide:
-        raise HTTPException(status_code=400, detail="Pesticide name already exists")
-
-    # ایجاد سم جدید
-    pesticide_db = Pesticide(
-        pesticide_name=pesticide.pesticide_name,
-        measure_unit_id=pesticide.measure_unit_id
+    # ایجاد سم جدید (تکراری بودن نام را ایندکس یکتا بررسی می‌کند)
+    pesticide_db = insert_returning(
+        session, Pesticide,
+        {"pesticide_name": pesticide.pesticide_name, "measure_unit_id": pesticide.measure_unit_id},
+        duplicate_detail="Pesticide name already exists",
+        missing_detail="Measure unit not found"
     )
 
-    session.add(pesticide_db)
-    session.commit()
-    session.refresh(pesticide_db)
-
     # ساخت پاسخ دستی (بدون استفاده از from_orm)
     return PesticideOut(
         id=pesticide_db.id,
@@ -51,7 +43,8 @@ def create_pesticide(session: SessionDep, pesticide: PesticideCreate):
     )
 
 
-@router.get("/", response_model=PaginatedPesticideResponse)
+@router.get("/", response_model=PaginatedPesticideResponse,
+            dependencies=[Depends(ConditionalGet(Pesticide, MeasureUnit))])
 def get_pesticides(
         session: SessionDep,
         page: int = Query(1, ge=1),
@@ -59,7 +52,9 @@ def get_pesticides(
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None),
-        measure_unit_id: Optional[int] = Query(None)
+        measure_unit_id: Optional[int] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست سم‌ها با صفحه‌بندی
@@ -75,44 +70,18 @@ def get_pesticides(
     if search:
         query = query.where(Pesticide.pesticide_name.ilike(f"%{search}%"))
 
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Pesticide, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(Pesticide.id))
-            else:
-                query = query.order_by(asc(Pesticide.id))
-    else:
-        query = query.order_by(Pesticide.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    pesticide_objects = result.scalars().all()
+    result = paginate(
+        session, query, Pesticide,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
+    pesticide_objects = result.items
 
     # گرفتن unit_name برای هر pesticide
     items = []
     for pesticide in pesticide_objects:
-        # گرفتن unit_name جداگانه
-        measure_unit = session.execute(
-            select(MeasureUnit).where(MeasureUnit.id == pesticide.measure_unit_id)
-        ).scalar_one_or_none()
+        # نام واحد از کش داده‌های پایه
+        measure_unit = reference_cache.get(session, MeasureUnit, pesticide.measure_unit_id)
 
         items.append(PesticideOut(
             id=pesticide.id,
@@ -124,12 +93,13 @@ def get_pesticides(
 
     return PaginatedPesticideResponse(
         items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -146,6 +116,5 @@ def delete_pesticide(session: SessionDep, pesticide_id: int):
         raise HTTPException(status_code=404, detail="Pesticide not found")
 
     session.delete(pesticide)
-    session.commit()
 
     return {"message": f"Pesticide {pesticide_id} deleted successfully"}
\ No newline at end of file
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.cache import reference_cache
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.normalize import search_filter
+from app.pagination import paginate
 from ..schemas.Product import ProductCreate, ProductOut, PaginatedProductResponse
 from ..models.Product import Product
 from ..models.MeasureUnit import MeasureUnit
@@ -15,41 +20,30 @@ def create_product(session: SessionDep, product: ProductCreate):
     """
     ایجاد محصول جدید
     """
-    # بررسی وجود MeasureUnit
-    measure_unit = session.execute(
-        select(MeasureUnit).where(MeasureUnit.id == product.measure_unit_id)
-    ).scalar_one_or_none()
+    # بررسی وجود MeasureUnit (از کش داده‌های پایه)
+    measure_unit = reference_cache.get(session, MeasureUnit, product.measure_unit_id)
 
     if not measure_unit:
         raise HTTPException(status_code=404, detail="Measure unit not found")
 
-    # بررسی وجود CropYear
-    crop_year = session.execute(
-        select(CropYear).where(CropYear.id == product.crop_year_id)
-    ).scalar_one_or_none()
+    # بررسی وجود CropYear (از کش داده‌های پایه)
+    crop_year = reference_cache.get(session, CropYear, product.crop_year_id)
 
     if not crop_year:
         raise HTTPException(status_code=404, detail="Crop year not found")
 
-    # بررسی تکراری بودن نام محصول
-    existing_product = session.execute(
-        select(Product).where(Product.product_name == product.product_name)
-    ).scalar_one_or_none()
-
-    if existing_product:
-        raise HTTPException(status_code=400, detail="Product name already exists")
-
-    # ایجاد محصول جدید
-    product_db = Product(
-        product_name=product.product_name,
-        measure_unit_id=product.measure_unit_id,
-        crop_year_id=product.crop_year_id
+    # ایجاد محصول جدید (تکراری بودن نام را ایندکس یکتا بررسی می‌کند)
+    product_db = insert_returning(
+        session, Product,
+        {
+            "product_name": product.product_name,
+            "measure_unit_id": product.measure_unit_id,
+            "crop_year_id": product.crop_year_id
+        },
+        duplicate_detail="Product name already exists",
+        missing_detail="Measure unit or crop year not found"
     )
 
-    session.add(product_db)
-    session.commit()
-    session.refresh(product_db)
-
     # ساخت پاسخ دستی
     return ProductOut(
         id=product_db.id,
@@ -62,7 +56,8 @@ def create_product(session: SessionDep, product: ProductCreate):
     )
 
 
-@router.get("/", response_model=PaginatedProductResponse)
+@router.get("/", response_model=PaginatedProductResponse,
+            dependencies=[Depends(ConditionalGet(Product, MeasureUnit, CropYear))])
 def get_products(
         session: SessionDep,
         page: int = Query(1, ge=1),
@@ -71,7 +66,10 @@ def get_products(
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None),
         measure_unit_id: Optional[int] = Query(None),
-        crop_year_id: Optional[int] = Query(None)
+        crop_year_id: Optional[int] = Query(None),
+        search_mode: str = Query("contains", description="Name match mode", regex="^(contains|prefix)$"),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست محصولات با صفحه‌بندی
@@ -89,50 +87,21 @@ def get_products(
 
     # اعمال جستجو
     if search:
-        query = query.where(Product.product_name.ilike(f"%{search}%"))
-
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Product, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(Product.id))
-            else:
-                query = query.order_by(asc(Product.id))
-    else:
-        query = query.order_by(Product.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    product_objects = result.scalars().all()
+        query = query.where(search_filter(Product.product_name_key, search, search_mode))
+
+    result = paginate(
+        session, query, Product,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
+    product_objects = result.items
 
     # ساختن آیتم‌های پاسخ
     items = []
     for product in product_objects:
-        # گرفتن unit_name و crop_year_name جداگانه
-        measure_unit = session.execute(
-            select(MeasureUnit).where(MeasureUnit.id == product.measure_unit_id)
-        ).scalar_one_or_none()
-
-        crop_year = session.execute(
-            select(CropYear).where(CropYear.id == product.crop_year_id)
-        ).scalar_one_or_none()
+        # نام واحد و سال زراعی از کش داده‌های پایه
+        measure_unit = reference_cache.get(session, MeasureUnit, product.measure_unit_id)
+        crop_year = reference_cache.get(session, CropYear, product.crop_year_id)
 
         items.append(ProductOut(
             id=product.id,
@@ -146,12 +115,13 @@ def get_products(
 
     return PaginatedProductResponse(
         items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -168,6 +138,5 @@ def delete_product(session: SessionDep, product_id: int):
         raise HTTPException(status_code=404, detail="Product not found")
 
     session.delete(product)
-    session.commit()
 
     return {"message": f"Product {product_id} deleted successfully"}
\ No newline at end of file
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.cache import reference_cache
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.jalali import convert_model_to_jalali
+from app.pagination import paginate
+from app.writer import group_commit
 from ..schemas.ProductPrice import ProductPriceCreate
 from ..models.ProductPrice import ProductPrice
 from ..models.CropYear import CropYear
@@ -10,39 +16,31 @@ router = APIRouter(prefix="/product-prices", tags=["Product Prices"])
 
 
 @router.post("/", response_model=dict)
+@group_commit
 def create_product_price(session: SessionDep, product_price: ProductPriceCreate):
     """
     ایجاد قیمت محصول جدید
     """
-    # بررسی وجود CropYear
-    crop_year = session.execute(
-        select(CropYear).where(CropYear.id == product_price.crop_year_id)
-    ).scalar_one_or_none()
+    # بررسی وجود CropYear (از کش داده‌های پایه)
+    crop_year = reference_cache.get(session, CropYear, product_price.crop_year_id)
 
     if not crop_year:
         raise HTTPException(status_code=404, detail="Crop year not found")
 
-    # بررسی تکراری بودن قیمت برای این سال زراعی
-    existing_price = session.execute(
-        select(ProductPrice).where(ProductPrice.crop_year_id == product_price.crop_year_id)
-    ).scalar_one_or_none()
-
-    if existing_price:
-        raise HTTPException(status_code=400, detail="Price already exists for this crop year")
-
-    # ایجاد قیمت جدید
-    price_db = ProductPrice(
-        crop_year_id=product_price.crop_year_id,
-        sugar_amount_per_ton_kg=product_price.sugar_amount_per_ton_kg,
-        sugar_price_per_kg=product_price.sugar_price_per_kg,
-        pulp_amount_per_ton_kg=product_price.pulp_amount_per_ton_kg,
-        pulp_price_per_kg=product_price.pulp_price_per_kg
+    # ایجاد قیمت جدید (یکتا بودن قیمت هر سال زراعی را ایندکس یکتا بررسی می‌کند)
+    price_db = insert_returning(
+        session, ProductPrice,
+        {
+            "crop_year_id": product_price.crop_year_id,
+            "sugar_amount_per_ton_kg": product_price.sugar_amount_per_ton_kg,
+            "sugar_price_per_kg": product_price.sugar_price_per_kg,
+            "pulp_amount_per_ton_kg": product_price.pulp_amount_per_ton_kg,
+            "pulp_price_per_kg": product_price.pulp_price_per_kg
+        },
+        duplicate_detail="Price already exists for this crop year",
+        missing_detail="Crop year not found"
     )
 
-    session.add(price_db)
-    session.commit()
-    session.refresh(price_db)
-
     # اضافه کردن crop_year_name به پاسخ
     result = convert_model_to_jalali(price_db)
     result["crop_year_name"] = crop_year.crop_year_name
@@ -50,7 +48,8 @@ def create_product_price(session: SessionDep, product_price: ProductPriceCreate)
     return result
 
 
-@router.get("/", response_model=dict)
+@router.get("/", response_model=dict,
+            dependencies=[Depends(ConditionalGet(ProductPrice, CropYear))])
 def get_product_prices(
         session: SessionDep,
         page: int = Query(1, ge=1),
@@ -58,60 +57,36 @@ def get_product_prices(
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None),
-        crop_year_id: Optional[int] = Query(None)
+        crop_year_id: Optional[int] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست قیمت‌های محصول با صفحه‌بندی
     """
-    # ساخت کوئری پایه با join روی CropYear
-    query = select(ProductPrice).join(CropYear)
+    # ساخت کوئری پایه
+    query = select(ProductPrice)
 
     # اعمال فیلتر crop_year_id
     if crop_year_id:
         query = query.where(ProductPrice.crop_year_id == crop_year_id)
 
-    # اعمال جستجو (در نام سال زراعی)
+    # اعمال جستجو (در نام سال زراعی؛ join فقط در صورت نیاز)
     if search:
-        query = query.where(CropYear.crop_year_name.ilike(f"%{search}%"))
-
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(ProductPrice, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(ProductPrice.id))
-            else:
-                query = query.order_by(asc(ProductPrice.id))
-    else:
-        query = query.order_by(ProductPrice.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    price_objects = result.scalars().all()
+        query = query.join(CropYear).where(CropYear.crop_year_name.ilike(f"%{search}%"))
+
+    result = paginate(
+        session, query, ProductPrice,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
+    price_objects = result.items
 
     # ساختن آیتم‌های پاسخ
     items = []
     for price in price_objects:
-        # گرفتن crop_year_name
-        crop_year = session.execute(
-            select(CropYear).where(CropYear.id == price.crop_year_id)
-        ).scalar_one_or_none()
+        # نام سال زراعی از کش داده‌های پایه
+        crop_year = reference_cache.get(session, CropYear, price.crop_year_id)
 
         # تبدیل به دیکشنری
         price_dict = convert_model_to_jalali(price)
@@ -120,12 +95,13 @@ def get_product_prices(
 
     return {
         "items": items,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": pages,
-        "has_next": page < pages,
-        "has_prev": page > 1
+        "total": result.total,
+        "page": result.page,
+        "size": result.size,
+        "pages": result.pages,
+        "has_next": result.has_next,
+        "has_prev": result.has_prev,
+        "next_cursor": result.next_cursor
     }
 
 
@@ -142,6 +118,5 @@ def delete_product_price(session: SessionDep, price_id: int):
         raise HTTPException(status_code=404, detail="Product price not found")
 
     session.delete(price)
-    session.commit()
 
     return {"message": f"Product price {price_id} deleted successfully"}
\ No newline at end of file
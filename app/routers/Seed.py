@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
+from app.cache import reference_cache
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
 from app.db import SessionDep
+from app.pagination import paginate
 from ..schemas.Seed import SeedCreate, SeedOut, PaginatedSeedResponse
 from ..models.Seed import Seed
 from ..models.MeasureUnit import MeasureUnit
@@ -14,32 +18,20 @@ def create_seed(session: SessionDep, seed: SeedCreate):
     """
     ایجاد بذر جدید
     """
-    # بررسی وجود MeasureUnit
-    measure_unit = session.execute(
-        select(MeasureUnit).where(MeasureUnit.id == seed.measure_unit_id)
-    ).scalar_one_or_none()
+    # بررسی وجود MeasureUnit (از کش داده‌های پایه)
+    measure_unit = reference_cache.get(session, MeasureUnit, seed.measure_unit_id)
 
     if not measure_unit:
         raise HTTPException(status_code=404, detail="Measure unit not found")
 
-    # بررسی تکراری بودن نام بذر
-    existing_seed = session.execute(
-        select(Seed).where(Seed.seed_name == seed.seed_name)
-    ).scalar_one_or_none()
-
-    if existing_seed:
-        raise HTTPException(status_code=400, detail="Seed name already exists")
-
-    # ایجاد بذر جدید
-    seed_db = Seed(
-        seed_name=seed.seed_name,
-        measure_unit_id=seed.measure_unit_id
+    # ایجاد بذر جدید (تکراری بودن نام را ایندکس یکتا بررسی می‌کند)
+    seed_db = insert_returning(
+        session, Seed,
+        {"seed_name": seed.seed_name, "measure_unit_id": seed.measure_unit_id},
+        duplicate_detail="Seed name already exists",
+        missing_detail="Measure unit not found"
     )
 
-    session.add(seed_db)
-    session.commit()
-    session.refresh(seed_db)
-
     # ساخت پاسخ دستی
     return SeedOut(
         id=seed_db.id,
@@ -50,7 +42,8 @@ def create_seed(session: SessionDep, seed: SeedCreate):
     )
 
 
-@router.get("/", response_model=PaginatedSeedResponse)
+@router.get("/", response_model=PaginatedSeedResponse,
+            dependencies=[Depends(ConditionalGet(Seed, MeasureUnit))])
 def get_seeds(
         session: SessionDep,
         page: int = Query(1, ge=1),
@@ -58,7 +51,9 @@ def get_seeds(
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
         search: Optional[str] = Query(None),
-        measure_unit_id: Optional[int] = Query(None)
+        measure_unit_id: Optional[int] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست بذرها با صفحه‌بندی
@@ -74,44 +69,18 @@ def get_seeds(
     if search:
         query = query.where(Seed.seed_name.ilike(f"%{search}%"))
 
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Seed, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(Seed.id))
-            else:
-                query = query.order_by(asc(Seed.id))
-    else:
-        query = query.order_by(Seed.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری
-    result = session.execute(query)
-    seed_objects = result.scalars().all()
+    result = paginate(
+        session, query, Seed,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
+    seed_objects = result.items
 
     # ساختن آیتم‌های پاسخ
     items = []
     for seed in seed_objects:
-        # گرفتن unit_name جداگانه
-        measure_unit = session.execute(
-            select(MeasureUnit).where(MeasureUnit.id == seed.measure_unit_id)
-        ).scalar_one_or_none()
+        # نام واحد از کش داده‌های پایه
+        measure_unit = reference_cache.get(session, MeasureUnit, seed.measure_unit_id)
 
         items.append(SeedOut(
             id=seed.id,
@@ -123,12 +92,13 @@ def get_seeds(
 
     return PaginatedSeedResponse(
         items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
@@ -145,6 +115,5 @@ def delete_seed(session: SessionDep, seed_id: int):
         raise HTTPException(status_code=404, detail="Seed not found")
 
     session.delete(seed)
-    session.commit()
 
     return {"message": f"Seed {seed_id} deleted successfully"}
\ No newline at end of file
@@ -1,46 +1,55 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
 from typing import Optional
-from app.db import SessionDep
+from app.conditional import ConditionalGet
+from app.crud import insert_returning
+from app.db import SessionDep, run_in_session
+from app.export import EXPORT_FORMAT_PATTERN, export_columns, stream_export
+from app.pagination import paginate
 from ..schemas.User import UserCreate, UserUpdate, UserOut, PaginatedUserResponse
 from ..models.User import User
-from app.security import get_password_hash
+from app.security import get_password_hash_async
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.post("/admin/", response_model=UserOut)
-def create_user_by_admin(session: SessionDep, user: UserCreate):
-    existing_user = session.execute(
-        select(User).where(User.username == user.username)
-    ).scalar_one_or_none()
-
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username already exists")
-
-    existing_email = session.execute(
-        select(User).where(User.email == user.email)
-    ).scalar_one_or_none()
-
-    if existing_email:
-        raise HTTPException(status_code=400, detail="Email already exists")
-
-    user_db = User(
-        username=user.username,
-        email=user.email,
-        password_hash=get_password_hash(user.password),
-        full_name=user.full_name,
-        is_active=True
-    )
+async def create_user_by_admin(user: UserCreate):
+    # هش رمز عبور پیش از گرفتن اتصال نویسنده (مثل login)
+    password_hash = await get_password_hash_async(user.password)
+    return await run_in_session(lambda session: insert_returning(
+        session, User,
+        {
+            "username": user.username,
+            "email": user.email,
+            "password_hash": password_hash,
+            "full_name": user.full_name,
+            "is_active": True
+        },
+        duplicate_detail={"username": "Username already exists", "email": "Email already exists"}
+    ))
+
+
+@router.get("/export")
+def export_users(
+        export_format: str = Query("ndjson", alias="format", description="ndjson or csv", regex=EXPORT_FORMAT_PATTERN),
+        search: Optional[str] = Query(None)
+):
+    # فقط فیلدهای UserOut؛ هش رمز عبور هرگز خارج نمی‌شود
+    query = select(*export_columns(User, UserOut))
 
-    session.add(user_db)
-    session.commit()
-    session.refresh(user_db)
+    if search:
+        query = query.where(
+            (User.username.ilike(f"%{search}%")) |
+            (User.email.ilike(f"%{search}%")) |
+            (User.full_name.ilike(f"%{search}%"))
+        )
 
-    return user_db
+    return stream_export(query.order_by(User.id), UserOut, export_format, "users")
 
 
-@router.get("/{user_id}", response_model=UserOut)
+@router.get("/{user_id}", response_model=UserOut,
+            dependencies=[Depends(ConditionalGet(User))])
 def get_user(session: SessionDep, user_id: int):
     user = session.execute(
         select(User).where(User.id == user_id)
@@ -91,20 +100,22 @@ def update_user(session: SessionDep, user_id: int, user_update: UserUpdate):
     if user_update.is_active is not None:
         user.is_active = user_update.is_active
 
-    session.commit()
-    session.refresh(user)
+    session.flush()
 
     return user
 
 
-@router.get("/", response_model=PaginatedUserResponse)
+@router.get("/", response_model=PaginatedUserResponse,
+            dependencies=[Depends(ConditionalGet(User))])
 def get_all_users(
         session: SessionDep,
         page: int = Query(1, ge=1),
         size: int = Query(50, ge=1, le=100),
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
-        search: Optional[str] = Query(None)
+        search: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     query = select(User)
 
@@ -115,37 +126,19 @@ def get_all_users(
             (User.full_name.ilike(f"%{search}%"))
         )
 
-    count_query = select(func.count()).select_from(query.subquery())
-    total = session.execute(count_query).scalar() or 0
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    if sort_by:
-        try:
-            sort_column = getattr(User, sort_by)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(User.id))
-            else:
-                query = query.order_by(asc(User.id))
-    else:
-        query = query.order_by(User.id)
-
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    result = session.execute(query)
-    items = result.scalars().all()
+    result = paginate(
+        session, query, User,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
 
     return PaginatedUserResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        items=result.items,
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
\ No newline at end of file
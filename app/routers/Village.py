@@ -1,48 +1,35 @@
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, asc, desc, func
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Depends
+from sqlalchemy import select
+from typing import List, Optional
+from ..conditional import ConditionalGet
+from ..crud import insert_returning
 from ..db import SessionDep
+from ..writer import group_commit
+from ..export import EXPORT_FORMAT_PATTERN, export_columns, stream_export
+from ..normalize import search_filter
+from ..pagination import paginate
 from ..schemas.Village import VillageCreate, VillageOut, PaginatedVillageResponse
 from ..models.Village import Village
-from ..models.City import City
 
 router = APIRouter(prefix="/village", tags=["Village"])
 
 
 @router.post("/", response_model=VillageOut)
+@group_commit
 def create_village(session: SessionDep, village: VillageCreate):
     """
     ایجاد یک روستای جدید
     """
-    # بررسی وجود شهر
-    city = session.execute(
-        select(City).where(City.id == village.city_id)
-    ).scalar_one_or_none()
-
-    if not city:
-        raise HTTPException(status_code=404, detail="City not found")
-
-    # بررسی وجود روستای تکراری در این شهر
-    existing_village = session.execute(
-        select(Village).where(
-            Village.name == village.name,
-            Village.city_id == village.city_id
-        )
-    ).scalar_one_or_none()
-
-    if existing_village:
-        raise HTTPException(status_code=400, detail="Village already exists in this city")
-
-    # ایجاد روستای جدید
-    village_db = Village(name=village.name, city_id=village.city_id)
-    session.add(village_db)
-    session.commit()
-    session.refresh(village_db)
-
-    return village_db
+    # وجود شهر (کلید خارجی) و تکراری نبودن روستا (ایندکس یکتا) را پایگاه داده بررسی می‌کند
+    return insert_returning(
+        session, Village, {"name": village.name, "city_id": village.city_id},
+        duplicate_detail="Village already exists in this city",
+        missing_detail="City not found"
+    )
 
 
-@router.get("/", response_model=PaginatedVillageResponse)
+@router.get("/", response_model=PaginatedVillageResponse,
+            dependencies=[Depends(ConditionalGet(Village))])
 def get_villages(
         session: SessionDep,
         page: int = Query(1, ge=1),
@@ -50,7 +37,10 @@ def get_villages(
         sort_by: str = Query("id"),
         sort_order: str = Query("asc", regex="^(asc|desc)$"),
         search: str = Query(None),
-        city_id: int = Query(None)
+        city_id: int = Query(None),
+        search_mode: str = Query("contains", description="Name match mode", regex="^(contains|prefix)$"),
+        cursor: Optional[str] = Query(None, description="Keyset cursor (empty for first page)"),
+        include_total: bool = Query(True, description="Compute total and pages")
 ):
     """
     دریافت لیست روستاها با صفحه‌بندی، مرتب‌سازی، جستجو و فیلتر
@@ -64,39 +54,14 @@ def get_villages(
 
     # اعمال جستجو
     if search:
-        query = query.where(Village.name.ilike(f"%{search}%"))
-
-    # محاسبه کل تعداد
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = session.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # محاسبه تعداد صفحات
-    pages = (total + size - 1) // size if total > 0 else 1
-
-    # اعمال مرتب‌سازی
-    if sort_by:
-        try:
-            sort_column = getattr(Village, sort_by)
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
-        except AttributeError:
-            if sort_order and sort_order.lower() == "desc":
-                query = query.order_by(desc(Village.id))
-            else:
-                query = query.order_by(asc(Village.id))
-    else:
-        query = query.order_by(Village.id)
-
-    # اعمال صفحه‌بندی
-    offset = (page - 1) * size
-    query = query.offset(offset).limit(size)
-
-    # اجرای کوئری و تبدیل به دیکشنری
-    result = session.execute(query)
-    village_objects = result.scalars().all()
+        query = query.where(search_filter(Village.name_key, search, search_mode))
+
+    result = paginate(
+        session, query, Village,
+        page=page, size=size, sort_by=sort_by, sort_order=sort_order,
+        cursor=cursor, include_total=include_total
+    )
+    village_objects = result.items
 
     # تبدیل آبجکت‌های SQLAlchemy به دیکشنری
     items = []
@@ -109,15 +74,37 @@ def get_villages(
 
     return PaginatedVillageResponse(
         items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=pages,
-        has_next=page < pages,
-        has_prev=page > 1
+        total=result.total,
+        page=result.page,
+        size=result.size,
+        pages=result.pages,
+        has_next=result.has_next,
+        has_prev=result.has_prev,
+        next_cursor=result.next_cursor
     )
 
 
+@router.get("/export")
+def export_villages(
+        export_format: str = Query("ndjson", alias="format", description="ndjson or csv", regex=EXPORT_FORMAT_PATTERN),
+        search: Optional[str] = Query(None),
+        city_id: Optional[int] = Query(None),
+        search_mode: str = Query("contains", description="Name match mode", regex="^(contains|prefix)$")
+):
+    """
+    خروجی کامل روستاها (با همان فیلترهای لیست) به صورت NDJSON یا CSV
+    """
+    query = select(*export_columns(Village, VillageOut))
+
+    if city_id:
+        query = query.where(Village.city_id == city_id)
+
+    if search:
+        query = query.where(search_filter(Village.name_key, search, search_mode))
+
+    return stream_export(query.order_by(Village.id), VillageOut, export_format, "villages")
+
+
 @router.delete("/{village_id}")
 def delete_village(session: SessionDep, village_id: int):
     """
@@ -131,6 +118,5 @@ def delete_village(session: SessionDep, village_id: int):
         raise HTTPException(status_code=404, detail="Village not found")
 
     session.delete(village)
-    session.commit()
 
     return {"message": f"Village {village_id} deleted successfully"}
\ No newline at end of file
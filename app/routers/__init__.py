@@ -1,9 +1,11 @@
 from .Auth import router as auth_router
 from .City import router as city_router
+from .Debug import router as debug_router
 from .CropYear import router as crop_year_router
 from .Factory import router as factory_router
 from .Farmer import router as farmer_router
 from .MeasureUnit import router as measure_unit_router
+from .Metrics import router as metrics_router
 from .PaymentReason import router as payment_reason_router
 from .Pesticide import router as pesticide_router
 from .Product import router as product_router
@@ -18,9 +20,11 @@ __all__ = [
     "auth_router",
     "city_router",
     "crop_year_router",
+    "debug_router",
     "factory_router",
     "farmer_router",
     "measure_unit_router",
+    "metrics_router",
     "payment_reason_router",
     "pesticide_router",
     "product_router",
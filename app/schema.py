@@ -0,0 +1,160 @@
+# app/schema.py - نسخه‌ی ساختار پایگاه داده و اجرای migration ها
+#      python -m app.schema status|upgrade [--to N]|verify
+#
+#  نسخه در PRAGMA user_version ذخیره می‌شود و migration ها در app/migrations/vNNNN_*.py هستند.
+#  startup فقط نسخه را بررسی می‌کند (یک PRAGMA)؛ DDL فقط با دستور upgrade یا
+#  python -m app.serve --migrate اجرا می‌شود. DB_AUTO_MIGRATE=1 (توسعه) در startup هم upgrade می‌کند.
+import argparse
+import importlib
+import logging
+import os
+import pkgutil
+import re
+import sys
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import inspect
+
+import app.db
+from app.db import Base
+
+logger = logging.getLogger(__name__)
+
+AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "").lower() in ("1", "true", "yes")
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable
+
+
+def load_migrations(package: str = "app.migrations") -> List[Migration]:
+    """ماژول‌های vNNNN_name به ترتیب نسخه؛ نسخه‌ها باید از 1 پشت سر هم باشند"""
+    module = importlib.import_module(package)
+    migrations = []
+    for info in pkgutil.iter_modules(module.__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            migration = importlib.import_module(f"{package}.{info.name}")
+            migrations.append(Migration(int(match.group(1)), match.group(2), migration.upgrade))
+    migrations.sort()
+    versions = [migration.version for migration in migrations]
+    if versions != list(range(1, len(migrations) + 1)):
+        raise SchemaVersionError(f"Migration versions must be 1..N without gaps, got {versions}")
+    return migrations
+
+
+MIGRATIONS = load_migrations()
+LATEST_VERSION = len(MIGRATIONS)
+
+
+def schema_version(engine) -> int:
+    connection = engine.raw_connection()
+    try:
+        return connection.cursor().execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def _set_schema_version(engine, version: int):
+    connection = engine.raw_connection()
+    try:
+        connection.cursor().execute(f"PRAGMA user_version={int(version)}")
+    finally:
+        connection.close()
+
+
+def _is_empty(engine) -> bool:
+    with engine.connect() as conn:
+        return not inspect(conn).get_table_names()
+
+
+def upgrade(engine=None, target: Optional[int] = None, migrations: Sequence[Migration] = None) -> List[int]:
+    """
+    اجرای migration های باقی‌مانده تا target (پیش‌فرض آخرین نسخه)؛ نسخه‌های اجراشده را برمی‌گرداند
+
+    پایگاه داده‌ی خالی مستقیم از روی مدل‌ها ساخته و با آخرین نسخه علامت زده می‌شود. هر migration
+    باید تکرارپذیر باشد (IF NOT EXISTS): اگر وسط کار قطع شود، دفعه‌ی بعد از ابتدا اجرا می‌شود.
+    """
+    from app.fts import ensure_farmer_fts
+
+    engine = engine or app.db.engine
+    migrations = MIGRATIONS if migrations is None else migrations
+    latest = len(migrations)
+    target = latest if target is None else target
+    current = schema_version(engine)
+    if current > latest:
+        raise SchemaVersionError(f"Database schema version {current} is newer than this code ({latest})")
+
+    if current == 0 and target == latest and _is_empty(engine):
+        Base.metadata.create_all(bind=engine)
+        ensure_farmer_fts(engine)
+        _set_schema_version(engine, latest)
+        logger.info(f"Created schema at version {latest}")
+        return []
+
+    applied = []
+    for migration in migrations[current:target]:
+        started = time.perf_counter()
+        migration.upgrade(engine)
+        _set_schema_version(engine, migration.version)
+        applied.append(migration.version)
+        logger.info(f"Applied migration {migration.version} {migration.name} "
+                    f"in {time.perf_counter() - started:.2f}s")
+    return applied
+
+
+def verify_schema(engine=None, expected: int = None):
+    """بررسی نسخه در startup؛ بدون هیچ DDL"""
+    engine = engine or app.db.engine
+    expected = LATEST_VERSION if expected is None else expected
+    current = schema_version(engine)
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema version is {current}, this code expects {expected}; "
+            f"run `python -m app.schema upgrade` (or app.serve --migrate) first"
+        )
+
+
+def check_schema_on_startup():
+    if AUTO_MIGRATE:
+        upgrade()
+    verify_schema()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show the schema version and pending migrations")
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="stop at this version")
+    commands.add_parser("verify", help="exit with an error unless the schema is at the latest version")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "status":
+        current = schema_version(app.db.engine)
+        print(f"schema version {current} (latest {LATEST_VERSION})")
+        for migration in MIGRATIONS[current:]:
+            print(f"  pending {migration.version:04d} {migration.name}")
+    elif args.command == "upgrade":
+        applied = upgrade(target=args.to)
+        print(f"✅ schema version {schema_version(app.db.engine)} ({len(applied)} migrations applied)")
+    else:
+        try:
+            verify_schema()
+        except SchemaVersionError as e:
+            sys.exit(str(e))
+        print(f"✅ schema version {LATEST_VERSION}")
+
+
+if __name__ == "__main__":
+    main()
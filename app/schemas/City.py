@@ -21,9 +21,10 @@ class CityOut(CityBase):
 # مدل برای پاسخ صفحه‌بندی شده شهرها
 class PaginatedCityResponse(PydanticBase):
     items: List[CityOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -36,12 +36,29 @@ class FarmerOut(FarmerBase):
 
 
 class PaginatedFarmerResponse(BaseModel):
-    total: int
+    total: Optional[int]
     size: int
-    pages: int
+    pages: Optional[int]
     items: List[FarmerOut]
+    next_cursor: Optional[str] = None
 
 
 class FarmerIdToUserIdResponse(BaseModel):
     farmer_id: int
-    user_id: Optional[int] = None
\ No newline at end of file
+    user_id: Optional[int] = None
+
+class FarmerBulkRowError(BaseModel):
+    line: int
+    national_id: Optional[str] = None
+    errors: List[str]
+
+
+class FarmerBulkResult(BaseModel):
+    received: int
+    created: int
+    updated: int
+    skipped: int
+    failed: int
+    errors: List[FarmerBulkRowError]
+    elapsed_seconds: float
+    rows_per_second: float
@@ -30,9 +30,10 @@ class PesticideUpdate(BaseModel):
 
 class PaginatedPesticideResponse(BaseModel):
     items: List[PesticideOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
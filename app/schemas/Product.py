@@ -33,9 +33,10 @@ class ProductUpdate(BaseModel):
 
 class PaginatedProductResponse(BaseModel):
     items: List[ProductOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
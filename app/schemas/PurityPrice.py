@@ -35,9 +35,10 @@ class PurityPriceUpdate(BaseModel):
 
 class PaginatedPurityPriceResponse(BaseModel):
     items: List[PurityPriceOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
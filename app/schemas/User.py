@@ -34,9 +34,10 @@ class UserOut(BaseModel):
 
 class PaginatedUserResponse(BaseModel):
     items: List[UserOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
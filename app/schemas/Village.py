@@ -1,5 +1,5 @@
 from pydantic import BaseModel as PydanticBase
-from typing import List
+from typing import List, Optional
 
 
 class VillageBase(PydanticBase):
@@ -21,9 +21,10 @@ class VillageOut(VillageBase):
 # مدل برای پاسخ صفحه‌بندی شده روستاها
 class PaginatedVillageResponse(PydanticBase):
     items: List[VillageOut]
-    total: int
+    total: Optional[int]
     page: int
     size: int
-    pages: int
+    pages: Optional[int]
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
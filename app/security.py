@@ -1,54 +1,80 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import secrets
+import hashlib
+import uuid
+
+from app.hashing import hash_pool, hash_password, verify_password_hash
+from app.keys import load_signing_keys
 
 # تنظیمات
-SECRET_KEY = secrets.token_urlsafe(32)
+# کلید مشترک همه‌ی worker ها از JWT_KEY_FILE یا JWT_SECRET_KEY (app/keys.py)
+signing_keys = load_signing_keys()
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# استفاده از pbkdf2_sha256 به جای bcrypt برای جلوگیری از خطای 72 بایت
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256", "bcrypt"],
-    default="pbkdf2_sha256",
-    pbkdf2_sha256__default_rounds=30000
-)
-
 
+# محاسبه در process pool جدا (app/hashing.py)؛ اگر صف پر باشد HTTPException 429/503
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return hash_pool.run("verify", verify_password_hash, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_pool.run("hash", hash_password, password)
+
+
+# برای handler های async: منتظر ماندن برای هش thread نمی‌گیرد
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hash_pool.run_async("verify", verify_password_hash, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await hash_pool.run_async("hash", hash_password, password)
+
+
+def new_jti() -> str:
+    """شناسه‌ی یکتای توکن (claim «jti») برای باطل کردن آن"""
+    return uuid.uuid4().hex
+
+
+def hash_token(token: str) -> str:
+    """SHA-256 هگز توکن (64 کاراکتر ثابت) برای ذخیره و جستجوی ایندکس‌دار refresh token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _encode(claims: dict) -> str:
+    return jwt.encode(
+        claims, signing_keys.active_key, algorithm=ALGORITHM, headers={"kid": signing_keys.active_kid}
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    to_encode.setdefault("jti", new_jti())
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _encode(to_encode)
 
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
+    to_encode.setdefault("jti", new_jti())
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _encode(to_encode)
 
 
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        key = signing_keys.key_for(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        payload = jwt.decode(token, key, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
\ No newline at end of file
@@ -0,0 +1,73 @@
+# app/serve.py - اجرای production با چند worker (یکی برای هر هسته)
+#
+#      JWT_KEY_FILE=/etc/havirkesht/jwt-keys.json python -m app.serve --workers 4
+#
+#  پیش از بالا آمدن worker ها:
+#    - کلید امضای مشترک JWT الزامی است (کلید تصادفی هر process توکن‌های worker دیگر را رد می‌کند)
+#    - نسخه‌ی ساختار پایگاه داده بررسی می‌شود (با --migrate ابتدا migration ها اجرا می‌شوند)
+#    - پوشه‌ی PROMETHEUS_MULTIPROC_DIR خالی می‌شود تا /metrics همه‌ی worker ها را جمع بزند
+#    - process pool هش رمز عبور بین worker ها تقسیم می‌شود
+#    - کارهای نگهداری (app/maintenance.py) فقط در همین process اجرا می‌شوند، نه در هر worker
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--app", default="main:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--migrate", action="store_true", help="apply pending schema migrations before starting")
+    return parser.parse_args(argv)
+
+
+def prepare_environment(workers: int, environ=os.environ):
+    """تنظیم متغیرهایی که worker ها (و app.metrics در آن‌ها) هنگام import می‌خوانند"""
+    metrics_dir = environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "havirkesht-metrics")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    # مجموع process های هش در همه‌ی worker ها بیشتر از تعداد هسته‌ها نشود
+    environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prepare_environment(args.workers)
+
+    # پس از تنظیم محیط import می‌شوند
+    from app.db import engine
+    from app.keys import load_signing_keys
+    from app.maintenance import MAINTENANCE_ENABLED, scheduler
+    from app.schema import SchemaVersionError, upgrade, verify_schema
+
+    if load_signing_keys().ephemeral:
+        sys.exit("JWT_KEY_FILE or JWT_SECRET_KEY must be set when running several workers")
+
+    try:
+        if args.migrate:
+            upgrade()
+        verify_schema()
+    except SchemaVersionError as e:
+        sys.exit(str(e))
+    engine.dispose()
+    os.environ["DB_AUTO_MIGRATE"] = "0"
+
+    if MAINTENANCE_ENABLED:
+        scheduler.start()
+    os.environ["DB_MAINTENANCE"] = "0"
+
+    import uvicorn
+    try:
+        uvicorn.run(args.app, host=args.host, port=args.port, workers=args.workers)
+    finally:
+        scheduler.stop(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
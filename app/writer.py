@@ -0,0 +1,223 @@
+# app/writer.py - صف نوشتن با commit گروهی: چند درخواست همزمان، یک تراکنش و یک fsync
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+import app.db
+from app.db import SessionLocal
+from app.metrics import WRITER_BATCH_SIZE, WRITER_QUEUE_WAIT, WRITER_REJECTED
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_MAX = int(os.getenv("DB_WRITE_BATCH_MAX", "64"))  # حداکثر عملیات در یک تراکنش
+# مکث کوتاه پس از اولین عملیات تا درخواست‌های همزمان به همان دسته برسند
+WRITE_BATCH_WAIT = float(os.getenv("DB_WRITE_BATCH_WAIT_MS", "2")) / 1000
+# سقف عملیات در انتظار؛ در بار بیش از توان نویسنده درخواست بلافاصله با 503 رد می‌شود
+#  به جای اینکه صف و تأخیر بی‌نهایت رشد کنند (مثل admission control در app/hashing.py)
+WRITE_QUEUE_LIMIT = int(os.getenv("DB_WRITE_QUEUE_LIMIT", str(WRITE_BATCH_MAX * 16)))
+RETRY_AFTER_SECONDS = 1
+
+_STOP = object()
+
+
+def _size_bucket(size: int) -> str:
+    """بازه‌های توانی ۲ برای توزیع اندازه‌ی دسته‌ها: 1، 2-3، 4-7، ..."""
+    low = 1 << (size.bit_length() - 1)
+    return str(low) if low == 1 else f"{low}-{2 * low - 1}"
+
+
+class GroupCommitWriter:
+    """
+    یک thread نویسنده که عملیات نوشتن درخواست‌های همزمان را از صف برمی‌دارد و
+    دسته‌ای در یک تراکنش اجرا می‌کند
+
+    هر عملیات در SAVEPOINT خودش اجرا می‌شود، پس خطای یکی (مثلاً کدملی تکراری) فقط
+    future همان درخواست را خطادار می‌کند و بقیه‌ی دسته commit می‌شوند.
+    """
+
+    def __init__(self, max_batch: int = WRITE_BATCH_MAX, max_wait: float = WRITE_BATCH_WAIT,
+                 session_factory: Optional[Callable] = None, queue_limit: int = WRITE_QUEUE_LIMIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.session_factory = session_factory
+        self._queue = queue.Queue(maxsize=queue_limit)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    # -- صف
+
+    def submit(self, operation: Callable) -> Future:
+        """operation(session) در thread نویسنده اجرا و نتیجه‌اش در future گذاشته می‌شود"""
+        future = Future()
+        self._ensure_thread()
+        # context درخواست همراه عملیات می‌رود تا آمار کوئری‌ها (instrumentation) به همان درخواست برسد
+        try:
+            self._queue.put_nowait((operation, future, time.perf_counter(), contextvars.copy_context()))
+        except queue.Full:
+            WRITER_REJECTED.inc()
+            raise HTTPException(
+                status_code=503, detail="Too many pending writes",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+        return future
+
+    async def run(self, operation: Callable):
+        return await asyncio.wrap_future(self.submit(operation))
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """اجرای عملیات باقی‌مانده در صف و پایان thread نویسنده"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # پس از این دسته متوقف شو (صف محدود است، پس _STOP دوباره در آن گذاشته نمی‌شود)
+                self._stopping.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        self._stopping.clear()
+        while not self._stopping.is_set():
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._apply(batch)
+            except Exception as e:
+                logger.error(f"❌ Writer batch failed: {e}")
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _apply(self, batch):
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued, _ in batch]
+        session_factory = self.session_factory or (lambda: SessionLocal(bind=app.db.write_engine))
+
+        succeeded, failed = [], 0
+        with session_factory() as session:
+            for operation, future, _, context in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with session.begin_nested():
+                        result = context.run(operation, session)
+                except Exception as e:
+                    failed += 1
+                    future.set_exception(e)
+                    continue
+                succeeded.append((future, result))
+
+            try:
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"❌ Writer commit failed for {len(succeeded)} operations: {e}")
+                for future, _ in succeeded:
+                    future.set_exception(e)
+                failed += len(succeeded)
+                succeeded = []
+
+        for future, result in succeeded:
+            future.set_result(result)
+        self._record(len(batch), failed, waits, time.perf_counter() - started)
+
+    # -- آمار
+
+    def _reset_stats(self):
+        self._stats = {
+            "batches": 0, "operations": 0, "failed": 0, "max_batch_size": 0,
+            "batch_sizes": {}, "queue_wait_total": 0.0, "queue_wait_max": 0.0, "batch_time_total": 0.0,
+        }
+
+    def _record(self, size: int, failed: int, waits, batch_time: float):
+        WRITER_BATCH_SIZE.observe(size)
+        for wait in waits:
+            WRITER_QUEUE_WAIT.observe(wait)
+        with self._lock:
+            stats = self._stats
+            stats["batches"] += 1
+            stats["operations"] += size
+            stats["failed"] += failed
+            stats["max_batch_size"] = max(stats["max_batch_size"], size)
+            bucket = _size_bucket(size)
+            stats["batch_sizes"][bucket] = stats["batch_sizes"].get(bucket, 0) + 1
+            stats["queue_wait_total"] += sum(waits)
+            stats["queue_wait_max"] = max(stats["queue_wait_max"], max(waits))
+            stats["batch_time_total"] += batch_time
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, batch_sizes=dict(self._stats["batch_sizes"]))
+        batches, operations = stats["batches"], stats["operations"]
+        return {
+            "batches": batches,
+            "operations": operations,
+            "failed": stats["failed"],
+            "queue_depth": self._queue.qsize(),
+            "avg_batch_size": round(operations / batches, 2) if batches else 0,
+            "max_batch_size": stats["max_batch_size"],
+            "batch_sizes": stats["batch_sizes"],
+            "avg_queue_wait_ms": round(stats["queue_wait_total"] / operations * 1000, 3) if operations else 0,
+            "max_queue_wait_ms": round(stats["queue_wait_max"] * 1000, 3),
+            "avg_batch_ms": round(stats["batch_time_total"] / batches * 1000, 3) if batches else 0,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_stats()
+
+
+writer = GroupCommitWriter()
+
+
+def group_commit(handler):
+    """
+    تبدیل یک handler نوشتن (با پارامتر session) به endpoint ای که در صف writer اجرا می‌شود
+
+    handler دست نمی‌خورد و همچنان با یک session معمولی قابل فراخوانی است؛ فقط session
+    درخواست حذف و session دسته‌ی نویسنده به آن داده می‌شود.
+    """
+    signature = inspect.signature(handler)
+
+    @functools.wraps(handler)
+    async def endpoint(**params):
+        return await writer.run(lambda session: handler(session=session, **params))
+
+    endpoint.__signature__ = signature.replace(parameters=[
+        parameter for parameter in signature.parameters.values() if parameter.name != "session"
+    ])
+    return endpoint
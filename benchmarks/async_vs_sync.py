@@ -0,0 +1,121 @@
+# benchmarks/async_vs_sync.py - مقایسه‌ی توان عملیاتی مسیرهای sync و async (DB_ASYNC_READS)
+#  python benchmarks/async_vs_sync.py [--clients 50 100 250 500] [--duration 10] [--farmers 20000]
+#
+#  برای هر حالت یک سرور uvicorn روی یک پایگاه داده‌ی موقت بالا می‌آید، کشاورزان با /farmer/bulk
+#  وارد می‌شوند و سپس کلاینت‌های همزمان ترکیبی از جستجوی کشاورز با کدملی و لیست‌ها را می‌خوانند.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = """
+import sys, uvicorn
+sys.path.insert(0, {root!r})
+import main
+uvicorn.run(main.app, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, async_reads: bool):
+    port = free_port()
+    # سرور پایگاه داده‌ی خالی را خودش migrate می‌کند
+    env = dict(os.environ, DB_ASYNC_READS="1" if async_reads else "0", DB_AUTO_MIGRATE="1")
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(root=ROOT, port=port)],
+        cwd=workdir, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/provinces/", timeout=1)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def seed(base_url: str, farmers: int):
+    rows = "\n".join(
+        json.dumps({"national_id": f"{i:010d}", "full_name": f"کشاورز {i}",
+                    "father_name": "حسن", "phone_number": f"0912{i:07d}"}, ensure_ascii=False)
+        for i in range(farmers)
+    )
+    httpx.post(f"{base_url}/farmer/bulk", content=rows.encode(), timeout=300).raise_for_status()
+
+
+async def client_loop(client, farmers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        if random.random() < 0.7:
+            url = f"/farmer/{random.randrange(farmers):010d}"
+        else:
+            url = "/farmer/?size=20&include_total=false&cursor="
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_load(base_url, clients, duration, farmers):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client, farmers, deadline, latencies, errors) for _ in range(clients)))
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--farmers", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for async_reads in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            # مسیر پایگاه داده در برنامه ../database.db است
+            workdir = os.path.join(tmp, "run")
+            os.mkdir(workdir)
+            process, base_url = start_server(workdir, async_reads)
+            try:
+                seed(base_url, args.farmers)
+                for clients in args.clients:
+                    result = asyncio.run(run_load(base_url, clients, args.duration, args.farmers))
+                    print(f"{'async' if async_reads else 'sync':<6} {clients:>7} {result['rps']:>9.0f} "
+                          f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['errors']:>7}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# benchmarks/login_throughput.py - توان عملیاتی login و refresh-token با کلاینت‌های همزمان
+#  python benchmarks/login_throughput.py [--clients 10 50 100] [--duration 10] [--users 1000] [--history 200000]
+#
+#  یک سرور uvicorn روی یک پایگاه داده‌ی موقت بالا می‌آید (با process pool هش رمز عبور، مثل
+#  production)، کاربران و سطرهای غیرفعال قدیمی جدول auth مستقیم در فایل نوشته می‌شوند و سپس هر
+#  کلاینت پشت سر هم login و با refresh token همان login یک refresh-token می‌فرستد.
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db import set_sqlite_pragma  # noqa: E402
+from app.hashing import hash_password  # noqa: E402
+from app.models.Auth import Auth  # noqa: E402
+from app.models.User import User  # noqa: E402
+from async_vs_sync import SERVER, free_port  # noqa: E402
+
+PASSWORD = "secret123"
+
+
+def start_server(workdir: str):
+    port = free_port()
+    # سرور پایگاه داده‌ی خالی را خودش migrate می‌کند
+    env = dict(os.environ, DB_AUTO_MIGRATE="1")
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(root=ROOT, port=port)],
+        cwd=workdir, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            httpx.get(f"{base_url}/provinces/", timeout=1)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def seed(path: str, users: int, history: int):
+    """کاربران و login های گذشته مستقیم در فایل (ساختن هزار هش از طریق HTTP دقیقه‌ها طول می‌کشد)"""
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    password_hash = hash_password(PASSWORD)
+    expired = datetime.utcnow() - timedelta(days=1)
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": password_hash,
+             "full_name": f"کاربر {i}", "is_active": True}
+            for i in range(users)
+        ])
+        if history:
+            session.execute(insert(Auth), [
+                {"user_id": random.randint(1, users), "access_jti": f"{i:032x}", "refresh_token_hash": f"{i:064x}",
+                 "is_active": False, "expires_at": expired}
+                for i in range(history)
+            ])
+        session.commit()
+    engine.dispose()
+
+
+async def timed_post(client, url, body, latencies, statuses):
+    started = time.perf_counter()
+    try:
+        response = await client.post(url, json=body)
+    except httpx.HTTPError as e:
+        statuses[type(e).__name__] += 1
+        return None
+    latencies.append(time.perf_counter() - started)
+    statuses[response.status_code] += 1
+    return response
+
+
+async def client_loop(client, index, clients, users, deadline, results):
+    # هر login نشست‌های قبلی همان کاربر را غیرفعال می‌کند؛ کلاینت‌ها کاربر مشترک ندارند
+    while time.perf_counter() < deadline:
+        username = f"user{random.randrange(index, users, clients)}"
+        response = await timed_post(client, "/token", {"username": username, "password": PASSWORD}, *results["login"])
+        if response is None or response.status_code != 200:
+            continue
+        await timed_post(client, "/refresh-token", {"refresh_token": response.json()["refresh_token"]},
+                         *results["refresh"])
+
+
+def summary(latencies, statuses, duration):
+    latencies.sort()
+    ok = statuses[200]
+    rejected = statuses[429] + statuses[503]
+    return {
+        "rps": ok / duration,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95": latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000 if latencies else 0,
+        "rejected": rejected,
+        "errors": sum(statuses.values()) - ok - rejected,
+    }
+
+
+async def run_load(base_url, clients, duration, users):
+    results = {"login": ([], Counter()), "refresh": ([], Counter())}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client, i, clients, users, deadline, results) for i in range(clients)))
+    return {name: summary(latencies, statuses, duration) for name, (latencies, statuses) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=200000)
+    args = parser.parse_args()
+    if max(args.clients) > args.users:
+        parser.error("--users must be at least the largest --clients")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # مسیر پایگاه داده در برنامه ../database.db است
+        workdir = os.path.join(tmp, "run")
+        os.mkdir(workdir)
+        process, base_url = start_server(workdir)
+        try:
+            seed(os.path.join(tmp, "database.db"), args.users, args.history)
+            print(f"{args.users} users, {args.history} inactive auth rows")
+            print(f"{'route':<8} {'clients':>7} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'429/503':>8} {'errors':>7}")
+            for clients in args.clients:
+                result = asyncio.run(run_load(base_url, clients, args.duration, args.users))
+                for name, row in result.items():
+                    print(f"{name:<8} {clients:>7} {row['rps']:>8.0f} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+                          f"{row['rejected']:>8} {row['errors']:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/sqlite_profiles.py - اثر پروفایل‌های DB_PROFILE بر تأخیر خواندن و نوشتن
+#  python benchmarks/sqlite_profiles.py [--farmers 50000] [--operations 2000]
+#
+#  برای هر پروفایل یک پایگاه داده‌ی موقت با همان PRAGMA های app.db ساخته و با کشاورزان پر می‌شود،
+#  سپس تأخیر درج تکی (هر کدام یک commit)، جستجو با کدملی و خواندن صفحه‌ی لیست اندازه گرفته می‌شود.
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SQLITE_PROFILES, apply_sqlite_profile  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE farmers (
+    id INTEGER PRIMARY KEY,
+    national_id VARCHAR(10) NOT NULL UNIQUE,
+    full_name VARCHAR NOT NULL,
+    father_name VARCHAR NOT NULL,
+    phone_number VARCHAR NOT NULL
+)
+"""
+
+
+def connect(path: str, profile: dict) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, isolation_level=None, cached_statements=profile["cached_statements"])
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    apply_sqlite_profile(cursor, profile)
+    cursor.close()
+    return connection
+
+
+def seed(connection: sqlite3.Connection, farmers: int):
+    connection.execute(SCHEMA)
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO farmers (national_id, full_name, father_name, phone_number) VALUES (?, ?, ?, ?)",
+        ((f"{i:010d}", f"کشاورز {i}", "حسن", f"0912{i:07d}") for i in range(farmers))
+    )
+    connection.execute("COMMIT")
+
+
+def timed(operation, count: int):
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.95) - 1] * 1e6
+
+
+def run_profile(name: str, farmers: int, operations: int):
+    profile = SQLITE_PROFILES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = connect(os.path.join(tmp, "bench.db"), profile)
+        seed(connection, farmers)
+
+        def insert(i):
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO farmers (national_id, full_name, father_name, phone_number) VALUES (?, ?, ?, ?)",
+                (f"9{i:09d}", "کشاورز جدید", "حسن", "09120000000")
+            )
+            connection.execute("COMMIT")
+
+        def lookup(_):
+            connection.execute(
+                "SELECT * FROM farmers WHERE national_id = ?", (f"{random.randrange(farmers):010d}",)
+            ).fetchone()
+
+        def page(_):
+            connection.execute(
+                "SELECT * FROM farmers WHERE id > ? ORDER BY id LIMIT 50", (random.randrange(farmers),)
+            ).fetchall()
+
+        results = {
+            "insert+commit": timed(insert, operations),
+            "lookup": timed(lookup, operations),
+            "page(50)": timed(page, operations),
+        }
+        connection.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--farmers", type=int, default=50000)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<9} {'operation':<14} {'p50 µs':>9} {'p95 µs':>9}")
+    for name in args.profiles:
+        for operation, (p50, p95) in run_profile(name, args.farmers, args.operations).items():
+            print(f"{name:<9} {operation:<14} {p50:>9.1f} {p95:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# conftest.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import Base
+import app.models  # noqa: F401 - ثبت همه‌ی جداول روی Base
+import app.models.Farmer  # noqa: F401
+
+
+@pytest.fixture
+def session(tmp_path):
+    """یک پایگاه داده SQLite موقت و خالی برای هر تست"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine, expire_on_commit=False) as db:
+        yield db
+    engine.dispose()
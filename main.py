@@ -1,20 +1,34 @@
 from fastapi import FastAPI
-from app.db import create_db_and_tables
+from app.db import ASYNC_READS
+from app.hashing import hash_pool
+from app.instrumentation import QueryStatsMiddleware
+from app.maintenance import MAINTENANCE_ENABLED, scheduler
+from app.metrics import MetricsMiddleware, mark_process_dead
+from app.schema import check_schema_on_startup
+from app.writer import writer
 from app.routers import (
     provinces_router, city_router, village_router,
     factory_router, user_router, auth_router,
     measure_unit_router, pesticide_router, seed_router,
     crop_year_router, product_router, payment_reason_router,
     product_price_router, purity_price_router,
-    farmer_router
+    farmer_router, debug_router, metrics_router
 )
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    create_db_and_tables()
+    check_schema_on_startup()
+    hash_pool.start()
+    if MAINTENANCE_ENABLED:
+        scheduler.start()
     yield
+    # Shutdown: اجرای نوشتن‌های باقی‌مانده در صف
+    scheduler.stop()
+    writer.stop()
+    hash_pool.shutdown()
+    mark_process_dead()
 
 app = FastAPI(
     title="HavirKesht Database",
@@ -23,6 +37,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# تعداد و زمان کوئری‌های هر درخواست در هدر Server-Timing
+app.add_middleware(QueryStatsMiddleware)
+# تأخیر و تعداد درخواست‌ها برای /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include all routers
 app.include_router(provinces_router)
 app.include_router(city_router)
@@ -39,6 +58,12 @@ app.include_router(payment_reason_router)
 app.include_router(product_price_router)
 app.include_router(purity_price_router)
 app.include_router(farmer_router)
+app.include_router(debug_router)
+app.include_router(metrics_router)
+
+if ASYNC_READS:
+    from app.routers.AsyncRoutes import use_async_routes
+    use_async_routes(app)
 
 if __name__ == "__main__":
     import uvicorn
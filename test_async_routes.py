@@ -0,0 +1,68 @@
+# test_async_routes.py
+import asyncio
+import inspect
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db import Base
+from app.models import Provinces
+from app.routers import auth_router, city_router, farmer_router, provinces_router, village_router
+from app.routers.AsyncRoutes import as_async, use_async_routes
+from app.routers.Provinces import get_provinces
+from test_list_queries import call_handler
+
+
+def test_sync_handler_runs_on_async_session(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([Provinces(name="تهران"), Provinces(name="فارس")])
+            await session.commit()
+            # مقادیر پیش‌فرض Query مثل فراخوانی مستقیم handler همگام
+            result = await call_handler(as_async(get_provinces), session)
+        await engine.dispose()
+        return result
+
+    result = asyncio.run(scenario())
+    assert result.total == 2
+    assert [item.name for item in result.items] == ["تهران", "فارس"]
+
+
+def test_async_routes_replace_sync_routes_in_place():
+    app = FastAPI()
+    for router in (auth_router, city_router, farmer_router, provinces_router, village_router):
+        app.include_router(router)
+    paths_before = [(route.path, route.methods) for route in app.router.routes]
+
+    use_async_routes(app)
+
+    # ترتیب مسیرها عوض نمی‌شود؛ مثلاً /farmer/export همچنان پیش از /farmer/{national_id} است
+    assert [(route.path, route.methods) for route in app.router.routes] == paths_before
+    endpoints = {
+        (route.path, method): route.endpoint
+        for route in app.router.routes if isinstance(route, APIRoute) for method in route.methods
+    }
+    assert asyncio.iscoroutinefunction(endpoints["/farmer/{national_id}", "GET"])
+    assert asyncio.iscoroutinefunction(endpoints["/provinces/", "GET"])
+    assert not asyncio.iscoroutinefunction(endpoints["/farmer/{national_id}", "DELETE"])
+    assert not asyncio.iscoroutinefunction(endpoints["/farmer/export", "GET"])
+    # نوشتن روی نویسنده‌ی همگام، نه AsyncSession
+    assert asyncio.iscoroutinefunction(endpoints["/refresh-token", "POST"])
+    assert "session" not in inspect.signature(endpoints["/refresh-token", "POST"]).parameters
+
+
+def test_async_writes_run_on_the_sync_writer():
+    import app.db
+    from app.routers.AsyncRoutes import on_writer
+
+    def handler(session, value: int):
+        return session.get_bind(), value
+
+    endpoint = on_writer(handler)
+    assert list(inspect.signature(endpoint).parameters) == ["value"]
+    bind, value = asyncio.run(endpoint(value=3))
+    assert bind is app.db.write_engine and value == 3
@@ -0,0 +1,65 @@
+# test_auth.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+
+import app.db
+from app.models.Auth import Auth
+from app.models.User import User
+from app.routers.Auth import change_password, login_for_access_token, refresh_access_token
+from app.schemas.Auth import ChangePasswordRequest, RefreshTokenRequest, TokenRequest
+from app.security import get_password_hash, verify_password
+
+
+@pytest.fixture
+def session(session, monkeypatch):
+    # handler های async با run_in_session روی engine های app.db اجرا می‌شوند
+    monkeypatch.setattr(app.db, "write_engine", session.get_bind())
+    monkeypatch.setattr(app.db, "read_engine", session.get_bind())
+    return session
+
+
+def active_sessions(session):
+    return session.scalar(select(func.count()).select_from(Auth).where(Auth.is_active == True))
+
+
+def test_login_deactivates_previous_sessions(session):
+    session.add(User(username="ali", email="ali@example.com", password_hash=get_password_hash("secret123"),
+                     full_name="علی", is_active=True))
+    session.commit()
+
+    first = asyncio.run(login_for_access_token(TokenRequest(username="ali", password="secret123")))
+    second = asyncio.run(login_for_access_token(TokenRequest(username="ali", password="secret123")))
+    assert active_sessions(session) == 1
+
+    # فقط آخرین نشست قابل refresh است و refresh نشست را جایگزین می‌کند
+    refresh_access_token(session, RefreshTokenRequest(refresh_token=second.refresh_token))
+    session.commit()
+    assert active_sessions(session) == 1
+    assert session.scalar(select(func.count()).select_from(Auth)) == 3
+
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN UPDATE auth SET is_active = 0 WHERE user_id = 1 AND is_active = 1"
+    )).all()
+    assert "ix_auth_active_user_id" in plan[0][-1]
+    assert first.refresh_token != second.refresh_token
+
+
+def test_change_password_revokes_sessions(session):
+    user = User(username="ali", email="ali@example.com", password_hash=get_password_hash("secret123"),
+                full_name="علی", is_active=True)
+    session.add(user)
+    session.commit()
+    asyncio.run(login_for_access_token(TokenRequest(username="ali", password="secret123")))
+
+    claims = {"sub": str(user.id)}
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(change_password(claims, ChangePasswordRequest(current_password="wrong", new_password="secret456")))
+    assert error.value.status_code == 400
+
+    asyncio.run(change_password(claims, ChangePasswordRequest(current_password="secret123", new_password="secret456")))
+    session.expire_all()
+    assert verify_password("secret456", session.get(User, user.id).password_hash)
+    assert active_sessions(session) == 0
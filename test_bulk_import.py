@@ -0,0 +1,73 @@
+# test_bulk_import.py
+import json
+
+from sqlalchemy import func, select
+
+from app.bulk import BulkUpsert, parse_records
+from app.models import Farmer
+from app.schemas.Farmer import FarmerCreate
+
+
+def farmer_row(national_id, full_name="علی رضایی", **extra):
+    return {"national_id": national_id, "full_name": full_name, "father_name": "حسن",
+            "phone_number": "09120000000", **extra}
+
+
+def ndjson(*rows):
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+def run(session, body, data_format="ndjson", **options):
+    importer = BulkUpsert(session, Farmer, FarmerCreate, key="national_id", chunk_size=2, **options)
+    return importer.run(parse_records(body, data_format))
+
+
+def test_ndjson_import_in_chunks(session):
+    body = ndjson(*(farmer_row(f"00{i}") for i in range(5)))
+
+    result = run(session, body)
+
+    assert (result["received"], result["created"], result["failed"]) == (5, 5, 0)
+    assert session.scalar(select(func.count()).select_from(Farmer)) == 5
+
+
+def test_conflicts_update_or_ignore(session):
+    run(session, ndjson(farmer_row("001"), farmer_row("002")))
+
+    result = run(session, ndjson(farmer_row("001", "نام جدید"), farmer_row("003")))
+    assert (result["created"], result["updated"]) == (1, 1)
+    assert session.scalar(select(Farmer.full_name).where(Farmer.national_id == "001")) == "نام جدید"
+
+    result = run(session, ndjson(farmer_row("002", "نادیده"), farmer_row("004")), on_conflict="ignore")
+    assert (result["created"], result["skipped"]) == (1, 1)
+    assert session.scalar(select(Farmer.full_name).where(Farmer.national_id == "002")) == "علی رضایی"
+
+
+def test_per_row_errors(session):
+    body = b"\n".join([
+        ndjson(farmer_row("001")),
+        b"{not json",
+        ndjson({"national_id": "002", "full_name": "بدون پدر"}),
+        ndjson(farmer_row("001")),
+    ])
+
+    result = run(session, body)
+
+    assert (result["created"], result["failed"]) == (1, 3)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+    assert any("father_name" in message for message in result["errors"][1]["errors"])
+    assert result["errors"][2]["errors"] == ["Duplicate national_id in upload"]
+
+
+def test_csv_import_treats_empty_cells_as_missing(session):
+    body = (
+        "\ufeffnational_id,full_name,father_name,phone_number,card_number\n"
+        "001,علی رضایی,حسن,0912,\n"
+        "002,مریم احمدی,رضا,0935,6037\n"
+    ).encode()
+
+    result = run(session, body, data_format="csv")
+
+    assert (result["created"], result["failed"]) == (2, 0)
+    cards = dict(session.execute(select(Farmer.national_id, Farmer.card_number)).all())
+    assert cards == {"001": None, "002": "6037"}
@@ -0,0 +1,60 @@
+# test_conditional.py
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.conditional import ConditionalGet, read_versions
+from app.models import City, Provinces
+
+
+def make_request(path="/city/", query="page=1&size=10", headers=None):
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({
+        "type": "http", "method": "GET", "path": path,
+        "query_string": query.encode(), "headers": raw_headers
+    })
+
+
+def check(session, request):
+    response = Response()
+    ConditionalGet(City, Provinces)(request, response, session)
+    return response.headers
+
+
+def test_commit_bumps_versions_of_written_and_dependent_tables(session):
+    session.add(Provinces(name="تهران"))
+    session.commit()
+
+    versions = read_versions(session, ["provinces", "city", "village"])
+    # city و village با کلید خارجی به provinces وابسته‌اند
+    assert {name: v for name, (v, _) in versions.items()} == {"provinces": 1, "city": 1, "village": 1}
+
+
+def test_matching_etag_returns_304_until_table_changes(session):
+    province = Provinces(name="تهران")
+    session.add(province)
+    session.commit()
+
+    headers = check(session, make_request())
+    etag = headers["etag"]
+
+    with pytest.raises(HTTPException) as exc:
+        check(session, make_request(headers={"If-None-Match": etag}))
+    assert exc.value.status_code == 304
+    assert exc.value.headers["ETag"] == etag
+
+    # پارامترهای متفاوت یعنی نمایش متفاوت
+    assert check(session, make_request(query="page=2&size=10"))["etag"] != etag
+
+    session.add(City(name="ری", province_id=province.id))
+    session.commit()
+    headers = check(session, make_request(headers={"If-None-Match": etag}))
+    assert headers["etag"] != etag
+
+
+def test_if_modified_since_alone_never_returns_304(session):
+    """Last-Modified با دقت ثانیه تغییرهای همان ثانیه را نشان نمی‌دهد، پس فقط ETag معتبر است"""
+    session.add(Provinces(name="تهران"))
+    session.commit()
+    headers = check(session, make_request(headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}))
+    assert "last-modified" not in headers and headers["etag"]
@@ -0,0 +1,56 @@
+# test_create_returning.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+import app.db
+from app.models import Provinces
+from app.routers.City import create_city
+from app.routers.User import create_user_by_admin
+from app.schemas.City import CityCreate
+from app.schemas.User import UserCreate
+from test_list_queries import count_queries
+
+
+@pytest.fixture
+def province(session):
+    # engine برنامه این PRAGMA را در هر اتصال اجرا می‌کند
+    session.execute(text("PRAGMA foreign_keys=ON"))
+    province = Provinces(name="تهران")
+    session.add(province)
+    session.commit()
+    return province
+
+
+def test_create_is_a_single_insert_returning(session, province):
+    with count_queries(session) as statements:
+        city = create_city(session, CityCreate(name="ری", province_id=province.id))
+
+    assert city.id and city.name_key == "ری"
+    data_statements = [s for s in statements if "table_versions" not in s]
+    assert len(data_statements) == 1
+    assert data_statements[0].startswith("INSERT INTO city") and "RETURNING" in data_statements[0]
+
+
+def test_constraint_errors_map_to_existing_responses(session, province):
+    create_city(session, CityCreate(name="ری", province_id=province.id))
+
+    with pytest.raises(HTTPException) as exc:
+        create_city(session, CityCreate(name="ری", province_id=province.id))
+    assert (exc.value.status_code, exc.value.detail) == (400, "City already exists in this province")
+
+    with pytest.raises(HTTPException) as exc:
+        create_city(session, CityCreate(name="ری", province_id=province.id + 100))
+    assert (exc.value.status_code, exc.value.detail) == (404, "Province not found")
+
+
+def test_duplicate_detail_per_unique_column(session, monkeypatch):
+    # هش بیرون از تراکنش؛ نوشتن با run_in_session روی engine نویسنده‌ی app.db
+    monkeypatch.setattr(app.db, "write_engine", session.get_bind())
+    asyncio.run(create_user_by_admin(UserCreate(username="admin", email="admin@example.com", password="secret1")))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(create_user_by_admin(UserCreate(username="other", email="admin@example.com", password="secret1")))
+    assert exc.value.detail == "Email already exists"
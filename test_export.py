@@ -0,0 +1,95 @@
+# test_export.py
+import asyncio
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.export import csv_chunks, export_columns, iter_rows, ndjson_chunks
+from app.fts import ensure_farmer_fts
+from app.models import Farmer, User
+from app.routers.Farmer import filter_farmers
+from app.schemas.Farmer import FarmerOut
+from app.schemas.User import UserOut
+
+
+def add_farmers(session, count):
+    for i in range(count):
+        session.add(Farmer(national_id=f"{i:010d}", full_name=f"کشاورز {i}",
+                           father_name="حسن", phone_number=f"0912{i:07d}"))
+    session.commit()
+
+
+def rows(session, query, schema, batch_size=1000):
+    factory = lambda: Session(session.get_bind())
+    return iter_rows(query, schema, batch_size=batch_size, session_factory=factory)
+
+
+def test_ndjson_export_streams_in_batches(session):
+    add_farmers(session, 7)
+    query = select(*export_columns(Farmer, FarmerOut)).order_by(Farmer.id)
+
+    batches = list(rows(session, query, FarmerOut, batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+    lines = "".join(ndjson_chunks(iter(batches))).splitlines()
+    assert len(lines) == 7
+    first = json.loads(lines[0])
+    assert first["national_id"] == "0000000000"
+    assert first["full_name"] == "کشاورز 0"
+    assert "full_name_key" not in first
+
+
+def test_export_applies_filters(session):
+    add_farmers(session, 5)
+    ensure_farmer_fts(session.get_bind())
+
+    query, _ = filter_farmers(select(*export_columns(Farmer, FarmerOut)), search="0000003")
+    exported = [row["national_id"] for batch in rows(session, query, FarmerOut) for row in batch]
+    assert exported == ["0000000003"]
+
+
+def test_csv_export_has_header_and_no_password(session):
+    session.add(User(username="admin", email="admin@example.com", password_hash="secret-hash"))
+    session.commit()
+
+    query = select(*export_columns(User, UserOut))
+    text = "".join(csv_chunks(rows(session, query, UserOut), list(UserOut.model_fields)))
+
+    assert text.startswith("\ufeff")
+    records = list(csv.DictReader(io.StringIO(text.lstrip("\ufeff"))))
+    assert records[0]["username"] == "admin"
+    assert "secret-hash" not in text
+
+
+def test_csv_export_of_empty_table_is_header_only(session):
+    query = select(*export_columns(Farmer, FarmerOut))
+    text = "".join(csv_chunks(rows(session, query, FarmerOut), list(FarmerOut.model_fields)))
+    assert text.strip("\ufeff\r\n") == ",".join(FarmerOut.model_fields)
+
+
+def test_export_stream_holds_a_reader_slot_until_closed():
+    from app.db import READ_POOL_SIZE, _slot_semaphore
+    from app.export import with_reader_slot
+
+    closed = []
+
+    def chunks():
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        body = with_reader_slot(chunks())
+        assert await body.__anext__() == "a"
+        held = _slot_semaphore(True)._value
+        # کلاینت در میانه‌ی stream قطع می‌شود
+        await body.aclose()
+        return held, _slot_semaphore(True)._value
+
+    assert asyncio.run(scenario()) == (READ_POOL_SIZE - 1, READ_POOL_SIZE)
+    assert closed == [True]
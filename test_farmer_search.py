@@ -0,0 +1,78 @@
+# test_farmer_search.py
+from sqlalchemy import text
+
+from app.fts import ensure_farmer_fts, rebuild_farmer_fts
+from app.models.Farmer import Farmer
+from app.routers.Farmer import get_all_farmers
+from test_list_queries import call_handler
+
+
+def _add_farmers(session):
+    session.add_all([
+        Farmer(national_id="0012345678", full_name="علی رضایی", father_name="حسن", phone_number="09121110000"),
+        Farmer(national_id="0098765432", full_name="مریم احمدی", father_name="رضا", phone_number="09351112222"),
+        Farmer(national_id="0055555555", full_name="رضا رضایی", father_name="محمد", phone_number="09190003333"),
+    ])
+    session.commit()
+
+
+def test_search_uses_fts_index_and_follows_updates(session):
+    """جستجو از طریق farmers_fts انجام می‌شود و با تغییر جدول همگام است"""
+    _add_farmers(session)
+
+    result = call_handler(get_all_farmers, session, search="رضایی")
+    assert sorted(f.national_id for f in result.items) == ["0012345678", "0055555555"]
+
+    result = call_handler(get_all_farmers, session, search="111")
+    assert {f.national_id for f in result.items} == {"0012345678", "0098765432"}
+
+    # فیلتر national_id فقط همان ستون را جستجو می‌کند
+    assert call_handler(get_all_farmers, session, national_id="555").total == 1
+    assert call_handler(get_all_farmers, session, national_id="111").total == 0
+    assert call_handler(get_all_farmers, session, national_id="00").total == 3
+
+    farmer = session.query(Farmer).filter_by(national_id="0098765432").one()
+    farmer.full_name = "مریم رضایی"
+    session.commit()
+    result = call_handler(get_all_farmers, session, search="رضایی", include_total=False)
+    assert len(result.items) == 3
+
+    session.delete(farmer)
+    session.commit()
+    assert call_handler(get_all_farmers, session, search="مریم").total == 0
+
+    # عبارت کوتاه به جستجوی ilike برمی‌گردد
+    assert call_handler(get_all_farmers, session, search="رض").total == 2
+
+
+def test_ensure_builds_index_for_existing_database(session):
+    """روی پایگاه داده‌ی قدیمی بدون FTS، ایندکس ساخته و از داده‌های موجود پر می‌شود"""
+    _add_farmers(session)
+    session.execute(text("DROP TABLE farmers_fts"))
+    for trigger in ("farmers_fts_ai", "farmers_fts_ad", "farmers_fts_au"):
+        session.execute(text(f"DROP TRIGGER {trigger}"))
+    session.commit()
+
+    engine = session.get_bind()
+    assert ensure_farmer_fts(engine) is True
+    assert ensure_farmer_fts(engine) is False
+    assert call_handler(get_all_farmers, session, search="احمدی").total == 1
+
+    rebuild_farmer_fts(engine)
+    assert call_handler(get_all_farmers, session, search="احمدی").total == 1
+
+
+def test_search_matches_persian_variants(session):
+    """عبارت و متن ایندکس‌شده یکسان می‌شوند: ي/ی و ك/ک عربی، نیم‌فاصله و اعراب"""
+    session.add_all([
+        Farmer(national_id="0011111111", full_name="علي كريمي", father_name="مهدي", phone_number="09120000001"),
+        Farmer(national_id="0022222222", full_name="زهرا عبدالله‌زاده", father_name="حسین", phone_number="09120000002"),
+    ])
+    session.commit()
+
+    assert call_handler(get_all_farmers, session, search="کریمی").total == 1
+    assert call_handler(get_all_farmers, session, search="عَلی").total == 1
+    assert call_handler(get_all_farmers, session, search="عبدالله زاده").total == 1
+    # نام پدر هم یکسان ایندکس می‌شود؛ عبارت کوتاه از ستون *_key با like جستجو می‌شود
+    assert call_handler(get_all_farmers, session, search="مهدی").total == 1
+    assert call_handler(get_all_farmers, session, search="كر").total == 1
@@ -0,0 +1,63 @@
+# test_hashing.py
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.hashing import PasswordHashPool, hash_password, verify_password_hash
+
+
+@pytest.fixture
+def pool():
+    pool = PasswordHashPool(workers=1, queue_limit=1, timeout=10)
+    yield pool
+    pool.shutdown()
+
+
+def test_hash_and_verify_run_in_worker_process(pool):
+    hashed = pool.run("hash", hash_password, "secret123")
+    assert pool.run("verify", verify_password_hash, "secret123", hashed)
+    assert not pool.run("verify", verify_password_hash, "wrong", hashed)
+    assert pool.stats()["pending"] == 0
+
+
+def test_full_queue_is_rejected_immediately(pool):
+    pool.start()
+    # یک کار در حال اجرا و یک کار در صف = ظرفیت کامل
+    busy = [threading.Thread(target=pool.run, args=("verify", time.sleep, 0.5)) for _ in range(2)]
+    for thread in busy:
+        thread.start()
+    while pool.stats()["pending"] < 2:
+        time.sleep(0.01)
+
+    started = time.perf_counter()
+    with pytest.raises(HTTPException) as error:
+        pool.run("verify", time.sleep, 0.5)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert time.perf_counter() - started < 0.1
+
+    for thread in busy:
+        thread.join()
+    assert pool.stats()["pending"] == 0
+
+
+def test_async_callers_get_a_deeper_queue_than_threads():
+    pool = PasswordHashPool(workers=1, queue_limit=1, async_queue_limit=3, timeout=10)
+    pool.start()
+
+    async def burst():
+        return await asyncio.gather(
+            *(pool.run_async("verify", time.sleep, 0.2) for _ in range(5)), return_exceptions=True
+        )
+
+    try:
+        # سقف async: 1 کارگر + 3 در صف؛ فراخوانی پنجم رد می‌شود
+        results = asyncio.run(burst())
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 1 and rejected[0].status_code == 429
+        assert pool.stats()["pending"] == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,42 @@
+# test_instrumentation.py
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.instrumentation import QueryStats, QueryStatsMiddleware, current_stats
+from app.models import Provinces
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(session):
+    stats = QueryStats("test")
+    token = current_stats.set(stats)
+    try:
+        for province_id in range(6):
+            session.get(Provinces, province_id)
+        session.execute(select(Provinces)).all()
+    finally:
+        current_stats.reset(token)
+
+    assert stats.count >= 7
+    assert stats.total > 0 and stats.slowest is not None
+    # BEGIN جزو کوئری‌های تکراری نیست
+    assert list(stats.repeated().values()) == [6]
+    assert "db-n-plus-one" in stats.server_timing(0.01)
+
+
+def test_middleware_adds_server_timing_and_logs_n_plus_one(session, caplog):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/provinces")
+    def list_provinces():
+        return [session.get(Provinces, province_id) for province_id in range(5)]
+
+    with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+        response = TestClient(app).get("/provinces")
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=") and 'desc="5 queries"' in timing
+    assert "Suspected N+1 in GET /provinces: 5x" in caplog.text
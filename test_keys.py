@@ -0,0 +1,40 @@
+# test_keys.py
+import json
+
+import pytest
+from jose import jwt
+
+import app.security as security
+from app.keys import load_signing_keys
+
+
+def write_keys(tmp_path, active, keys):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"active": active, "keys": keys}))
+    return str(path)
+
+
+def test_tokens_verify_after_key_rotation(tmp_path, monkeypatch):
+    old = {"k1": "old-secret"}
+    monkeypatch.setattr(security, "signing_keys", load_signing_keys({"JWT_KEY_FILE": write_keys(tmp_path, "k1", old)}))
+    old_token = security.create_access_token({"sub": "1"})
+    assert jwt.get_unverified_header(old_token)["kid"] == "k1"
+
+    # کلید جدید فعال شده اما کلید قبلی هنوز برای توکن‌های قدیمی نگه داشته می‌شود
+    rotated = load_signing_keys({"JWT_KEY_FILE": write_keys(tmp_path, "k2", {**old, "k2": "new-secret"})})
+    monkeypatch.setattr(security, "signing_keys", rotated)
+    new_token = security.create_access_token({"sub": "2"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert security.verify_token(old_token)["sub"] == "1"
+    assert security.verify_token(new_token)["sub"] == "2"
+
+    # پس از حذف کلید قدیمی
+    monkeypatch.setattr(security, "signing_keys", load_signing_keys({"JWT_SECRET_KEY": "new-secret", "JWT_KEY_ID": "k2"}))
+    assert security.verify_token(old_token) is None
+    assert security.verify_token(new_token)["sub"] == "2"
+
+
+def test_key_file_must_contain_active_key(tmp_path):
+    with pytest.raises(ValueError):
+        load_signing_keys({"JWT_KEY_FILE": write_keys(tmp_path, "missing", {"k1": "secret"})})
+    assert load_signing_keys({}).ephemeral
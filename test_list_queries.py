@@ -0,0 +1,126 @@
+# test_list_queries.py
+import inspect
+from contextlib import contextmanager
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, text
+
+from app.cache import count_cache, reference_cache
+from app.conditional import bump_table_versions
+from app.models import CropYear, MeasureUnit, Pesticide, Product, ProductPrice, PurityPrice, Seed
+from app.routers.Pesticide import get_pesticides
+from app.routers.Product import get_products
+from app.routers.ProductPrice import get_product_prices
+from app.routers.PurityPrice import get_purity_prices
+from app.routers.Seed import get_seeds
+
+
+def call_handler(handler, session, **params):
+    """فراخوانی مستقیم یک handler با مقادیر پیش‌فرض Query"""
+    for name, parameter in inspect.signature(handler).parameters.items():
+        if name != "session" and name not in params:
+            params[name] = getattr(parameter.default, "default", parameter.default)
+    return handler(session=session, **params)
+
+
+@contextmanager
+def count_queries(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def catalog(session):
+    units = [MeasureUnit(unit_name=f"unit {i}") for i in range(3)]
+    years = [CropYear(crop_year_name=f"140{i}") for i in range(3)]
+    session.add_all(units + years)
+    session.flush()
+    for i in range(30):
+        session.add(Product(product_name=f"product {i}", measure_unit_id=units[i % 3].id,
+                            crop_year_id=years[i % 3].id))
+        session.add(Pesticide(pesticide_name=f"pesticide {i}", measure_unit_id=units[i % 3].id))
+        session.add(Seed(seed_name=f"seed {i}", measure_unit_id=units[i % 3].id))
+    for year in years:
+        session.add(ProductPrice(crop_year_id=year.id, sugar_amount_per_ton_kg=Decimal("120"),
+                                 sugar_price_per_kg=Decimal("10"), pulp_amount_per_ton_kg=Decimal("50"),
+                                 pulp_price_per_kg=Decimal("2")))
+        session.add(PurityPrice(crop_year_id=year.id, base_purity=Decimal("16"),
+                                base_purity_price=Decimal("100"), price_difference=Decimal("5")))
+    session.commit()
+    # هر تست باید با session خالی شروع شود تا روابط از identity map خوانده نشوند
+    session.expunge_all()
+    count_cache.clear()
+    return session
+
+
+@pytest.mark.parametrize("handler", [get_products, get_pesticides, get_seeds,
+                                     get_product_prices, get_purity_prices])
+def test_list_runs_count_and_page_query_only(catalog, handler):
+    """هر لیست فقط نسخه‌ی جدول‌ها، یک کوئری شمارش و یک کوئری صفحه اجرا می‌کند، مستقل از اندازه‌ی صفحه"""
+    reference_cache.clear()
+    with count_queries(catalog) as cold:
+        call_handler(handler, catalog, size=100)
+    # حداکثر یک بار خواندن هر جدول پایه (واحد اندازه‌گیری، سال زراعی) همراه با نسخه‌ی آن
+    assert len(cold) <= 7
+
+    count_cache.clear()
+    with count_queries(catalog) as statements:
+        response = call_handler(handler, catalog, size=100)
+
+    items = response["items"] if isinstance(response, dict) else response.items
+    assert len(items) > 0
+    assert len(statements) == 3
+
+    for item in items:
+        item = item if isinstance(item, dict) else item.model_dump()
+        for key in ("unit_name", "crop_year_name"):
+            if key in item:
+                assert item[key] != "نامشخص"
+
+
+def test_reference_cache_is_invalidated_by_writes(session):
+    """کش داده‌های پایه پس از ایجاد یا حذف ردیف باطل می‌شود"""
+    reference_cache.clear()
+    assert reference_cache.get(session, MeasureUnit, 1) is None
+    stats = reference_cache.stats()["measure_units"]
+
+    unit = MeasureUnit(unit_name="کیلوگرم")
+    session.add(unit)
+    session.commit()
+    assert reference_cache.get(session, MeasureUnit, unit.id).unit_name == "کیلوگرم"
+    reference_cache.get(session, MeasureUnit, unit.id)
+    assert reference_cache.stats()["measure_units"] == {
+        "hits": stats["hits"] + 1, "misses": stats["misses"] + 1
+    }
+
+    session.delete(unit)
+    session.commit()
+    assert reference_cache.get(session, MeasureUnit, unit.id) is None
+
+
+def test_reference_cache_sees_rows_created_by_other_workers(session):
+    """id ناموجود در کش: اگر نسخه‌ی جدول عوض شده باشد جدول دوباره خوانده می‌شود"""
+    reference_cache.clear()
+    assert reference_cache.get(session, MeasureUnit, 1) is None
+    session.commit()
+
+    # نوشتن در process دیگر؛ after_commit این process کش را باطل نمی‌کند
+    with session.get_bind().begin() as conn:
+        conn.execute(text("INSERT INTO measure_units (id, unit_name) VALUES (1, 'تن')"))
+        bump_table_versions(conn, ["measure_units"])
+
+    assert reference_cache.get(session, MeasureUnit, 1).unit_name == "تن"
+    misses = reference_cache.stats()["measure_units"]["misses"]
+    # id واقعاً ناموجود با نسخه‌ی بدون تغییر جدول را دوباره نمی‌خواند
+    assert reference_cache.get(session, MeasureUnit, 2) is None
+    assert reference_cache.stats()["measure_units"]["misses"] == misses
@@ -0,0 +1,85 @@
+# test_maintenance.py
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, delete, event, select
+from sqlalchemy.orm import Session
+
+from app.db import Base, begin_transaction, set_sqlite_pragma
+from app.maintenance import checkpoint_wal, incremental_vacuum, purge_auth_sessions
+from app.models.Auth import Auth
+from app.models.RevokedToken import RevokedToken
+
+
+def test_purge_deletes_stale_sessions_in_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    Base.metadata.create_all(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+
+    now = datetime.utcnow()
+    rows = {
+        "active": (True, now + timedelta(minutes=30)),
+        "active, access expired": (True, now - timedelta(days=1)),  # refresh token هنوز معتبر است
+        "inactive, recent": (False, now - timedelta(hours=1)),
+        "inactive, old": (False, now - timedelta(days=2)),
+        "refresh expired": (True, now - timedelta(days=8)),
+    }
+    with Session(engine) as session:
+        for i, (is_active, expires_at) in enumerate(rows.values()):
+            session.add(Auth(user_id=1, access_jti=f"{i:032x}", refresh_token_hash=f"{i:064x}",
+                             is_active=is_active, expires_at=expires_at))
+        session.add_all([RevokedToken(jti=f"{i:032x}", expires_at=now + timedelta(minutes=i - 5)) for i in range(10)])
+        session.commit()
+    commits.clear()
+
+    # شمارش سطرها روی session خواننده، نه در تراکنش نویسنده
+    read_sessions = []
+
+    def read_session():
+        read_sessions.append(Session(engine))
+        return read_sessions[-1]
+
+    purged = purge_auth_sessions(lambda: Session(engine), now=now, retention=timedelta(days=1), batch_size=2,
+                                 read_session_factory=read_session)
+
+    assert purged == {"auth": 2, "revoked_tokens": 5}
+    # هر دسته یک تراکنش: auth 2+0، revoked_tokens 2+2+1
+    assert len(commits) == 5
+    assert len(read_sessions) == 1
+    with Session(engine) as session:
+        remaining = session.scalars(select(Auth.access_jti).order_by(Auth.id)).all()
+        assert remaining == [f"{i:032x}" for i in (0, 1, 2)]
+    engine.dispose()
+
+
+def test_checkpoint_and_incremental_vacuum(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all([RevokedToken(jti=f"{i:032x}", expires_at=now) for i in range(2000)])
+        session.commit()
+        session.execute(delete(RevokedToken))
+        session.commit()
+
+    # خواننده‌ای که snapshot قدیمی را نگه داشته checkpoint کامل را متوقف می‌کند
+    reader = sqlite3.connect(tmp_path / "test.db", isolation_level=None)
+    reader.execute("BEGIN")
+    reader.execute("SELECT count(*) FROM revoked_tokens").fetchone()
+    with Session(engine) as session:
+        session.add(RevokedToken(jti="f" * 32, expires_at=now))
+        session.commit()
+    assert checkpoint_wal(engine, busy_timeout_ms=10)["busy"]
+    reader.execute("COMMIT")
+    result = checkpoint_wal(engine)
+    assert not result["busy"] and result["wal_bytes"] == 0
+    assert result["auto_vacuum"] == 2 and result["freelist_pages"] > 0
+
+    result = incremental_vacuum(engine, pages_per_step=50)
+    assert result["freelist_pages"] == 0 and result["released_pages"] > 0
+    reader.close()
+    engine.dispose()
@@ -0,0 +1,43 @@
+# test_metrics.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.metrics import MetricsMiddleware
+from app.routers import metrics_router
+from app.security import get_password_hash, verify_password
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/farmer/{national_id}")
+    def get_farmer(national_id: str):
+        return {"national_id": national_id}
+
+    labels = {"method": "GET", "route": "/farmer/{national_id}", "status": "200"}
+    before = sample("http_requests_total", **labels)
+    client = TestClient(app)
+    for national_id in ("0012345678", "0087654321"):
+        client.get(f"/farmer/{national_id}")
+    client.get("/no-such-route")
+
+    assert sample("http_requests_total", **labels) == before + 2
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/farmer/{national_id}"}' in body
+    assert "threadpool_size" in body
+
+
+def test_password_hashing_is_timed():
+    before = sample("password_hash_seconds_count", operation="hash")
+    assert verify_password("secret123", get_password_hash("secret123"))
+    assert sample("password_hash_seconds_count", operation="hash") == before + 1
+    assert sample("password_hash_seconds_count", operation="verify") >= 1
@@ -0,0 +1,55 @@
+# test_normalize.py
+from sqlalchemy import create_engine, select, text
+
+from app.db import Base
+from app.models import City, Provinces, Village
+from app.normalize import ensure_search_key_columns, normalize_persian, prefix_filter
+from app.routers.Village import get_villages
+from test_list_queries import call_handler
+
+
+def test_normalize_persian():
+    """ی/ک عربی، نیم‌فاصله و اعراب یکسان می‌شوند"""
+    assert normalize_persian("علي‌آباد") == normalize_persian("علی آباد")
+    assert normalize_persian("كَرَج") == "کرج"
+    assert normalize_persian(" Tehran ") == "tehran"
+
+
+def test_village_search_matches_arabic_input(session):
+    """جستجوی روستا با حروف عربی یا بدون نیم‌فاصله نتیجه‌ی درست می‌دهد"""
+    province = Provinces(name="کرمان")
+    session.add(province)
+    session.flush()
+    city = City(name="کرمان", province_id=province.id)
+    session.add(city)
+    session.flush()
+    session.add_all([Village(name=name, city_id=city.id) for name in ("علی‌آباد", "کریم‌آباد", "باغین")])
+    session.commit()
+
+    result = call_handler(get_villages, session, search="علي آباد")
+    assert [v.name for v in result.items] == ["علی‌آباد"]
+
+    result = call_handler(get_villages, session, search="كر", search_mode="prefix")
+    assert [v.name for v in result.items] == ["کریم‌آباد"]
+
+    # جستجوی «شروع با» باید با بازه روی ایندکس انجام شود
+    compiled = select(Village.id).where(prefix_filter(Village.name_key, "كر")).compile(
+        session.get_bind(), compile_kwargs={"literal_binds": True}
+    )
+    plan = session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    assert any("ix_village_name_key" in row[-1] for row in plan)
+
+
+def test_ensure_adds_key_columns_to_existing_database(tmp_path):
+    """ستون‌های کلید جستجو به پایگاه داده‌ی قدیمی اضافه و بلافاصله پر می‌شوند"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE provinces (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE)"))
+        conn.execute(text("INSERT INTO provinces (name) VALUES ('كرمانشاه')"))
+
+    assert ensure_search_key_columns(engine, Base.metadata) == ["provinces.name_key"]
+    assert ensure_search_key_columns(engine, Base.metadata) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name_key FROM provinces")).scalar() == "کرمانشاه"
+        indexes = conn.execute(text("PRAGMA index_list(provinces)")).all()
+        assert any(row[1] == "ix_provinces_name_key" for row in indexes)
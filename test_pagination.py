@@ -0,0 +1,94 @@
+# test_pagination.py
+from sqlalchemy import select, text
+
+from app.models.Farmer import Farmer
+from app.models.User import User
+from app.cache import count_cache
+from app.conditional import bump_table_versions
+from app.pagination import paginate
+
+
+def _seed_farmers(session, count=23):
+    for i in range(count):
+        session.add(Farmer(
+            national_id=f"{i:010d}",
+            full_name=f"name-{i % 4}",
+            father_name="father",
+            phone_number=f"0912{i:07d}",
+        ))
+    session.commit()
+
+
+def _walk(session, query, model, **kwargs):
+    ids, cursor = [], ""
+    while cursor is not None:
+        result = paginate(session, query, model, size=5, cursor=cursor, **kwargs)
+        ids.extend(item.id for item in result.items)
+        cursor = result.next_cursor
+    return ids
+
+
+def test_cursor_matches_offset_order(session):
+    """پیمایش با کرسر باید همان ترتیب صفحه‌بندی offset را بدهد"""
+    _seed_farmers(session)
+    for sort_by in ("id", "full_name", "created_at"):
+        for sort_order in ("asc", "desc"):
+            expected = paginate(
+                session, select(Farmer), Farmer, size=100, sort_by=sort_by, sort_order=sort_order
+            ).items
+            walked = _walk(session, select(Farmer), Farmer, sort_by=sort_by, sort_order=sort_order)
+            assert walked == [farmer.id for farmer in expected]
+
+
+def test_cursor_with_null_sort_values(session):
+    """مقادیر NULL در ستون مرتب‌سازی نباید باعث جا افتادن ردیف شوند"""
+    for i in range(12):
+        session.add(User(
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            password_hash="x",
+            full_name=None if i % 3 == 0 else f"user {i % 2}",
+        ))
+    session.commit()
+
+    for sort_order in ("asc", "desc"):
+        expected = paginate(
+            session, select(User), User, size=100, sort_by="full_name", sort_order=sort_order
+        ).items
+        walked = _walk(session, select(User), User, sort_by="full_name", sort_order=sort_order)
+        assert walked == [user.id for user in expected]
+        assert sorted(walked) == list(range(1, 13))
+
+
+def test_total_is_cached_until_table_is_written(session):
+    """تعداد کل تا نوشتن بعدی در جدول از کش خوانده می‌شود"""
+    count_cache.clear()
+    _seed_farmers(session, 3)
+
+    assert paginate(session, select(Farmer), Farmer).total == 3
+    hits = count_cache.hits
+    assert paginate(session, select(Farmer), Farmer, page=2).total == 3
+    assert count_cache.hits == hits + 1
+
+    farmer = Farmer(national_id="x1", full_name="n", father_name="f", phone_number="p")
+    session.add(farmer)
+    session.commit()
+    assert paginate(session, select(Farmer), Farmer).total == 4
+
+    result = paginate(session, select(Farmer), Farmer, size=2, include_total=False)
+    assert result.total is None and result.pages is None
+    assert result.has_next and len(result.items) == 2
+
+
+def test_cached_total_follows_writes_from_other_workers(session):
+    """نوشتن در process دیگر کش این process را باطل نمی‌کند، ولی نسخه‌ی جدول را زیاد می‌کند"""
+    count_cache.clear()
+    _seed_farmers(session, 3)
+    assert paginate(session, select(Farmer), Farmer).total == 3
+
+    with session.get_bind().begin() as conn:
+        conn.execute(text(
+            "INSERT INTO farmers (national_id, full_name, father_name, phone_number) VALUES ('x2', 'n', 'f', 'p')"
+        ))
+        bump_table_versions(conn, ["farmers"])
+    assert paginate(session, select(Farmer), Farmer).total == 4
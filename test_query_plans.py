@@ -0,0 +1,25 @@
+# test_query_plans.py
+from app.index_advisor import full_scans, missing_fk_indexes, run
+
+
+def test_full_scans_parses_query_plan():
+    plan = (
+        "SCAN city",
+        "SCAN village USING COVERING INDEX uq_village_name_city_id",
+        "SEARCH seeds USING INDEX ix_seeds_measure_unit_id (measure_unit_id=?)",
+        "SCAN farmers_fts VIRTUAL TABLE INDEX 0:M1",
+        "SCAN anon_1",
+        "SCAN CONSTANT ROW",
+    )
+    # subquery مادی‌شده هم پیمایش کامل است
+    assert full_scans(plan) == ["city", "village", "anon_1"]
+
+
+def test_every_foreign_key_is_indexed():
+    assert missing_fk_indexes() == []
+
+
+def test_list_and_lookup_routes_do_not_scan():
+    """هر مسیر PROBES روی پایگاه داده‌ی پرشده؛ فیلتر و جستجوی تکی نباید به SCAN برگردد"""
+    report = run(rows=100)
+    assert [(f.path, f.table, f.plan) for f in report["full_scans"]] == []
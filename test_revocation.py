@@ -0,0 +1,76 @@
+# test_revocation.py
+import asyncio
+import functools
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db import Base, begin_transaction, set_sqlite_pragma
+from app.revocation import TokenDenylist, denylist, get_token_claims, revoke_access_token
+from app.security import create_access_token, create_refresh_token, new_jti
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+    denylist.clear()
+
+
+def bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_revoked_jti_is_seen_by_other_processes(engine):
+    jti = new_jti()
+    with Session(engine) as session:
+        revoke_access_token(session, jti, datetime.utcnow() + timedelta(minutes=5))
+        # توکن منقضی‌شده ذخیره نمی‌شود
+        revoke_access_token(session, new_jti(), datetime.utcnow() - timedelta(minutes=5))
+        session.commit()
+
+    # یک process دیگر با فهرست خالی
+    other = TokenDenylist(refresh_seconds=0)
+    other.refresh(session_factory=lambda: Session(engine))
+    assert jti in other and len(other) == 1
+    assert None not in other and "not-hex" not in other
+
+
+def test_token_claims_reject_revoked_and_refresh_tokens(engine, monkeypatch):
+    monkeypatch.setattr(denylist, "refresh", functools.partial(
+        TokenDenylist.refresh, denylist, session_factory=lambda: Session(engine)
+    ))
+    jti = new_jti()
+    token = create_access_token({"sub": "1", "jti": jti})
+    assert asyncio.run(get_token_claims(bearer(token)))["sub"] == "1"
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_token_claims(bearer(create_refresh_token({"sub": "1"}))))
+    assert error.value.status_code == 401
+
+    with Session(engine) as session:
+        revoke_access_token(session, jti, datetime.utcnow() + timedelta(minutes=5))
+        session.commit()
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_token_claims(bearer(token)))
+    assert error.value.detail == "Token has been revoked"
+
+
+def test_revocation_is_added_to_denylist_only_after_commit(engine):
+    committed, rolled_back = new_jti(), new_jti()
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    with Session(engine) as session:
+        revoke_access_token(session, rolled_back, expires_at)
+        assert rolled_back not in denylist
+        session.rollback()
+        revoke_access_token(session, committed, expires_at)
+        session.commit()
+    assert committed in denylist and rolled_back not in denylist
@@ -0,0 +1,249 @@
+# test_schema.py
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.db import Base, begin_transaction, set_sqlite_pragma
+from app.migrations import create_index_online
+from app.migrations.v0001_baseline import INDEXES as BASELINE_INDEXES
+from app.migrations.v0002_foreign_key_indexes import INDEXES as FOREIGN_KEY_INDEXES
+from app.schema import LATEST_VERSION, SchemaVersionError, schema_version, upgrade, verify_schema
+
+
+# ساختار database.db پیش از migration ها (user_version=0)، همان‌طور که create_all آن زمان ساخته بود؛
+#  عمداً از مدل‌های فعلی ساخته نمی‌شود
+LEGACY_SCHEMA = """
+CREATE TABLE provinces (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (name)
+);
+CREATE TABLE factory (
+    id INTEGER NOT NULL,
+    factory_name VARCHAR(255) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE users (
+    id INTEGER NOT NULL,
+    username VARCHAR(100) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255),
+    is_active BOOLEAN NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (username),
+    UNIQUE (email)
+);
+CREATE TABLE auth (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    access_token VARCHAR(500) NOT NULL,
+    refresh_token VARCHAR(500) NOT NULL,
+    token_type VARCHAR(50) NOT NULL,
+    is_active BOOLEAN NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE city (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    province_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(province_id) REFERENCES provinces (id) ON DELETE CASCADE
+);
+CREATE TABLE village (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    city_id INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(city_id) REFERENCES city (id) ON DELETE CASCADE
+);
+CREATE TABLE measure_units (
+    id INTEGER NOT NULL,
+    unit_name VARCHAR(100) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (unit_name)
+);
+CREATE TABLE pesticides (
+    id INTEGER NOT NULL,
+    pesticide_name VARCHAR(255) NOT NULL,
+    measure_unit_id INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE
+);
+CREATE TABLE seeds (
+    id INTEGER NOT NULL,
+    seed_name VARCHAR(255) NOT NULL,
+    measure_unit_id INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE
+);
+CREATE TABLE crop_years (
+    id INTEGER NOT NULL,
+    crop_year_name VARCHAR(100) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (crop_year_name)
+);
+CREATE TABLE products (
+    id INTEGER NOT NULL,
+    product_name VARCHAR(255) NOT NULL,
+    measure_unit_id INTEGER NOT NULL,
+    crop_year_id INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(measure_unit_id) REFERENCES measure_units (id) ON DELETE CASCADE,
+    FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+);
+CREATE TABLE payment_reasons (
+    id INTEGER NOT NULL,
+    reason_name VARCHAR(255) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (reason_name)
+);
+CREATE TABLE product_prices (
+    id INTEGER NOT NULL,
+    crop_year_id INTEGER NOT NULL,
+    sugar_amount_per_ton_kg NUMERIC(10, 2) NOT NULL,
+    sugar_price_per_kg NUMERIC(10, 2) NOT NULL,
+    pulp_amount_per_ton_kg NUMERIC(10, 2) NOT NULL,
+    pulp_price_per_kg NUMERIC(10, 2) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+);
+CREATE TABLE purity_prices (
+    id INTEGER NOT NULL,
+    crop_year_id INTEGER NOT NULL,
+    base_purity NUMERIC(5, 2) NOT NULL,
+    base_purity_price NUMERIC(10, 2) NOT NULL,
+    price_difference NUMERIC(10, 2) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(crop_year_id) REFERENCES crop_years (id) ON DELETE CASCADE
+);
+CREATE TABLE farmers (
+    id INTEGER NOT NULL,
+    national_id VARCHAR(20) NOT NULL,
+    full_name VARCHAR(255) NOT NULL,
+    father_name VARCHAR(255) NOT NULL,
+    phone_number VARCHAR(20) NOT NULL,
+    sheba_number_1 VARCHAR(30),
+    sheba_number_2 VARCHAR(30),
+    card_number VARCHAR(20),
+    address VARCHAR(500),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_farmers_national_id ON farmers (national_id);
+"""
+
+
+def _engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    return engine
+
+
+def _columns(engine, table):
+    with engine.connect() as conn:
+        return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_xinfo({table})")}
+
+
+def _tables(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+
+
+def _indexes(engine):
+    with engine.connect() as conn:
+        return set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )).scalars())
+
+
+def test_new_database_is_created_at_latest_version(tmp_path):
+    engine = _engine(tmp_path / "new.db")
+    with pytest.raises(SchemaVersionError):
+        verify_schema(engine)
+
+    assert upgrade(engine) == []
+    assert schema_version(engine) == LATEST_VERSION
+    verify_schema(engine)
+    assert _indexes(engine) == {index.name for table in Base.metadata.sorted_tables for index in table.indexes}
+
+
+def test_existing_database_is_migrated_to_the_same_schema(tmp_path):
+    """پایگاه داده‌ی ساخته‌شده پیش از migration ها (user_version=0) به همان ساختار پایگاه داده‌ی تازه می‌رسد"""
+    fresh = _engine(tmp_path / "fresh.db")
+    upgrade(fresh)
+
+    legacy = _engine(tmp_path / "legacy.db")
+    with legacy.connect() as conn:
+        conn.connection.dbapi_connection.executescript(LEGACY_SCHEMA)
+    with legacy.begin() as conn:
+        conn.execute(text("INSERT INTO provinces (name) VALUES ('تهران')"))
+        conn.execute(text("INSERT INTO city (name, province_id) VALUES ('ری', 1)"))
+        conn.execute(text(
+            "INSERT INTO farmers (national_id, full_name, father_name, phone_number) "
+            "VALUES ('0012345678', 'علي كريمي', 'حسن', '09120000000')"
+        ))
+    assert schema_version(legacy) == 0
+
+    # v0001: جدول‌ها، ستون‌های کلید جستجو، ایندکس‌ها و FTS که startup قبلاً می‌ساخت
+    assert upgrade(legacy, target=1) == [1]
+    assert {"revoked_tokens", "table_versions", "farmers_fts"} <= _tables(legacy)
+    assert "name_key" in _columns(legacy, "city") and "full_name_key" in _columns(legacy, "farmers")
+    assert {index[0] for index in BASELINE_INDEXES} <= _indexes(legacy)
+    assert not {name for name, _, _ in FOREIGN_KEY_INDEXES} & _indexes(legacy)
+    with pytest.raises(SchemaVersionError):
+        verify_schema(legacy)
+
+    # v0002: ایندکس کلیدهای خارجی
+    assert upgrade(legacy) == list(range(2, LATEST_VERSION + 1))
+    verify_schema(legacy)
+    assert {name for name, _, _ in FOREIGN_KEY_INDEXES} <= _indexes(legacy)
+    assert _indexes(legacy) == _indexes(fresh)
+    assert _tables(legacy) == _tables(fresh)
+    for table in Base.metadata.tables:
+        assert _columns(legacy, table) == _columns(fresh, table)
+    with legacy.connect() as conn:
+        assert conn.execute(text("SELECT name, name_key FROM city WHERE province_id = 1")).one() == ("ری", "ری")
+        plan = conn.execute(text("EXPLAIN QUERY PLAN SELECT id FROM city WHERE province_id = 1")).all()
+        assert "ix_city_province_id" in plan[0][-1]
+        # v0003: farmers_fts از متن یکسان‌شده دوباره پر شده است
+        assert conn.execute(text("SELECT rowid FROM farmers_fts WHERE farmers_fts MATCH '\"کریمی\"'")).all() == [(1,)]
+
+    # نسخه‌ی جلوتر از کد (بازگشت به نسخه‌ی قدیمی برنامه)
+    with legacy.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version={LATEST_VERSION + 1}")
+        conn.commit()
+    with pytest.raises(SchemaVersionError):
+        upgrade(legacy)
+
+
+def test_create_index_online(tmp_path):
+    engine = _engine(tmp_path / "test.db")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, group_id INTEGER NOT NULL)"))
+        conn.execute(text(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000) "
+            "INSERT INTO items (group_id) SELECT i % 7 FROM n"
+        ))
+    held = create_index_online(engine, "ix_items_group_id", "items", ["group_id"], batch_size=100, pause=0)
+
+    assert held is not None
+    assert create_index_online(engine, "ix_items_group_id", "items", ["group_id"]) is None
+    with engine.connect() as conn:
+        plan = conn.execute(text("EXPLAIN QUERY PLAN SELECT id FROM items WHERE group_id = 3")).all()
+    assert "ix_items_group_id" in plan[0][-1]
@@ -0,0 +1,46 @@
+# test_sqlite_profile.py
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+
+import app.db
+from app.db import PROFILE_PRAGMAS, SQLITE_PROFILES, apply_sqlite_profile, read_pragmas, set_sqlite_pragma
+from app.routers.Debug import _probe_engine, writer_pragmas
+
+SYNCHRONOUS = {"OFF": 0, "NORMAL": 1, "FULL": 2}
+TEMP_STORE = {"DEFAULT": 0, "FILE": 1, "MEMORY": 2}
+
+
+@pytest.mark.parametrize("name", sorted(SQLITE_PROFILES))
+def test_profile_pragmas_are_applied_per_connection(tmp_path, name):
+    profile = SQLITE_PROFILES[name]
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.connect() as connection:
+        apply_sqlite_profile(connection.connection.dbapi_connection.cursor(), profile)
+        applied = read_pragmas(connection, PROFILE_PRAGMAS)
+    engine.dispose()
+
+    assert applied["synchronous"] == SYNCHRONOUS[profile["synchronous"]]
+    assert applied["temp_store"] == TEMP_STORE[profile["temp_store"]]
+    assert applied["cache_size"] == profile["cache_size"]
+    assert applied["wal_autocheckpoint"] == profile["wal_autocheckpoint"]
+    # mmap_size حداکثر تا سقف SQLITE_MAX_MMAP_SIZE کامپایل‌شده پذیرفته می‌شود
+    assert applied["mmap_size"] <= profile["mmap_size"]
+
+
+def test_debug_report_never_waits_for_the_writer(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", pool_size=1, max_overflow=0)
+    event.listen(engine, "connect", set_sqlite_pragma)
+    monkeypatch.setattr(app.db, "engine", engine)
+
+    # تنها اتصال نویسنده در دست یک درخواست دیگر است
+    with engine.connect():
+        assert writer_pragmas()["foreign_keys"] == 1
+        probe = _probe_engine(0.05)
+        with probe.connect():
+            started = time.perf_counter()
+            assert writer_pragmas(timeout=0.05) is None
+            assert time.perf_counter() - started < 1
+        probe.dispose()
+    engine.dispose()
@@ -0,0 +1,87 @@
+# test_transactions.py
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+import app.db
+from app.db import Base, begin_transaction, get_session, set_reader_pragma, set_sqlite_pragma
+from app.models import Provinces
+from app.routers.Provinces import create_province
+from app.routers.Village import get_villages
+from app.schemas.Provinces import ProvincesCreate
+from test_list_queries import call_handler
+
+
+@pytest.fixture
+def app_engine(tmp_path, monkeypatch):
+    """engine های موقت نویسنده و خواننده با همان hook های engine های برنامه"""
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    Base.metadata.create_all(bind=engine)
+    read_engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    event.listen(read_engine, "connect", set_reader_pragma)
+    event.listen(read_engine, "begin", begin_transaction)
+
+    monkeypatch.setattr(app.db, "engine", engine)
+    monkeypatch.setattr(app.db, "write_engine", engine.execution_options(sqlite_begin="IMMEDIATE"))
+    monkeypatch.setattr(app.db, "read_engine", read_engine)
+
+    statements, commits = [], []
+    for bind in (engine, read_engine):
+        event.listen(bind, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        event.listen(bind, "commit", lambda conn: commits.append(conn))
+    yield path, statements, commits
+    engine.dispose()
+    read_engine.dispose()
+
+
+def run_request(method, handler, **params):
+    request = Request({"type": "http", "method": method, "path": "/", "headers": [], "query_string": b""})
+    dependency = get_session(request)
+    result = handler(next(dependency), **params)
+    with pytest.raises(StopIteration):
+        next(dependency)
+    return result
+
+
+def test_write_request_is_one_immediate_transaction(app_engine):
+    _, statements, commits = app_engine
+
+    run_request("POST", create_province, province=ProvincesCreate(name="تهران"))
+
+    assert statements[0] == "BEGIN IMMEDIATE"
+    assert statements.count("BEGIN IMMEDIATE") == 1
+    assert len(commits) == 1
+
+
+def test_read_request_never_takes_write_lock(app_engine):
+    path, statements, _ = app_engine
+    other = sqlite3.connect(path, isolation_level=None, timeout=0)
+
+    def read_while_other_writes(session):
+        result = call_handler(get_villages, session, include_total=False)
+        # اگر این درخواست قفل نوشتن داشت، اتصال دیگر فوراً SQLITE_BUSY می‌گرفت
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+        return result
+
+    run_request("GET", read_while_other_writes)
+    other.close()
+
+    assert statements[0] == "BEGIN DEFERRED"
+    assert not any(s.startswith(("INSERT", "UPDATE", "DELETE")) for s in statements)
+
+
+def test_read_request_uses_read_only_connection(app_engine):
+    def write_in_get(session):
+        assert session.get_bind() is app.db.read_engine
+        session.add(Provinces(name="تهران"))
+        session.flush()
+
+    with pytest.raises(OperationalError, match="readonly"):
+        run_request("GET", write_in_get)
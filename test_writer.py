@@ -0,0 +1,107 @@
+# test_writer.py
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import Session
+
+from app.cache import reference_cache
+from app.db import Base, begin_transaction, set_sqlite_pragma
+from app.models.Farmer import Farmer
+from app.models.MeasureUnit import MeasureUnit
+from app.routers.Farmer import create_farmer
+from app.schemas.Farmer import FarmerCreate
+from app.writer import GroupCommitWriter
+
+
+@pytest.fixture
+def write_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def farmer(national_id):
+    return FarmerCreate(national_id=national_id, full_name="علی", father_name="حسن", phone_number="09120000000")
+
+
+def test_concurrent_writes_share_one_commit(write_engine):
+    commits = []
+    event.listen(write_engine, "commit", lambda conn: commits.append(conn))
+    writer = GroupCommitWriter(max_wait=0.2, session_factory=lambda: Session(write_engine, expire_on_commit=False))
+    # handler اصلی بدون group_commit
+    handler = create_farmer.__wrapped__
+
+    futures = [writer.submit(lambda s, i=i: handler(s, farmer(f"{i:010d}"))) for i in range(10)]
+    # کدملی تکراری فقط همین درخواست را خطادار می‌کند
+    futures.append(writer.submit(lambda s: handler(s, farmer("0000000003"))))
+    writer.stop(timeout=5)
+
+    assert [f.result().national_id for f in futures[:10]] == [f"{i:010d}" for i in range(10)]
+    with pytest.raises(HTTPException) as error:
+        futures[10].result()
+    assert error.value.status_code == 400
+
+    with Session(write_engine) as session:
+        assert session.scalar(select(func.count()).select_from(Farmer)) == 10
+    assert len(commits) < 10
+    stats = writer.stats()
+    assert stats["operations"] == 11 and stats["failed"] == 1
+    assert stats["batches"] == len(commits)
+
+
+def test_full_queue_rejects_with_503(write_engine):
+    started, release = threading.Event(), threading.Event()
+    writer = GroupCommitWriter(max_batch=1, max_wait=0, queue_limit=2,
+                               session_factory=lambda: Session(write_engine, expire_on_commit=False))
+
+    def blocking(session):
+        started.set()
+        release.wait(5)
+
+    first = writer.submit(blocking)
+    assert started.wait(5)
+    queued = [writer.submit(lambda s: None) for _ in range(2)]
+    with pytest.raises(HTTPException) as error:
+        writer.submit(lambda s: None)
+    assert error.value.status_code == 503 and error.value.headers["Retry-After"]
+
+    release.set()
+    writer.stop(timeout=5)
+    assert all(f.done() for f in [first] + queued)
+
+
+def test_reference_cache_miss_during_group_commit_batch(tmp_path):
+    # مثل engine نویسنده: یک اتصال؛ pool_timeout کوتاه تا بن‌بست به جای 30 ثانیه زود دیده شود
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", pool_size=1, max_overflow=0, pool_timeout=2)
+    event.listen(engine, "connect", set_sqlite_pragma)
+    event.listen(engine, "begin", begin_transaction)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO measure_units (unit_name) VALUES ('کیلوگرم')"))
+    reference_cache.clear()
+
+    batch_connected = threading.Event()
+    writer = GroupCommitWriter(max_wait=0, session_factory=lambda: Session(engine, expire_on_commit=False))
+
+    def batch(session):
+        # batch اتصال را گرفته و تا درخواست دیگر وارد get شود صبر می‌کند
+        session.execute(text("SELECT 1"))
+        batch_connected.set()
+        time.sleep(0.3)
+        return reference_cache.get(session, MeasureUnit, 1).unit_name
+
+    future = writer.submit(batch)
+    assert batch_connected.wait(5)
+    with Session(engine) as session:
+        # درخواست همگام: cache miss و منتظر همان تنها اتصال
+        assert reference_cache.get(session, MeasureUnit, 1).unit_name == "کیلوگرم"
+    assert future.result(timeout=5) == "کیلوگرم"
+    writer.stop(timeout=5)
+    reference_cache.clear()
+    engine.dispose()